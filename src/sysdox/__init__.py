@@ -1,11 +1,14 @@
-from . import system, network, extra, firmware, specs
+from . import system, network, extra, firmware, specs, registry
+from .query import get, get_many
+from .identity import fingerprint
 
-def dump():
-    """Main API entry point to get all sys info."""
-    return {
-        "system": system.dump(),
-        "network": network.dump(),
-        "extra": extra.dump(),
-        "firmware": firmware.dump(),
-        "specs": specs.dump()
-    }
\ No newline at end of file
+def dump(sections=None, costs=None, parallel=False, meta=False):
+    """Main API entry point to get all sys info.
+
+    sections picks collectors by name (every default collector when omitted),
+    costs limits the run to those cost classes and parallel runs the collectors
+    in a thread pool. meta adds a _meta section with sysdox's own CPU time, RSS,
+    subprocesses and I/O per collector. See sysdox.registry for the collector
+    metadata.
+    """
+    return registry.run(sections, costs=costs, parallel=parallel, meta=meta)
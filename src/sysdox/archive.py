@@ -0,0 +1,208 @@
+import os
+import json
+import zlib
+import struct
+import bisect
+import hashlib
+import threading
+
+# objects.idx: digest, segment number, offset, compressed length
+OBJECT_RECORD = struct.Struct("<16sIQI")
+# time.idx: timestamp, digest of the snapshot manifest
+TIME_RECORD = struct.Struct("<d16s")
+
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+def _digest(blob):
+    return hashlib.sha256(blob).digest()[:16]
+
+class _TimeIndex:
+    """Fixed size records on disk so lookups can bisect without loading the file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a+b")
+        size = os.path.getsize(path)
+        if size % TIME_RECORD.size:
+            # a torn write from a crash, drop the partial record
+            self.file.truncate(size - size % TIME_RECORD.size)
+
+    def __len__(self):
+        self.file.seek(0, os.SEEK_END)
+        return self.file.tell() // TIME_RECORD.size
+
+    def __getitem__(self, i):
+        self.file.seek(i * TIME_RECORD.size)
+        return TIME_RECORD.unpack(self.file.read(TIME_RECORD.size))
+
+    def timestamp(self, i):
+        return self[i][0]
+
+    def append(self, ts, digest):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(TIME_RECORD.pack(ts, digest))
+        self.file.flush()
+
+class _Timestamps:
+    """Sequence view over the time index, only reads the records bisect touches."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        return self.index.timestamp(i)
+
+class Archive:
+    """Content addressed snapshot archive with a time index.
+
+    Every section of a snapshot (and every key of a dict section, such as
+    specs.motherboard_info) is stored once per distinct content, zlib
+    compressed, in append-only segment files. A snapshot itself is a small
+    manifest of digests, and time.idx maps timestamps to manifests with fixed
+    size records, so "state at time T" is a binary search over the file.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "segments"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._objects = {}
+        self._readers = {}
+        self._load_objects()
+        self._times = _TimeIndex(os.path.join(directory, "time.idx"))
+        self._segment, self._segment_file = self._open_segment()
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, "segments", f"{number:06d}.seg")
+
+    def _load_objects(self):
+        path = os.path.join(self.directory, "objects.idx")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % OBJECT_RECORD.size
+            for offset in range(0, usable, OBJECT_RECORD.size):
+                digest, segment, start, length = OBJECT_RECORD.unpack_from(data, offset)
+                self._objects[digest] = (segment, start, length)
+            if usable != len(data):
+                # a torn write from a crash, drop it so new records stay aligned
+                with open(path, "r+b") as f:
+                    f.truncate(usable)
+        self._object_index = open(path, "ab")
+
+    def _open_segment(self):
+        numbers = [int(name.split(".")[0]) for name in os.listdir(os.path.join(self.directory, "segments"))
+                   if name.endswith(".seg")]
+        number = max(numbers) if numbers else 0
+        return number, open(self._segment_path(number), "ab")
+
+    def _put(self, value):
+        """Store a value unless identical content is already archived."""
+        blob = _encode(value)
+        digest = _digest(blob)
+        if digest in self._objects:
+            return digest
+        if self._segment_file.tell() >= SEGMENT_SIZE:
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+        data = zlib.compress(blob, 6)
+        offset = self._segment_file.tell()
+        self._segment_file.write(data)
+        self._segment_file.flush()
+        self._objects[digest] = (self._segment, offset, len(data))
+        self._object_index.write(OBJECT_RECORD.pack(digest, self._segment, offset, len(data)))
+        self._object_index.flush()
+        return digest
+
+    def _get(self, digest):
+        segment, offset, length = self._objects[digest]
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+        reader.seek(offset)
+        return json.loads(zlib.decompress(reader.read(length)))
+
+    def append(self, snapshot, ts):
+        """Archive one snapshot ({section: data}) taken at ts (epoch seconds)."""
+        with self._lock:
+            count = len(self._times)
+            if count and ts < self._times.timestamp(count - 1):
+                raise ValueError("Snapshots must be appended in time order")
+            manifest = {}
+            for section, data in snapshot.items():
+                if isinstance(data, dict):
+                    manifest[section] = {"keys": {key: self._put(value).hex() for key, value in data.items()}}
+                else:
+                    manifest[section] = {"value": self._put(data).hex()}
+            self._times.append(ts, self._put(manifest))
+
+    def _load(self, digest):
+        manifest = self._get(digest)
+        snapshot = {}
+        for section, entry in manifest.items():
+            if "keys" in entry:
+                snapshot[section] = {key: self._get(bytes.fromhex(d)) for key, d in entry["keys"].items()}
+            else:
+                snapshot[section] = self._get(bytes.fromhex(entry["value"]))
+        return snapshot
+
+    def __len__(self):
+        return len(self._times)
+
+    def at(self, ts):
+        """(timestamp, snapshot) of the state at time ts, None before the first one."""
+        with self._lock:
+            i = bisect.bisect_right(_Timestamps(self._times), ts) - 1
+            if i < 0:
+                return None
+            when, digest = self._times[i]
+            return when, self._load(digest)
+
+    def range(self, start, end):
+        """Yield (timestamp, snapshot) for every snapshot with start <= ts <= end."""
+        with self._lock:
+            i = bisect.bisect_left(_Timestamps(self._times), start)
+            entries = []
+            while i < len(self._times):
+                when, digest = self._times[i]
+                if when > end:
+                    break
+                entries.append((when, digest))
+                i += 1
+        for when, digest in entries:
+            with self._lock:
+                snapshot = self._load(digest)
+            yield when, snapshot
+
+    def stats(self):
+        """Object count and on-disk size, handy to see how well sections dedupe."""
+        segments = os.path.join(self.directory, "segments")
+        return {
+            "snapshots": len(self._times),
+            "objects": len(self._objects),
+            "bytes": sum(os.path.getsize(os.path.join(segments, name)) for name in os.listdir(segments))
+        }
+
+    def close(self):
+        for f in [self._segment_file, self._object_index, self._times.file, *self._readers.values()]:
+            f.close()
+        self._readers = {}
+
+class ArchiveSink:
+    """record() sink that appends every snapshot to an Archive."""
+
+    def __init__(self, directory):
+        self.archive = Archive(directory)
+
+    def write(self, ts, snapshot):
+        self.archive.append(snapshot, ts)
+
+    def close(self):
+        self.archive.close()
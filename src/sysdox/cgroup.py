@@ -0,0 +1,174 @@
+import os
+import platform
+import psutil
+from . import pressure, rootfs, verbose
+
+CGROUP_FILES = (
+    "cpu.max", "cpu.stat", "cpuset.cpus.effective", "memory.max", "memory.current",
+    "memory.stat", "io.stat", "pids.current", "pids.max"
+)
+
+def find_root():
+    """Mountpoint of the cgroup v2 (unified) hierarchy, or None."""
+    for root in (rootfs.path("/sys/fs/cgroup"), rootfs.path("/sys/fs/cgroup/unified")):
+        if os.path.exists(os.path.join(root, "cgroup.controllers")):
+            return root
+    return None
+
+def current_cgroup(path=None):
+    """cgroup v2 path of this process, relative to the hierarchy root."""
+    path = path or rootfs.path("/proc/self/cgroup")
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return line[3:].strip() or "/"
+    except OSError as e:
+        verbose.debug("could not read file", path=path, error=e)
+    return None
+
+def _limit(value):
+    return None if value == "max" else int(value)
+
+def _flat_keyed(text):
+    values = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if value:
+            values[key] = int(value)
+    return values
+
+def _io_stat(text):
+    devices = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        devices[parts[0]] = {
+            key: int(value) for key, _, value in (field.partition("=") for field in parts[1:])
+        }
+    return devices
+
+def _cpu_max(text):
+    quota, _, period = text.partition(" ")
+    return {"quota": _limit(quota), "period": int(period or 100000)}
+
+def _count_cpus(text):
+    count = 0
+    for chunk in text.split(","):
+        if "-" in chunk:
+            start, end = chunk.split("-")
+            count += int(end) - int(start) + 1
+        elif chunk.strip():
+            count += 1
+    return count
+
+PARSERS = {
+    "cpu.max": _cpu_max,
+    "cpu.stat": _flat_keyed,
+    "cpuset.cpus.effective": _count_cpus,
+    "memory.max": _limit,
+    "memory.current": int,
+    "memory.stat": _flat_keyed,
+    "io.stat": _io_stat,
+    "pids.current": int,
+    "pids.max": _limit
+}
+
+def read_cgroup(directory, files=CGROUP_FILES):
+    """Read and parse the interface files of one cgroup, skipping absent ones."""
+    data = {}
+    for name in files:
+        try:
+            with open(os.path.join(directory, name)) as f:
+                data[name] = PARSERS[name](f.read().strip())
+        except (OSError, ValueError) as e:
+            verbose.debug("could not read file", path=os.path.join(directory, name), error=e)
+            continue
+    return data
+
+def walk(root=None, files=CGROUP_FILES):
+    """Read every cgroup below root in one scandir walk, {relative path: data}."""
+    root = root or find_root()
+    if root is None:
+        return {}
+    groups = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        relative = "/" + os.path.relpath(directory, root) if directory != root else "/"
+        groups[relative] = read_cgroup(directory, files)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return groups
+
+def _ancestors(root, path):
+    """Directories from path up to (and including) the hierarchy root."""
+    parts = [p for p in path.strip("/").split("/") if p]
+    for depth in range(len(parts), -1, -1):
+        yield os.path.join(root, *parts[:depth])
+
+def effective_limits(path=None, root=None):
+    """CPUs and memory this cgroup can actually use, tightest limit up the tree.
+
+    Returns {"cpus": float, "memory": int bytes}, falling back to the host
+    totals where no limit applies.
+    """
+    root = root or find_root()
+    path = path or current_cgroup()
+    cpus = float(psutil.cpu_count(logical=True) or 1)
+    memory = psutil.virtual_memory().total
+    if root is None or path is None:
+        return {"cpus": cpus, "memory": memory}
+    for directory in _ancestors(root, path):
+        data = read_cgroup(directory, ("cpu.max", "cpuset.cpus.effective", "memory.max"))
+        quota = data.get("cpu.max", {}).get("quota")
+        if quota is not None:
+            cpus = min(cpus, quota / data["cpu.max"]["period"])
+        if data.get("cpuset.cpus.effective"):
+            cpus = min(cpus, float(data["cpuset.cpus.effective"]))
+        if data.get("memory.max") is not None:
+            memory = min(memory, data["memory.max"])
+    return {"cpus": round(cpus, 2), "memory": memory}
+
+def summary(data):
+    """Derived throttling and memory figures for one cgroup's raw data."""
+    stat = data.get("cpu.stat", {})
+    periods = stat.get("nr_periods", 0)
+    result = {
+        "throttled_periods": stat.get("nr_throttled", 0),
+        "throttled_percent": round(100.0 * stat.get("nr_throttled", 0) / periods, 2) if periods else 0.0,
+        "throttled_usec": stat.get("throttled_usec", 0),
+        "memory_current": data.get("memory.current"),
+        "memory_max": data.get("memory.max"),
+        "pids_current": data.get("pids.current")
+    }
+    if data.get("memory.max") and data.get("memory.current") is not None:
+        result["memory_percent"] = round(100.0 * data["memory.current"] / data["memory.max"], 2)
+    return result
+
+def dump(hierarchy=False):
+    """Resource usage and limits of this process's cgroup (v2 only)."""
+    if platform.system() != "Linux":
+        return {"error": "cgroups are only available on Linux"}
+    root = find_root()
+    path = current_cgroup()
+    if root is None or path is None:
+        return {"error": "No cgroup v2 hierarchy found"}
+    directory = os.path.join(root, path.lstrip("/"))
+    data = read_cgroup(directory)
+    info = {
+        "path": path,
+        "effective": effective_limits(path, root),
+        "summary": summary(data),
+        "pressure": pressure.read_pressure(directory, cgroup=True),
+        "raw": data
+    }
+    if hierarchy:
+        info["hierarchy"] = walk(root)
+    return info
@@ -1,7 +1,12 @@
 import argparse
 import json
 from pprint import pformat
-from . import system, network, extra, firmware, specs
+from . import registry, pressure, rootfs, verbose
+from .record import record
+from .query import parse_path, get_many
+from .rules import RuleEngine, load_rules, alert_sink, watch
+from .overhead import Governor
+from .shm import DEFAULT_PATH as DEFAULT_SHM_PATH, DEFAULT_SIZE as DEFAULT_SHM_SIZE
 import atexit
 import socket
 import os
@@ -66,35 +71,179 @@ def print_pretty(data, indent="⤷ ", sub_indent="   ↳ "):
         else:  # Handle other types of shit
             print(f"{indent}{content}")
 
+def print_collectors():
+    """List registered collectors with their metadata"""
+    for name in registry.names():
+        info = registry.get(name).info()
+        flag = "*" if info["default"] else " "
+        print(f"{flag} {name:<20} {info['cost']:<11} {info['volatility']:<9} {info['description']}")
+
+def build_sinks(args):
+    """Sinks for the record command"""
+    sinks = []
+    if args.archive:
+        from .archive import ArchiveSink
+        sinks.append(ArchiveSink(args.archive))
+    if args.shm:
+        from .shm import ShmSink
+        sinks.append(ShmSink(args.shm, args.shm_size))
+    if args.sqlite:
+        from .history import SqliteSink
+        sinks.append(SqliteSink(args.sqlite))
+    if args.stream:
+        from .delta import StreamSink
+        sinks.append(StreamSink(args.stream, delta=args.delta, keyframe_every=args.keyframe_every))
+    return sinks
+
+def log_level(value):
+    try:
+        return verbose.parse_level(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
 def main():
-    if os.geteuid() != 0:
-        print("This command must be run as root. Please use 'sudo'.")
-        sys.exit(1)
     parser = argparse.ArgumentParser(description="System Info Dumper")
     parser.add_argument('--json', action='store_true', help='Output in raw JSON format')
-    parser.add_argument('-c', '--command', choices=['network', 'system', 'extra', 'firmware', 'specs'], help='Run a specific command and output its data')
+    parser.add_argument('-c', '--command', choices=registry.names(), help='Run a specific command and output its data')
+    parser.add_argument('--skip-cost', action='append', choices=registry.COSTS, default=[], help='Skip collectors of this cost class (repeatable)')
+    parser.add_argument('--parallel', action='store_true', help='Run collectors in parallel')
+    parser.add_argument('--list', action='store_true', help='List available collectors and exit')
+    parser.add_argument('--root', metavar='DIR', default=os.environ.get(rootfs.ENV_VAR), help=f'Read /proc, /sys and /etc from DIR or a capture tarball instead of the live system (also ${rootfs.ENV_VAR})')
+    parser.add_argument('--meta', action='store_true', help="Add a _meta section with sysdox's own overhead per collector")
+    # a type rather than choices, argparse only checks choices on the command line, not the env default
+    parser.add_argument('--log-level', type=log_level, default=os.environ.get(verbose.ENV_LEVEL), help=f"Log collector failures and timings as JSON lines at this level and above: {', '.join(sorted(verbose.LEVELS, key=verbose.LEVELS.get))} or a number (also ${verbose.ENV_LEVEL})")
+    parser.add_argument('--log-file', metavar='FILE', default=os.environ.get(verbose.ENV_FILE), help=f'Append the log to FILE instead of stderr (also ${verbose.ENV_FILE})')
+    subparsers = parser.add_subparsers(dest='action')
+
+    record_parser = subparsers.add_parser('record', help='Sample collectors continuously into a sink')
+    record_parser.add_argument('--archive', metavar='DIR', help='Store snapshots in a content-addressed archive')
+    record_parser.add_argument('--shm', nargs='?', const=DEFAULT_SHM_PATH, metavar='PATH', help=f'Publish the latest snapshot in shared memory (default: {DEFAULT_SHM_PATH})')
+    record_parser.add_argument('--sqlite', metavar='FILE', help='Append numeric fields to a SQLite history file (raw for 31 days, 5 minute rollups for a year)')
+    record_parser.add_argument('--stream', nargs='?', const='-', metavar='FILE', help='Write every snapshot as a JSON line to FILE (default: stdout)')
+    record_parser.add_argument('--delta', action='store_true', help='With --stream, write periodic keyframes and only JSON patch operations for the changed paths in between')
+    record_parser.add_argument('--keyframe-every', type=int, default=60, metavar='N', help='With --delta, write a full snapshot every N samples (default: 60)')
+    record_parser.add_argument('--shm-size', type=int, default=DEFAULT_SHM_SIZE, help='Size of the shared memory segment in bytes')
+    record_parser.add_argument('--interval', type=float, default=60.0, help='Seconds between samples (default: 60)')
+    record_parser.add_argument('--count', type=int, help='Stop after this many samples')
+    record_parser.add_argument('-c', '--collector', action='append', choices=registry.names(), dest='collectors', help='Collector to record (repeatable, default: all default collectors)')
+    record_parser.add_argument('--budget', type=float, metavar='PERCENT', help='CPU budget in percent of one core; over it, intervals stretch and expensive collectors are served from their last result')
+    record_parser.add_argument('--max-load', type=float, metavar='LOAD', help='With --budget, also back off while the 1 minute load average per CPU is above this')
+    record_parser.add_argument('--wake-on', action='append', default=[], metavar='RESOURCE:STALL_MS[:WINDOW_MS]', help='Also sample when PSI reports this much stall time (cpu, memory or io) within the window (repeatable)')
+
+    watch_parser = subparsers.add_parser('watch', help='Evaluate alert rules on every sample')
+    watch_parser.add_argument('--rules', required=True, metavar='FILE', help='JSON list of {"name", "expr", "for", "severity"} rules')
+    watch_parser.add_argument('--alerts', action='append', metavar='TARGET', help='Where alerts go: a file, "-" for stdout or unix:/path for a datagram socket (repeatable, default: -)')
+    watch_parser.add_argument('--interval', type=float, default=10.0, help='Seconds between samples (default: 10)')
+    watch_parser.add_argument('--count', type=int, help='Stop after this many samples')
+    watch_parser.add_argument('--budget', type=float, metavar='PERCENT', help='CPU budget in percent of one core; over it, intervals stretch and expensive collectors are served from their last result')
+    watch_parser.add_argument('--max-load', type=float, metavar='LOAD', help='With --budget, also back off while the 1 minute load average per CPU is above this')
+
+    capture_parser = subparsers.add_parser('capture', help='Snapshot the /proc, /sys and /etc files and command outputs collectors use into a tarball')
+    capture_parser.add_argument('output', metavar='FILE', help='Tarball to write, e.g. host.tar.gz')
+    capture_parser.add_argument('--cmdlines', action='store_true', help='Also capture process command lines, which may contain credentials')
+
+    get_parser = subparsers.add_parser('get', help='Print the value at one or more dotted paths')
+    get_parser.add_argument('paths', nargs='+', metavar='PATH', help='e.g. network.interface_stats.eth0.bytes_recv or specs.storage_info.*.health')
     args = parser.parse_args()
 
-    if args.command:
-        if args.command == 'network':
-            data = network.dump()
-        elif args.command == 'system':
-            data = system.dump()
-        elif args.command == 'extra':
-            data = extra.dump()
-        elif args.command == 'firmware':
-            data = firmware.dump()
-        elif args.command == 'specs':
-            data = specs.dump()
-
-        if args.json:
-            print(json.dumps(data, indent=4))
-        else:
-            print_pretty(data)
+    if args.log_level is not None or args.log_file:
+        verbose.configure(args.log_level if args.log_level is not None else "warning", args.log_file)
+
+    if args.list:
+        print_collectors()
+        return
+
+    if args.action == 'capture':
+        counts = rootfs.capture(args.output, cmdlines=args.cmdlines)
+        print(f"Captured {counts['files']} files and {counts['commands']} command outputs to {args.output}")
+        return
+
+    if args.root:
+        rootfs.set_root(args.root)
+
+    if args.action == 'record':
+        selection = args.collectors
+    elif args.action == 'watch':
+        try:
+            engine = RuleEngine(load_rules(args.rules))
+        except (OSError, ValueError, KeyError) as e:
+            watch_parser.error(f"--rules: {e}")
+        # only what the rules point into is ever run
+        selection = engine.collectors()
+        unknown = [name for name in selection if name not in registry.names()]
+        if unknown:
+            watch_parser.error(f"unknown collector in rules: {', '.join(unknown)}")
+    elif args.action == 'get':
+        try:
+            selection = sorted({parse_path(path)[0] for path in args.paths})
+        except ValueError as e:
+            get_parser.error(str(e))
+        unknown = [name for name in selection if name not in registry.names()]
+        if unknown:
+            get_parser.error(f"unknown collector: {', '.join(unknown)}")
+    else:
+        selection = [args.command] if args.command else None
+    costs = [cost for cost in registry.COSTS if cost not in args.skip_cost]
+    selected = registry.collectors(selection, costs)
+
+    # a capture is just files, replaying it needs no privileges
+    if not args.root and os.geteuid() != 0 and any(c.cost == registry.PRIVILEGED for c in selected):
+        print("This command must be run as root. Please use 'sudo'.")
+        sys.exit(1)
+
+    if args.action == 'record':
+        sinks = build_sinks(args)
+        if not sinks:
+            record_parser.error("at least one sink is required (--archive, --shm, --sqlite, --stream)")
+        if args.delta and not args.stream:
+            record_parser.error("--delta needs --stream")
+        try:
+            triggers = [pressure.parse_trigger(spec) for spec in args.wake_on]
+        except (ValueError, OSError) as e:
+            record_parser.error(f"--wake-on: {e}")
+        governor = None
+        if args.budget is not None:
+            governor = Governor(budget=args.budget / 100.0, max_load=args.max_load)
+        record(sinks, interval=args.interval, count=args.count, selection=selection,
+               costs=costs, parallel=args.parallel, triggers=triggers,
+               meta=args.meta, governor=governor)
         return
 
-    # Here are all of them dumps in case you want to mod it
-    data = {**system.dump(), **network.dump(), **extra.dump(), **firmware.dump(), **specs.dump()}
+    if args.action == 'watch':
+        governor = None
+        if args.budget is not None:
+            governor = Governor(budget=args.budget / 100.0, max_load=args.max_load)
+        watch(engine, [alert_sink(target) for target in args.alerts or ['-']],
+              interval=args.interval, count=args.count, governor=governor)
+        return
+
+    if args.action == 'get':
+        try:
+            values = get_many(args.paths)
+        except KeyError as e:
+            print(f"sysdox: {e.args[0]}", file=sys.stderr)
+            sys.exit(1)
+        for path in args.paths:
+            value = values[path]
+            if isinstance(value, str) and not args.json:
+                print(value)
+            else:
+                print(json.dumps(value, indent=4 if isinstance(value, (dict, list)) else None, default=str))
+        return
+
+    results = registry.run(selection, costs=costs, parallel=args.parallel, meta=args.meta)
+    meta = results.pop('_meta', None)
+
+    if args.command:
+        data = results.get(args.command, {})
+    else:
+        # Here are all of them dumps in case you want to mod it
+        data = {}
+        for section in results.values():
+            if isinstance(section, dict):
+                data.update(section)
+    if meta is not None and isinstance(data, dict):
+        data['_meta'] = meta
 
     if args.json:
         print(json.dumps(data, indent=4))
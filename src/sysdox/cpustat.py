@@ -0,0 +1,146 @@
+import math
+import time
+from collections import deque
+from . import rootfs, registry, verbose
+
+# /proc/stat columns we care about, in kernel order (guest/guest_nice are already
+# accounted inside user/nice so they are left out of the totals)
+STAT_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+def read_proc_stat(path=None):
+    """Read per-core jiffy counters from /proc/stat in a single pass.
+
+    Returns (cores, columns) where cores is the list of cpu names ("cpu" is the
+    aggregate line) and columns maps every field to a list with one counter per core.
+    """
+    path = path or rootfs.path("/proc/stat")
+    cores = []
+    columns = {field: [] for field in STAT_FIELDS}
+    appenders = [columns[field].append for field in STAT_FIELDS]
+    width = len(STAT_FIELDS)
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.startswith(b"cpu"):
+                break  # cpu lines always come first
+            parts = line.split()
+            cores.append(parts[0].decode())
+            values = parts[1:width + 1]
+            values += [b"0"] * (width - len(values))  # old kernels lack steal
+            for append, value in zip(appenders, values):
+                append(int(value))
+    return cores, columns
+
+def compute_percentages(prev, curr):
+    """Turn two read_proc_stat() column sets into per-field percentage columns.
+
+    All cores are processed together, one comprehension per field, so the cost
+    stays flat no matter how many cores the host has.
+    """
+    delta = {
+        field: [c - p for p, c in zip(prev[field], curr[field])]
+        for field in STAT_FIELDS
+    }
+    totals = [sum(row) for row in zip(*(delta[field] for field in STAT_FIELDS))]
+
+    def pct(values):
+        # a core with no ticks in the interval (offline, or a very short one) is idle
+        return [round(100.0 * v / t, 2) if t else 0.0 for v, t in zip(values, totals)]
+
+    return {
+        "user": pct([u + n for u, n in zip(delta["user"], delta["nice"])]),
+        "system": pct(delta["system"]),
+        "iowait": pct(delta["iowait"]),
+        "irq": pct([i + s for i, s in zip(delta["irq"], delta["softirq"])]),
+        "steal": pct(delta["steal"]),
+        "busy": pct([t - i - w for t, i, w in zip(totals, delta["idle"], delta["iowait"])]),
+    }
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = min(len(values), max(1, math.ceil(q / 100.0 * len(values)))) - 1
+    return values[rank]
+
+class CpuSampler:
+    """Keeps a rolling window of per-core utilisation built from /proc/stat deltas.
+
+    Call sample() once per tick; every call costs exactly one read of /proc/stat.
+    """
+
+    def __init__(self, window=60, path=None):
+        self.path = path
+        self.window = deque(maxlen=window)
+        self.cores = []
+        self._prev = None
+
+    def sample(self):
+        """Take one reading and return per-core percentages since the previous one."""
+        cores, columns = read_proc_stat(self.path)
+        prev, self._prev = self._prev, columns
+        if prev is None or cores != self.cores:
+            # first tick or cpu hotplug, nothing to diff against yet
+            self.cores = cores
+            self.window.clear()
+            return None
+        percents = compute_percentages(prev, columns)
+        self.window.append(percents)
+        return self.latest()
+
+    def latest(self):
+        """Per-core view of the newest sample, keyed by cpu name."""
+        if not self.window:
+            return {}
+        percents = self.window[-1]
+        return {
+            core: {metric: values[i] for metric, values in percents.items()}
+            for i, core in enumerate(self.cores)
+        }
+
+    def percentiles(self, metric="busy", q=(50, 95, 99)):
+        """Windowed percentiles of one metric for every core."""
+        result = {}
+        for i, core in enumerate(self.cores):
+            values = sorted(tick[metric][i] for tick in self.window)
+            result[core] = {f"p{p}": percentile(values, p) for p in q}
+        return result
+
+    def hot_cores(self, threshold=90.0, top=5):
+        """Summarise saturated cores and steal time from the newest sample."""
+        if not self.window:
+            return {}
+        percents = self.window[-1]
+        # index 0 is the aggregate "cpu" line, only look at real cores
+        busy = percents["busy"][1:]
+        steal = percents["steal"][1:]
+        names = self.cores[1:]
+        ranked = sorted(range(len(names)), key=busy.__getitem__, reverse=True)[:top]
+        worst_steal = max(range(len(names)), key=steal.__getitem__) if names else None
+        return {
+            "saturated": [names[i] for i in range(len(names)) if busy[i] >= threshold],
+            "top": {names[i]: busy[i] for i in ranked},
+            "max_steal": {names[worst_steal]: steal[worst_steal]} if worst_steal is not None else {},
+            "average_busy": percents["busy"][0],
+            "imbalance": round(max(busy) - percents["busy"][0], 2) if busy else 0.0,
+        }
+
+_sampler = CpuSampler(window=1)
+
+def dump(interval=0.5):
+    """Per-core utilisation.
+
+    While recording or watching this is the utilisation since the previous
+    tick; a one shot run (and the first tick) samples interval seconds apart.
+    """
+    try:
+        sampler = _sampler if registry.sampling() else CpuSampler(window=1)
+        if sampler.sample() is None:
+            time.sleep(interval)
+            sampler.sample()
+        return {
+            "per_core": sampler.latest(),
+            "hot_cores": sampler.hot_cores()
+        }
+    except Exception as e:
+        verbose.warning("cpu sampling failed", error=e)
+        return {"error": f"Unable to sample /proc/stat: {e}"}
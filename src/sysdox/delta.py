@@ -0,0 +1,166 @@
+import sys
+import json
+import copy
+from .identity import fingerprint
+
+KEYFRAME = "keyframe"
+DELTA = "delta"
+
+def _normalize(value):
+    """Round trip through JSON so tuples, int keys and odd types compare like the consumer sees them."""
+    return json.loads(json.dumps(value, default=str))
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+def diff(old, new, path=""):
+    """JSON patch (RFC 6902 add/remove/replace) operations turning old into new.
+
+    Dicts are compared key by key and lists of equal length item by item, so an
+    unchanged subtree costs nothing in the output.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(diff(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            ops.extend(diff(a, b, f"{path}/{i}"))
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+def apply(document, ops):
+    """Apply diff() operations to document in place and return it."""
+    for op in ops:
+        if op["path"] == "":
+            if op["op"] == "remove":
+                raise ValueError("Cannot remove the whole document")
+            document = copy.deepcopy(op["value"])
+            continue
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del parent[index]
+            elif op["op"] == "replace":
+                parent[index] = copy.deepcopy(op["value"])
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+        else:
+            if op["op"] in ("add", "replace"):
+                parent[last] = copy.deepcopy(op["value"])
+            elif op["op"] == "remove":
+                del parent[last]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return document
+
+class DeltaEncoder:
+    """Turns a sequence of snapshots into keyframes and patches.
+
+    A full keyframe goes out every keyframe_every records (and first), the
+    records in between only carry the operations against the previous
+    snapshot. Every record has a sequence number so a consumer can tell it
+    missed one and wait for the next keyframe.
+    """
+
+    def __init__(self, keyframe_every=60):
+        self.keyframe_every = max(1, keyframe_every)
+        self.seq = 0
+        self._previous = None
+
+    def encode(self, ts, snapshot):
+        current = _normalize(snapshot)
+        if self._previous is None or self.seq % self.keyframe_every == 0:
+            record = {"type": KEYFRAME, "seq": self.seq, "ts": ts, "snapshot": current}
+        else:
+            record = {"type": DELTA, "seq": self.seq, "ts": ts, "ops": diff(self._previous, current)}
+        self._previous = current
+        self.seq += 1
+        return record
+
+class DeltaDecoder:
+    """Rebuilds full snapshots from DeltaEncoder records.
+
+    feed() returns (ts, snapshot) for every record it can apply, and None for
+    deltas it has to drop: before the first keyframe, or after a gap in the
+    sequence until the next keyframe arrives.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.seq = None
+
+    def feed(self, record):
+        if record["type"] == KEYFRAME:
+            self.snapshot = copy.deepcopy(record["snapshot"])
+        elif record["type"] == DELTA:
+            if self.snapshot is None or self.seq is None or record["seq"] != self.seq + 1:
+                self.snapshot = None  # out of sync, wait for a keyframe
+                return None
+            self.snapshot = apply(self.snapshot, record["ops"])
+        else:
+            raise ValueError(f"Unknown record type: {record['type']}")
+        # plain streams from older versions have keyframes without a seq
+        self.seq = record.get("seq")
+        return record["ts"], self.snapshot
+
+def decode_stream(lines):
+    """Yield (ts, snapshot) for every usable record of a JSON lines stream.
+
+    The yielded snapshot is the decoder's working copy; copy it if you keep it
+    past the next iteration.
+    """
+    decoder = DeltaDecoder()
+    for line in lines:
+        if not line.strip():
+            continue
+        result = decoder.feed(json.loads(line))
+        if result is not None:
+            yield result
+
+class StreamSink:
+    """record() sink writing one JSON line per snapshot, delta encoded if asked.
+
+    Every record carries the host's hardware fingerprint so consumers can tell
+    streams from identical and from replaced hardware apart.
+    """
+
+    def __init__(self, path="-", delta=False, keyframe_every=60):
+        self.file = sys.stdout if path == "-" else open(path, "a")
+        self.encoder = DeltaEncoder(keyframe_every) if delta else None
+        self.seq = 0
+
+    def write(self, ts, snapshot):
+        if self.encoder is not None:
+            record = self.encoder.encode(ts, snapshot)
+        else:
+            record = {"type": KEYFRAME, "seq": self.seq, "ts": ts, "snapshot": snapshot}
+            self.seq += 1
+        record["fingerprint"] = fingerprint()["fingerprint"]
+        self.file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
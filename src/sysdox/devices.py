@@ -0,0 +1,157 @@
+import os
+import re
+import platform
+from . import hwids, rootfs, verbose
+
+PCI_DEVICES = "/sys/bus/pci/devices"
+USB_DEVICES = "/sys/bus/usb/devices"
+ASOUND = "/proc/asound"
+
+DISPLAY_CLASS = 0x03
+
+def _read(directory, name):
+    try:
+        with open(os.path.join(directory, name)) as f:
+            return f.read().strip()
+    except OSError as e:
+        verbose.debug("could not read file", path=os.path.join(directory, name), error=e)
+        return None
+
+def _hex(value):
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return None
+
+def _driver(directory):
+    try:
+        return os.path.basename(os.readlink(os.path.join(directory, "driver")))
+    except OSError:
+        return None
+
+def _pci_record(directory, ids):
+    device_class = _hex(_read(directory, "class"))
+    vendor_id = _hex(_read(directory, "vendor"))
+    device_id = _hex(_read(directory, "device"))
+    numa_node = _read(directory, "numa_node")
+    record = {
+        "slot": os.path.basename(directory),
+        "class_id": f"{device_class:06x}" if device_class is not None else None,
+        "class": None,
+        "vendor_id": f"{vendor_id:04x}" if vendor_id is not None else None,
+        "vendor": None,
+        "device_id": f"{device_id:04x}" if device_id is not None else None,
+        "device": None,
+        "driver": _driver(directory),
+        "numa_node": int(numa_node) if numa_node and numa_node != "-1" else None,
+        "link_speed": _read(directory, "current_link_speed"),
+        "link_width": _read(directory, "current_link_width"),
+        "max_link_speed": _read(directory, "max_link_speed"),
+        "max_link_width": _read(directory, "max_link_width")
+    }
+    if device_class is not None:
+        record["class"] = ids.device_class(device_class >> 16, (device_class >> 8) & 0xff)
+    if vendor_id is not None:
+        record["vendor"] = ids.vendor(vendor_id)
+        if device_id is not None:
+            record["device"] = ids.device(vendor_id, device_id)
+    return record
+
+def pci_devices(sysfs=None, ids=None):
+    """Every PCI function in sysfs as a structured record."""
+    sysfs = sysfs or rootfs.path(PCI_DEVICES)
+    ids = ids or hwids.pci_ids
+    try:
+        slots = sorted(os.listdir(sysfs))
+    except OSError:
+        return []
+    return [_pci_record(os.path.join(sysfs, slot), ids) for slot in slots]
+
+def usb_devices(sysfs=None, ids=None):
+    """Every USB device (interfaces are skipped) as a structured record."""
+    sysfs = sysfs or rootfs.path(USB_DEVICES)
+    ids = ids or hwids.usb_ids
+    try:
+        names = sorted(os.listdir(sysfs))
+    except OSError:
+        return []
+    devices = []
+    for name in names:
+        if ":" in name:
+            continue  # 1-1:1.0 style entries are interfaces of a device
+        directory = os.path.join(sysfs, name)
+        vendor_id = _hex(_read(directory, "idVendor"))
+        product_id = _hex(_read(directory, "idProduct"))
+        device_class = _hex(_read(directory, "bDeviceClass"))
+        speed = _read(directory, "speed")
+        devices.append({
+            "port": name,
+            "bus": int(_read(directory, "busnum") or 0),
+            "device_number": int(_read(directory, "devnum") or 0),
+            "class_id": f"{device_class:02x}" if device_class is not None else None,
+            "class": ids.device_class(device_class) if device_class else None,
+            "vendor_id": f"{vendor_id:04x}" if vendor_id is not None else None,
+            "vendor": _read(directory, "manufacturer") or (ids.vendor(vendor_id) if vendor_id is not None else None),
+            "product_id": f"{product_id:04x}" if product_id is not None else None,
+            "product": _read(directory, "product") or (
+                ids.device(vendor_id, product_id) if None not in (vendor_id, product_id) else None),
+            "driver": _driver(directory),
+            "speed_mbps": float(speed) if speed else None
+        })
+    return devices
+
+CARD_LINE = re.compile(r"^\s*(\d+)\s+\[(.*?)\s*\]:\s+(.*?)\s+-\s+(.*)$")
+
+def sound_cards(proc=None):
+    """Sound cards and their PCM devices from /proc/asound."""
+    proc = proc or rootfs.path(ASOUND)
+    try:
+        with open(os.path.join(proc, "cards")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    cards = []
+    for i, line in enumerate(lines):
+        match = CARD_LINE.match(line)
+        if not match:
+            continue
+        description = lines[i + 1].strip() if i + 1 < len(lines) else ""
+        cards.append({
+            "index": int(match.group(1)),
+            "id": match.group(2),
+            "driver": match.group(3),
+            "name": match.group(4),
+            "description": description,
+            "pcm": []
+        })
+    by_index = {card["index"]: card for card in cards}
+    try:
+        with open(os.path.join(proc, "pcm")) as f:
+            for line in f:
+                # 00-00: ALC3246 Analog : ALC3246 Analog : playback 1 : capture 1
+                parts = [part.strip() for part in line.split(":")]
+                card, _, device = parts[0].partition("-")
+                if card.isdigit() and int(card) in by_index:
+                    by_index[int(card)]["pcm"].append({
+                        "device": int(device),
+                        "name": parts[1],
+                        "streams": [part for part in parts[3:] if part]
+                    })
+    except OSError:
+        pass
+    return cards
+
+def gpus(sysfs=None, ids=None):
+    """PCI display controllers (VGA, 3D and other display classes)."""
+    return [device for device in pci_devices(sysfs, ids)
+            if device["class_id"] and int(device["class_id"][:2], 16) == DISPLAY_CLASS]
+
+def dump():
+    """PCI, USB and sound devices read straight from sysfs and procfs."""
+    if platform.system() != "Linux":
+        return {"error": "Device enumeration is only available on Linux"}
+    return {
+        "pci": pci_devices(),
+        "usb": usb_devices(),
+        "sound": sound_cards()
+    }
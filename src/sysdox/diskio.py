@@ -0,0 +1,139 @@
+import os
+import time
+import platform
+import psutil
+from . import rootfs, registry, verbose
+
+SECTOR_SIZE = 512  # /proc/diskstats always counts 512 byte sectors
+
+def read_diskstats(path=None):
+    """Read the counters of every block device from /proc/diskstats in one pass.
+
+    Returns a dict name -> tuple(reads, read_sectors, read_ms, writes, write_sectors,
+    write_ms, in_flight, io_ms, weighted_io_ms).
+    """
+    counters = {}
+    with open(path or rootfs.path("/proc/diskstats"), "rb") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 14:
+                continue
+            counters[parts[2].decode()] = (
+                int(parts[3]), int(parts[5]), int(parts[6]),
+                int(parts[7]), int(parts[9]), int(parts[10]),
+                int(parts[11]), int(parts[12]), int(parts[13])
+            )
+    return counters
+
+def read_psutil_counters():
+    """Same shape as read_diskstats() built from psutil, for non Linux hosts."""
+    counters = {}
+    for name, c in psutil.disk_io_counters(perdisk=True).items():
+        counters[name] = (
+            c.read_count, c.read_bytes // SECTOR_SIZE, c.read_time,
+            c.write_count, c.write_bytes // SECTOR_SIZE, c.write_time,
+            0, getattr(c, "busy_time", 0), 0
+        )
+    return counters
+
+def read_counters():
+    """Single pass over the io counters of every device."""
+    if platform.system() == "Linux" and os.path.exists(rootfs.path("/proc/diskstats")):
+        return read_diskstats()
+    return read_psutil_counters()
+
+def compute_rates(prev, curr, elapsed):
+    """Derive iops, throughput, await, queue depth and utilisation between two reads."""
+    elapsed_ms = elapsed * 1000.0
+    rates = {}
+    for name, now in curr.items():
+        before = prev.get(name)
+        if before is None:
+            continue
+        reads, rsect, rms, writes, wsect, wms, _, io_ms, weighted = (
+            n - b for n, b in zip(now, before)
+        )
+        ios = reads + writes
+        rates[name] = {
+            "read_iops": round(reads / elapsed, 2),
+            "write_iops": round(writes / elapsed, 2),
+            "read_bytes_per_sec": round(rsect * SECTOR_SIZE / elapsed, 2),
+            "write_bytes_per_sec": round(wsect * SECTOR_SIZE / elapsed, 2),
+            "await_ms": round((rms + wms) / ios, 2) if ios else 0.0,
+            "queue_depth": round(weighted / elapsed_ms, 2),
+            "in_flight": now[6],
+            "util_percent": round(min(100.0, 100.0 * io_ms / elapsed_ms), 2)
+        }
+    return rates
+
+def parent_device(name):
+    """Whole disk behind a partition (sda1 -> sda), or the name itself."""
+    block = rootfs.path(f"/sys/class/block/{name}")
+    if os.path.exists(os.path.join(block, "partition")):
+        return os.path.basename(os.path.dirname(os.path.realpath(block)))
+    return name
+
+def mount_devices():
+    """Map every real mountpoint to the kernel name of its block device."""
+    devices = {}
+    for part in psutil.disk_partitions():
+        if part.device.startswith("/dev/"):
+            devices[part.mountpoint] = os.path.basename(os.path.realpath(part.device))
+    return devices
+
+def join_mounts(rates, devices):
+    """Attach the load of the backing device (and its disk) to every mountpoint."""
+    mounts = {}
+    for mountpoint, name in devices.items():
+        entry = {"device": name, "io": rates.get(name)}
+        disk = parent_device(name)
+        if disk != name:
+            entry["disk"] = disk
+            entry["disk_io"] = rates.get(disk)
+        mounts[mountpoint] = entry
+    return mounts
+
+class DiskIOSampler:
+    """Turns successive counter reads into per-device io rates."""
+
+    def __init__(self, reader=read_counters):
+        self.reader = reader
+        self._prev = None
+        self._prev_time = None
+        self.rates = {}
+
+    def sample(self):
+        """Read the counters once and return rates since the previous call."""
+        now = time.monotonic()
+        counters = self.reader()
+        prev, prev_time = self._prev, self._prev_time
+        self._prev, self._prev_time = counters, now
+        if prev is None or now <= prev_time:
+            return None
+        self.rates = compute_rates(prev, counters, now - prev_time)
+        return self.rates
+
+    def by_mountpoint(self):
+        """Latest rates joined to the partition/mount view."""
+        return join_mounts(self.rates, mount_devices())
+
+_sampler = DiskIOSampler()
+
+def dump(interval=0.5):
+    """Disk io activity per device and mountpoint.
+
+    While recording or watching the rates cover the time since the previous
+    tick; a one shot run (and the first tick) samples interval seconds apart.
+    """
+    try:
+        sampler = _sampler if registry.sampling() else DiskIOSampler()
+        if sampler.sample() is None:
+            time.sleep(interval)
+            sampler.sample()
+        return {
+            "devices": sampler.rates,
+            "mountpoints": sampler.by_mountpoint()
+        }
+    except Exception as e:
+        verbose.warning("disk io sampling failed", error=e)
+        return {"error": f"Unable to read disk io counters: {e}"}
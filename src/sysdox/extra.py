@@ -3,38 +3,45 @@ import platform
 import sys
 import os
 import shutil
+from . import rootfs, verbose
+from .filecache import cached_by_files
 
 def get_pip_packages():
     """List pip packages and versions"""
     try:
         output = subprocess.check_output([sys.executable, '-m', 'pip', 'list', '--format=freeze']).decode().splitlines()
         return dict(line.split('==') for line in output if '==' in line)
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="pip", error=e)
         return {}
 
+@cached_by_files('/var/lib/dpkg/status')
 def get_apt_packages():
     """List APT packages and versions"""
     try:
-        output = subprocess.check_output(['dpkg-query', '-W', '-f=${Package}=${Version}\n']).decode().splitlines()
+        output = rootfs.check_output(['dpkg-query', '-W', '-f=${Package}=${Version}\n']).decode().splitlines()
         return dict(line.split('=') for line in output if '=' in line)
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="dpkg-query", error=e)
         return {}
 
 def get_pacman_packages():
     try:
-        output = subprocess.check_output(['pacman', '-Q']).decode().splitlines()
+        output = rootfs.check_output(['pacman', '-Q']).decode().splitlines()
         return dict(line.split(' ') for line in output if ' ' in line)
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="pacman", error=e)
         return {}
 
 def get_dnf_packages():
     try:
-        output = subprocess.check_output(['dnf', 'list', 'installed']).decode().splitlines()[1:]
+        output = rootfs.check_output(['dnf', 'list', 'installed']).decode().splitlines()[1:]
         return {
             line.split()[0]: line.split()[1]
             for line in output if len(line.split()) >= 2
         }
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="dnf", error=e)
         return {}
 
 def get_brew_packages():
@@ -44,7 +51,8 @@ def get_brew_packages():
             line.split()[0]: line.split()[1]
             for line in output if len(line.split()) >= 2
         }
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="brew", error=e)
         return {}
 
 def get_choco_packages():
@@ -54,7 +62,8 @@ def get_choco_packages():
             line.split()[0]: line.split()[1]
             for line in output if len(line.split()) >= 2
         }
-    except Exception:
+    except Exception as e:
+        verbose.warning("package listing failed", tool="choco", error=e)
         return {}
 
 def all_packages():
@@ -81,4 +90,10 @@ def all_packages():
 def dump():
     return {
         'packages': all_packages()
-    }
\ No newline at end of file
+    }
+
+def fields():
+    """Field name -> function map used by path queries."""
+    return {
+        'packages': all_packages
+    }
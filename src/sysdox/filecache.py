@@ -0,0 +1,217 @@
+import os
+import struct
+import ctypes
+import ctypes.util
+import platform
+import functools
+import threading
+from . import rootfs
+
+# inotify event bits (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# files such as resolv.conf and the dpkg status file are usually replaced by a
+# rename, so the parent directory is watched rather than the file itself
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+class FileWatcher:
+    """Tracks whether source files changed, via inotify or an mtime poll.
+
+    version(path) returns a token that changes whenever the file does. With
+    inotify the token is a counter bumped by events, read with a non blocking
+    drain of the inotify fd, so an unchanged file costs no syscalls beyond that
+    read. Where inotify is unavailable the token is the file's stat signature.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fd = None
+        self._dirs = {}      # wd -> directory
+        self._wds = {}       # directory -> wd
+        self._versions = {}  # path -> event counter for inotify watched paths
+        self._aliases = {}   # watched file (a path or a symlink's target) -> paths it versions
+        self._targets = {}   # path -> its resolved location when last tracked
+        self._resolved = {}  # path -> version at which its symlinks were last resolved
+        self._libc = None
+        if platform.system() == "Linux":
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+                if fd >= 0:
+                    self._libc, self._fd = libc, fd
+            except (OSError, AttributeError):
+                pass
+
+    @property
+    def inotify(self):
+        return self._fd is not None
+
+    def _watch(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory in self._wds:
+            return True
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._wds[directory] = wd
+        self._dirs[wd] = directory
+        return True
+
+    def _drain(self):
+        """Consume pending inotify events and bump the version of touched paths."""
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost, assume everything changed
+                    for path in self._versions:
+                        self._versions[path] += 1
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF) or not name:
+                    touched = {path for location, paths in self._aliases.items()
+                               if os.path.dirname(location) == directory for path in paths}
+                    for path in touched:
+                        self._versions[path] += 1
+                    if mask & IN_IGNORED:
+                        # the directory is gone, watch it again on the next lookup
+                        del self._dirs[wd]
+                        del self._wds[directory]
+                    continue
+                for path in self._aliases.get(os.path.join(directory, name), ()):
+                    self._versions[path] += 1
+
+    def _track(self, path):
+        """Watch path and, when it is a symlink, its target; False if inotify refused.
+
+        /etc/resolv.conf and /etc/os-release are usually symlinks, and their
+        targets are rewritten in a directory of their own.
+        """
+        real = os.path.realpath(path)
+        locations = {path, real}
+        if not all(self._watch(location) for location in locations):
+            return False
+        old = self._targets.get(path)
+        if old not in (None, path, real):
+            self._aliases[old].discard(path)
+        for location in locations:
+            self._aliases.setdefault(location, set()).add(path)
+        self._targets[path] = real
+        return True
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def version(self, path):
+        """Token identifying the current state of path."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if self.inotify:
+                self._drain()
+                current = self._versions.get(path)
+                watched = current is not None and all(
+                    os.path.dirname(location) in self._wds for location in (path, self._targets[path]))
+                if watched and self._resolved.get(path) == current:
+                    return ("inotify", current)
+                # first lookup, a lost watch, or a change that may have pointed a
+                # symlink elsewhere: resolve it again
+                if self._track(path):
+                    if not watched:
+                        # counters only ever go up, so a path that lost its watch
+                        # can never hand out a token it used before
+                        current = self._versions[path] = (current if current is not None else -1) + 1
+                    self._resolved[path] = current
+                    return ("inotify", current)
+            return ("stat", self._stat(path))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+_watcher = None
+_enabled = False
+_cache = {}
+
+def get_watcher():
+    global _watcher
+    if _watcher is None:
+        _watcher = FileWatcher()
+    return _watcher
+
+def enable():
+    """Turn on file backed caching, meant for resident and watch mode processes.
+
+    One shot runs keep calling straight through, so they always see fresh data.
+    """
+    global _enabled
+    _enabled = True
+    get_watcher()
+
+def disable():
+    global _enabled
+    _enabled = False
+    _cache.clear()
+
+def enabled():
+    return _enabled
+
+def clear():
+    _cache.clear()
+
+def cached_by_files(*paths):
+    """Cache a collector's result until one of its source files changes.
+
+    Results are kept indefinitely while enable() is in effect and are recomputed
+    only when an inotify event (or, without inotify, an mtime/inode/size change)
+    is seen on one of paths.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            watcher = get_watcher()
+            key = (func.__module__, func.__qualname__, rootfs.get_root(), args, tuple(sorted(kwargs.items())))
+            # versions are taken before running func, so a change that lands while
+            # it runs still invalidates the entry on the next call
+            versions = tuple(watcher.version(rootfs.path(path)) for path in paths)
+            cached = _cache.get(key)
+            if cached is not None and cached[0] == versions:
+                return cached[1]
+            result = func(*args, **kwargs)
+            _cache[key] = (versions, result)
+            return result
+        wrapper.paths = paths
+        return wrapper
+    return decorator
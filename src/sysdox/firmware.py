@@ -1,71 +1,93 @@
 import platform
 import subprocess
 import os
+import time
+from . import topology, rootfs, verbose
+from .filecache import cached_by_files
 
 def get_file_content(path):
     try:
-        with open(path, 'r') as f:
+        with open(rootfs.path(path), 'r') as f:
             return f.read().strip()
     except PermissionError:
+        verbose.debug("permission denied", path=path)
         return "Permission denied"
-    except Exception:
+    except Exception as e:
+        verbose.debug("could not read file", path=path, error=e)
         return None
 
 def run_command(cmd, timeout=3):
+    started = time.perf_counter()
     try:
-        return subprocess.check_output(cmd, shell=True, timeout=timeout).decode()
+        return rootfs.check_output(cmd, shell=True, timeout=timeout).decode()
     except subprocess.TimeoutExpired:
+        verbose.warning("command timed out", cmd=cmd, duration=time.perf_counter() - started)
         return "Timed out"
-    except Exception:
+    except Exception as e:
+        verbose.warning("command failed", cmd=cmd, duration=time.perf_counter() - started, error=e)
         return None
 
-def get_linux_firmware():
-    info = {
-        "bios_version": get_file_content("/sys/class/dmi/id/bios_version"),
-        "bios_date": get_file_content("/sys/class/dmi/id/bios_date"),
-        "vendor": get_file_content("/sys/class/dmi/id/sys_vendor"),
-        "motherboard": get_file_content("/sys/class/dmi/id/board_name"),
-        "uefi": os.path.exists("/sys/firmware/efi"),
-    }
+DMI_FIELDS = {
+    "bios_version": "/sys/class/dmi/id/bios_version",
+    "bios_date": "/sys/class/dmi/id/bios_date",
+    "vendor": "/sys/class/dmi/id/sys_vendor",
+    "motherboard": "/sys/class/dmi/id/board_name",
+}
 
-    cpuinfo = get_file_content("/proc/cpuinfo")
-    if cpuinfo and "microcode" in cpuinfo:
-        try:
-            info["cpu_microcode"] = cpuinfo.split("microcode")[-1].strip().split()[1]
-        except:
-            info["cpu_microcode"] = "Unknown"
-    else:
+@cached_by_files(*DMI_FIELDS.values())
+def get_dmi_info():
+    return {key: get_file_content(path) for key, path in DMI_FIELDS.items()}
+
+def get_microcode_info():
+    info = {}
+    microcode = topology.microcode_versions()
+    revisions = sorted(set(microcode.values()))
+    if not revisions:
         info["cpu_microcode"] = "Unknown"
+    elif len(revisions) == 1:
+        info["cpu_microcode"] = revisions[0]
+    else:
+        # mixed revisions usually mean a late load that did not reach every cpu
+        info["cpu_microcode"] = ", ".join(revisions)
+        info["cpu_microcode_per_cpu"] = microcode
+    return info
 
-    # Firmware update devices
+def get_fwupd_devices():
+    """Firmware update devices"""
     fwupd_output = run_command("fwupdmgr get-devices", timeout=4)
     if fwupd_output and fwupd_output != "Timed out":
-        info["fwupd_devices"] = [
+        return [
             line.strip() for line in fwupd_output.splitlines()
             if line.strip() and not line.startswith("Devices")
         ]
-    else:
-        info["fwupd_devices"] = "Unavailable"
+    return "Unavailable"
 
-    # Storage firmware info
-    info["storage_firmware"] = {}
+def get_storage_firmware():
+    """Storage firmware info"""
+    storage_firmware = {}
     lsblk_output = run_command("lsblk -dno NAME")
-    if lsblk_output:
-        for disk in lsblk_output.strip().splitlines():
-            device = f"/dev/{disk.strip()}"
-            smart_info = run_command(f"smartctl -i {device}", timeout=3)
-            if smart_info:
-                for line in smart_info.splitlines():
-                    if "Firmware Version" in line:
-                        info["storage_firmware"][device] = line.split(":")[1].strip()
-                        break
-                else:
-                    info["storage_firmware"][device] = "Unknown"
+    if not lsblk_output:
+        return "Unavailable"
+    for disk in lsblk_output.strip().splitlines():
+        device = f"/dev/{disk.strip()}"
+        smart_info = run_command(f"smartctl -i {device}", timeout=3)
+        if smart_info:
+            for line in smart_info.splitlines():
+                if "Firmware Version" in line:
+                    storage_firmware[device] = line.split(":")[1].strip()
+                    break
             else:
-                info["storage_firmware"][device] = "Unavailable"
-    else:
-        info["storage_firmware"] = "Unavailable"
+                storage_firmware[device] = "Unknown"
+        else:
+            storage_firmware[device] = "Unavailable"
+    return storage_firmware
 
+def get_linux_firmware():
+    info = dict(get_dmi_info())
+    info["uefi"] = os.path.exists(rootfs.path("/sys/firmware/efi"))
+    info.update(get_microcode_info())
+    info["fwupd_devices"] = get_fwupd_devices()
+    info["storage_firmware"] = get_storage_firmware()
     return info
 
 def get_windows_firmware():
@@ -90,7 +112,8 @@ def get_windows_firmware():
         output = run_command('powershell -Command "Confirm-SecureBootUEFI"')
         info["uefi"] = "True" in output if output else "Unknown"
 
-    except Exception:
+    except Exception as e:
+        verbose.warning("Windows firmware query failed", error=e)
         info["bios_version"] = "Unavailable"
         info["uefi"] = "Unknown"
 
@@ -107,7 +130,8 @@ def get_darwin_firmware():
                 info["bios_version"] = line.split(":")[1].strip()
             elif "SMC Version" in line:
                 info["smc_version"] = line.split(":")[1].strip()
-    except:
+    except Exception as e:
+        verbose.warning("Darwin firmware query failed", error=e)
         info["bios_version"] = "Unavailable"
     info["uefi"] = True
     return info
@@ -121,4 +145,19 @@ def dump():
     elif system == "Darwin":
         return get_darwin_firmware()
     else:
-        return {"firmware": "Unsupported platform"}
\ No newline at end of file
+        return {"firmware": "Unsupported platform"}
+
+def fields():
+    """Field name -> function map used by path queries (Linux only)."""
+    if platform.system() != "Linux":
+        return {}
+    dmi = {key: (lambda key=key: get_dmi_info()[key]) for key in DMI_FIELDS}
+    return {
+        **dmi,
+        "uefi": lambda: os.path.exists(rootfs.path("/sys/firmware/efi")),
+        "cpu_microcode": lambda: get_microcode_info()["cpu_microcode"],
+        # only there when the revisions differ
+        "cpu_microcode_per_cpu": lambda: get_microcode_info().get("cpu_microcode_per_cpu"),
+        "fwupd_devices": get_fwupd_devices,
+        "storage_firmware": get_storage_firmware
+    }
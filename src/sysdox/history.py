@@ -0,0 +1,238 @@
+import json
+import time
+import sqlite3
+import numbers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER PRIMARY KEY,
+    labels TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    ts INTEGER NOT NULL,
+    metric_id INTEGER NOT NULL,
+    labels_id INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric_id, ts, labels_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    metric_id INTEGER NOT NULL,
+    labels_id INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    avg REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (resolution, metric_id, ts, labels_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_ts ON rollups (ts);
+"""
+
+DAY = 24 * 3600
+
+# list items are labelled by the first of these fields they have, else by index
+ITEM_KEYS = ("name", "device", "mountpoint", "slot", "port", "pid")
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+def _is_keyed(value, depth):
+    """A dict of same-shaped dicts ({"eth0": {...}, "lo": {...}}) is keyed by label.
+
+    A single entry only counts below the fields of a section and when it holds
+    plain values, so {"lo": {...}} on a host with one interface is keyed while
+    {"uptime": {...}} or {"interface_stats": {...}} are not.
+    """
+    if not isinstance(value, dict) or not value:
+        return False
+    shapes = {tuple(sorted(v)) if isinstance(v, dict) else None for v in value.values()}
+    if len(shapes) != 1 or None in shapes:
+        return False
+    if len(value) == 1:
+        if depth < 2:
+            return False
+        only = next(iter(value.values()))
+        return not any(isinstance(v, (dict, list)) for v in only.values())
+    return True
+
+def _label_name(labels, name):
+    candidate, i = name, 1
+    while candidate in labels:
+        candidate, i = f"{name}_{i}", i + 1
+    return candidate
+
+def flatten(snapshot):
+    """Yield (metric, labels, value) for every numeric leaf of a snapshot.
+
+    Keys of dicts whose values are dicts of the same shape (interfaces, disks,
+    cores) become a label named after the parent key instead of a part of the
+    metric name, so network.interface_stats.bytes_recv is one metric with an
+    interface_stats=eth0 label. List items are labelled the same way.
+    """
+    stack = [(snapshot, [], {})]
+    while stack:
+        value, path, labels = stack.pop()
+        if _is_number(value):
+            yield ".".join(path), labels, float(value)
+        elif isinstance(value, dict):
+            keyed = path and _is_keyed(value, len(path))
+            for key, child in value.items():
+                if keyed:
+                    stack.append((child, path, dict(labels, **{_label_name(labels, path[-1]): str(key)})))
+                else:
+                    stack.append((child, path + [str(key)], labels))
+        elif isinstance(value, (list, tuple)) and path:
+            for i, child in enumerate(value):
+                ident = next((child[k] for k in ITEM_KEYS if isinstance(child, dict) and k in child), i)
+                stack.append((child, path, dict(labels, **{_label_name(labels, path[-1]): str(ident)})))
+
+class History:
+    """Per-host metric history in a single SQLite file.
+
+    Samples are stored narrow, as (ts, metric_id, labels_id, value), with metric
+    names and label sets interned in their own tables. The samples primary key
+    is (metric_id, ts, labels_id), so a per-metric time range is a single index
+    range scan already in time order, with the label sets a query asks for
+    picked out on the way; a separate index on ts serves whole-snapshot and
+    retention queries. Raw samples older than raw_retention seconds are folded into
+    min/max/avg rollups of rollup_resolution seconds, which are kept for
+    rollup_retention seconds.
+    """
+
+    def __init__(self, path, raw_retention=31 * DAY, rollup_resolution=300, rollup_retention=365 * DAY):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.rollup_resolution = rollup_resolution
+        self.rollup_retention = rollup_retention
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._metrics = dict(self.db.execute("SELECT name, id FROM metrics"))
+        self._labels = dict(self.db.execute("SELECT labels, id FROM labels"))
+        self._decoded = {}
+
+    def _intern(self, table, column, cache, value):
+        found = cache.get(value)
+        if found is None:
+            cursor = self.db.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value,))
+            found = cache[value] = cursor.lastrowid
+        return found
+
+    def append(self, snapshot, ts):
+        """Store every numeric field of a snapshot in one transaction."""
+        when = int(ts)
+        try:
+            with self.db:
+                rows = []
+                for metric, labels, value in flatten(snapshot):
+                    metric_id = self._intern("metrics", "name", self._metrics, metric)
+                    labels_id = self._intern("labels", "labels", self._labels,
+                                             json.dumps(labels, sort_keys=True, separators=(",", ":")))
+                    rows.append((when, metric_id, labels_id, value))
+                self.db.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            # ids handed out inside the rolled back transaction are gone
+            self._metrics = dict(self.db.execute("SELECT name, id FROM metrics"))
+            self._labels = dict(self.db.execute("SELECT labels, id FROM labels"))
+            self._decoded.clear()
+            raise
+        return len(rows)
+
+    def metrics(self):
+        return sorted(self._metrics)
+
+    def _label_set(self, labels_id):
+        found = self._decoded.get(labels_id)
+        if found is None:
+            found = self._decoded[labels_id] = json.loads(self.db.execute(
+                "SELECT labels FROM labels WHERE id = ?", (labels_id,)).fetchone()[0])
+        return found
+
+    def _range_sql(self, metric_id, start, end, labels_ids=None, resolution=None):
+        """SQL and parameters of a query() range scan."""
+        if resolution:
+            sql = ("SELECT ts, labels_id, avg FROM rollups WHERE resolution = ? AND metric_id = ? "
+                   "AND ts BETWEEN ? AND ?")
+            params = [resolution, metric_id, int(start), int(end)]
+        else:
+            sql = "SELECT ts, labels_id, value FROM samples WHERE metric_id = ? AND ts BETWEEN ? AND ?"
+            params = [metric_id, int(start), int(end)]
+        if labels_ids is not None:
+            # interned ids are our own integers, inlined so there is no bound parameter limit
+            sql += f" AND labels_id IN ({','.join(str(int(i)) for i in labels_ids)})"
+        return sql + " ORDER BY ts", params
+
+    def query(self, metric, start, end, labels=None, resolution=None):
+        """[(ts, labels, value)] for metric between start and end, oldest first.
+
+        labels filters on a subset of the label set. With resolution the
+        rollups of that resolution are read instead, and value is the bucket
+        average.
+        """
+        metric_id = self._metrics.get(metric)
+        if metric_id is None:
+            return []
+        labels_ids = None
+        if labels:
+            labels_ids = [labels_id for labels_id in self._labels.values()
+                          if all(self._label_set(labels_id).get(k) == v for k, v in labels.items())]
+            if not labels_ids:
+                return []
+        sql, params = self._range_sql(metric_id, start, end, labels_ids, resolution)
+        return [(ts, self._label_set(labels_id), value) for ts, labels_id, value in self.db.execute(sql, params)]
+
+    def downsample(self, before):
+        """Fold raw samples older than before into rollups and drop them."""
+        bucket = self.rollup_resolution
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO rollups "
+                "SELECT ?, ts / ? * ?, metric_id, labels_id, MIN(value), MAX(value), AVG(value), COUNT(*) "
+                "FROM samples WHERE ts < ? GROUP BY ts / ?, metric_id, labels_id",
+                (bucket, bucket, bucket, int(before), bucket))
+            return self.db.execute("DELETE FROM samples WHERE ts < ?", (int(before),)).rowcount
+
+    def expire(self, before):
+        """Drop rollups older than before."""
+        with self.db:
+            return self.db.execute("DELETE FROM rollups WHERE ts < ?", (int(before),)).rowcount
+
+    def maintain(self, now=None):
+        """Run the downsampling and retention jobs."""
+        now = time.time() if now is None else now
+        # align to a bucket so a partially rolled up bucket is never split
+        cutoff = int(now - self.raw_retention) // self.rollup_resolution * self.rollup_resolution
+        result = {"downsampled": self.downsample(cutoff),
+                  "expired": self.expire(now - self.rollup_retention)}
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return result
+
+    def close(self):
+        self.db.close()
+
+class SqliteSink:
+    """record() sink that appends every snapshot to a History file.
+
+    Maintenance runs on the first write and then every maintain_every seconds.
+    """
+
+    def __init__(self, path, maintain_every=3600, **retention):
+        self.history = History(path, **retention)
+        self.maintain_every = maintain_every
+        self._last_maintenance = None
+
+    def write(self, ts, snapshot):
+        self.history.append(snapshot, ts)
+        if self._last_maintenance is None or ts - self._last_maintenance >= self.maintain_every:
+            self.history.maintain(ts)
+            self._last_maintenance = ts
+
+    def close(self):
+        self.history.close()
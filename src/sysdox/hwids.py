@@ -0,0 +1,177 @@
+import os
+import mmap
+import bisect
+import struct
+import threading
+
+# magic, format version, mtime_ns and size of the source text file, record count
+HEADER = struct.Struct("<8sIQQI")
+MAGIC = b"SYSDOXID"
+VERSION = 1
+# key, offset into the string table, length
+RECORD = struct.Struct("<QII")
+
+VENDOR, DEVICE, CLASS, SUBCLASS = range(4)
+
+PCI_IDS_PATHS = ("/usr/share/hwdata/pci.ids", "/usr/share/misc/pci.ids", "/usr/share/pci.ids")
+USB_IDS_PATHS = ("/usr/share/hwdata/usb.ids", "/usr/share/misc/usb.ids", "/var/lib/usbutils/usb.ids")
+
+def _key(kind, high, low=0):
+    return (kind << 32) | (high << 16) | low
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "sysdox")
+
+def parse_ids(lines):
+    """Yield (key, name) pairs from pci.ids / usb.ids text.
+
+    Vendors and their devices, plus classes ("C xx") and their subclasses.
+    Subsystems, programming interfaces and the other usb.ids sections (HID
+    usages, languages, ...) are skipped.
+    """
+    section = None  # VENDOR or CLASS while inside one of those blocks
+    parent = None
+    for line in lines:
+        if not line.strip() or line.startswith("#"):
+            continue
+        if not line.startswith("\t"):
+            ident, _, name = line.rstrip("\n").partition("  ")
+            if ident.startswith("C ") and len(ident) == 4:
+                section, parent = CLASS, int(ident[2:], 16)
+                yield _key(CLASS, parent), name.strip()
+            elif len(ident) == 4:
+                try:
+                    section, parent = VENDOR, int(ident, 16)
+                except ValueError:
+                    section = None
+                    continue
+                yield _key(VENDOR, parent), name.strip()
+            else:
+                section = None  # AT, HID, R, L, ... sections of usb.ids
+        elif section is not None and not line.startswith("\t\t"):
+            ident, _, name = line.strip().partition("  ")
+            try:
+                child = int(ident, 16)
+            except ValueError:
+                continue
+            yield _key(DEVICE if section == VENDOR else SUBCLASS, parent, child), name.strip()
+
+def build_index(entries, mtime_ns=0, size=0):
+    """Serialise (key, name) pairs into the sorted binary index format."""
+    names = {}
+    for key, name in entries:
+        names.setdefault(key, name)  # first definition wins, as in lspci
+    strings = bytearray()
+    records = []
+    for key in sorted(names):
+        blob = names[key].encode()
+        records.append(RECORD.pack(key, len(strings), len(blob)))
+        strings += blob
+    return HEADER.pack(MAGIC, VERSION, mtime_ns, size, len(records)) + b"".join(records) + bytes(strings)
+
+class _Keys:
+    """Sequence view over the record keys so bisect only unpacks what it touches."""
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)[0]
+
+class IdsDatabase:
+    """Name lookups in a pci.ids or usb.ids file through a binary index.
+
+    The text file is parsed once and the sorted index is cached next to the
+    user's other caches, keyed on the source file's mtime and size. Nothing is
+    read until the first lookup; lookups are a binary search over the mapped
+    index.
+    """
+
+    def __init__(self, candidates, cache_name):
+        self.candidates = candidates
+        self.cache_name = cache_name
+        self._lock = threading.Lock()
+        self._data = None
+        self._count = 0
+        self._loaded = False
+
+    def source(self):
+        for path in self.candidates:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load(self):
+        source = self.source()
+        if source is None:
+            return
+        st = os.stat(source)
+        cache = os.path.join(cache_dir(), self.cache_name)
+        data = self._map(cache)
+        if data is not None:
+            _, _, mtime_ns, size, count = HEADER.unpack_from(data, 0)
+            if (mtime_ns, size) == (st.st_mtime_ns, st.st_size):
+                self._data, self._count = data, count
+                return
+            data.close()
+        with open(source, encoding="utf-8", errors="replace") as f:
+            index = build_index(parse_ids(f), st.st_mtime_ns, st.st_size)
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            tmp = f"{cache}.{os.getpid()}"
+            with open(tmp, "wb") as f:
+                f.write(index)
+            os.replace(tmp, cache)
+        except OSError:
+            pass  # read-only home, keep the index in memory
+        self._data, self._count = index, HEADER.unpack_from(index, 0)[4]
+
+    @staticmethod
+    def _map(path):
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(data) < HEADER.size or HEADER.unpack_from(data, 0)[:2] != (MAGIC, VERSION):
+            data.close()
+            return None
+        return data
+
+    def _lookup(self, key):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._load()
+        if not self._count:
+            return None
+        i = bisect.bisect_left(_Keys(self._data, self._count), key)
+        if i == self._count:
+            return None
+        found, offset, length = RECORD.unpack_from(self._data, HEADER.size + i * RECORD.size)
+        if found != key:
+            return None
+        start = HEADER.size + self._count * RECORD.size + offset
+        return bytes(self._data[start:start + length]).decode()
+
+    def vendor(self, vendor_id):
+        return self._lookup(_key(VENDOR, vendor_id))
+
+    def device(self, vendor_id, device_id):
+        return self._lookup(_key(DEVICE, vendor_id, device_id))
+
+    def device_class(self, class_id, subclass_id=None):
+        """Subclass name when known, the class name otherwise."""
+        if subclass_id is not None:
+            name = self._lookup(_key(SUBCLASS, class_id, subclass_id))
+            if name:
+                return name
+        return self._lookup(_key(CLASS, class_id))
+
+pci_ids = IdsDatabase(PCI_IDS_PATHS, "pci.ids.idx")
+usb_ids = IdsDatabase(USB_IDS_PATHS, "usb.ids.idx")
@@ -0,0 +1,157 @@
+import os
+import json
+import hashlib
+import platform
+import psutil
+from . import topology, rootfs
+
+DMI_DIR = "/sys/class/dmi/id"
+BLOCK_DIR = "/sys/block"
+NET_DIR = "/sys/class/net"
+
+DMI_FIELDS = {
+    "system": ("sys_vendor", "product_name", "product_serial", "product_uuid"),
+    "board": ("board_vendor", "board_name", "board_serial", "chassis_serial"),
+    "bios": ("bios_vendor", "bios_version", "bios_date")
+}
+
+# what vendors leave in unset DMI fields, none of it tells two boards apart
+PLACEHOLDERS = {
+    "", "none", "n/a", "na", "0", "00000000", "default string", "not specified", "not applicable",
+    "to be filled by o.e.m.", "to be filled by oem", "system serial number", "system product name",
+    "chassis serial number", "base board serial number", "0123456789", "unknown"
+}
+
+_cache = {}
+
+def normalize(value):
+    """Collapse whitespace and drop placeholder values so equal hardware compares equal."""
+    if value is None:
+        return None
+    value = " ".join(str(value).split())
+    return None if value.lower() in PLACEHOLDERS else value
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return normalize(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def dmi_facts(directory=None):
+    """{"system": {...}, "board": {...}, "bios": {...}} from the DMI sysfs files.
+
+    Serials and the product UUID are only readable by root; without it they are
+    None and the fingerprint is correspondingly weaker.
+    """
+    directory = directory or rootfs.path(DMI_DIR)
+    return {
+        group: {name: _read(os.path.join(directory, name)) for name in names}
+        for group, names in DMI_FIELDS.items()
+    }
+
+def cpu_facts():
+    summary = topology.summary()
+    return {
+        "model": normalize(summary["model_name"]),
+        "sockets": summary["sockets"],
+        "cores": summary["cores"],
+        "threads": summary["threads"],
+        "numa_nodes": len(summary["numa_nodes"]),
+        "caches": {name: cache["size"] for name, cache in sorted(summary["caches"].items())}
+    }
+
+def disk_facts(directory=None):
+    """Model, serial and firmware of every block device backed by hardware.
+
+    The list is sorted by content rather than by name, so sda and sdb swapping
+    places between boots keeps the same fingerprint. Loop, dm, zram and other
+    virtual devices have no device link and are skipped.
+    """
+    directory = directory or rootfs.path(BLOCK_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    disks = []
+    for name in names:
+        device = os.path.join(directory, name, "device")
+        if not os.path.exists(device):
+            continue
+        disks.append({
+            "model": _read(os.path.join(device, "model")),
+            "serial": _read(os.path.join(device, "serial")) or _read(os.path.join(device, "wwid")),
+            "firmware": _read(os.path.join(device, "firmware_rev")) or _read(os.path.join(device, "rev"))
+        })
+    return sorted(disks, key=lambda disk: json.dumps(disk, sort_keys=True))
+
+def nic_facts(directory=None):
+    """Sorted MAC addresses of the physical network interfaces."""
+    if platform.system() != "Linux":
+        return sorted({
+            addr.address.lower().replace("-", ":")
+            for addrs in psutil.net_if_addrs().values() for addr in addrs
+            if addr.family == psutil.AF_LINK and normalize(addr.address)
+            and addr.address.strip("0:-")
+        })
+    directory = directory or rootfs.path(NET_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    macs = set()
+    for name in names:
+        # bridges, bonds, veth and tunnels have no device link
+        if not os.path.exists(os.path.join(directory, name, "device")):
+            continue
+        mac = _read(os.path.join(directory, name, "address"))
+        if mac and mac.strip("0:"):
+            macs.add(mac.lower())
+    return sorted(macs)
+
+def facts():
+    """The normalized static facts the fingerprint is computed from, per component."""
+    if platform.system() == "Linux":
+        dmi = dmi_facts()
+        cpu = cpu_facts()
+    else:
+        dmi = {group: {name: None for name in names} for group, names in DMI_FIELDS.items()}
+        cpu = {"model": normalize(platform.processor()), "cores": psutil.cpu_count(logical=False),
+               "threads": psutil.cpu_count(logical=True)}
+    return {
+        "system": dmi["system"],
+        "board": dmi["board"],
+        "bios": dmi["bios"],
+        "cpu": cpu,
+        "disks": disk_facts() if platform.system() == "Linux" else [],
+        "nics": nic_facts()
+    }
+
+def digest(value):
+    """Hex SHA-256 of the canonical JSON form of value, truncated to 128 bits."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+def compute(host_facts):
+    """{"fingerprint": ..., "components": {name: hash}} for a facts() result."""
+    components = {name: digest(value) for name, value in sorted(host_facts.items())}
+    return {"fingerprint": digest(components), "components": components}
+
+def fingerprint(refresh=False):
+    """Stable hash of this exact hardware and firmware configuration.
+
+    The facts are read once per root and the result is kept for the life of
+    the process, so repeated calls are a dict lookup and the fingerprint can be
+    attached to every sample. Pass refresh after hot plugging hardware.
+    """
+    key = rootfs.get_root()
+    result = None if refresh else _cache.get(key)
+    if result is None:
+        result = _cache[key] = compute(facts())
+    return result
+
+def dump():
+    """Fingerprint, per component hashes and the facts behind them."""
+    result = dict(fingerprint())
+    result["facts"] = facts()
+    return result
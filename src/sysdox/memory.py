@@ -0,0 +1,232 @@
+import os
+import re
+import struct
+import platform
+from . import rootfs, verbose
+
+MEMINFO = "/proc/meminfo"
+NODE_DIR = "/sys/devices/system/node"
+HUGEPAGES_DIR = "/sys/kernel/mm/hugepages"
+THP_DIR = "/sys/kernel/mm/transparent_hugepage"
+DMI_ENTRIES = "/sys/firmware/dmi/entries"
+
+THP_SETTINGS = ("enabled", "defrag", "shmem_enabled", "khugepaged/defrag")
+HUGEPAGE_FIELDS = ("nr_hugepages", "free_hugepages", "resv_hugepages", "surplus_hugepages",
+                   "nr_overcommit_hugepages")
+
+# SMBIOS type 17 (Memory Device) memory type byte
+MEMORY_TYPES = {
+    0x01: "Other", 0x02: "Unknown", 0x03: "DRAM", 0x04: "EDRAM", 0x05: "VRAM", 0x06: "SRAM",
+    0x07: "RAM", 0x08: "ROM", 0x09: "Flash", 0x0A: "EEPROM", 0x0B: "FEPROM", 0x0C: "EPROM",
+    0x0D: "CDRAM", 0x0E: "3DRAM", 0x0F: "SDRAM", 0x10: "SGRAM", 0x11: "RDRAM", 0x12: "DDR",
+    0x13: "DDR2", 0x14: "DDR2 FB-DIMM", 0x18: "DDR3", 0x19: "FBD2", 0x1A: "DDR4", 0x1B: "LPDDR",
+    0x1C: "LPDDR2", 0x1D: "LPDDR3", 0x1E: "LPDDR4", 0x1F: "Logical non-volatile device",
+    0x20: "HBM", 0x21: "HBM2", 0x22: "DDR5", 0x23: "LPDDR5", 0x24: "HBM3"
+}
+
+HUGEPAGE_DIR = re.compile(r"^hugepages-(\d+)kB$")
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError as e:
+        verbose.debug("could not read file", path=path, error=e)
+        return None
+
+def _int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+def parse_meminfo(text):
+    """{field: value} for a meminfo file, in bytes where the kernel says kB.
+
+    Counts such as HugePages_Total stay counts. The "Node N " prefix of the
+    per node files is dropped, so both parse to the same field names.
+    """
+    info = {}
+    for line in text.splitlines():
+        key, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        if key.startswith("Node "):
+            key = key.split(None, 2)[2]
+        parts = rest.split()
+        if not parts:
+            continue
+        value = int(parts[0])
+        info[key] = value * 1024 if len(parts) > 1 and parts[1] == "kB" else value
+    return info
+
+def meminfo(path=None):
+    """The whole of /proc/meminfo, read and parsed in one pass."""
+    text = _read(path or rootfs.path(MEMINFO))
+    return parse_meminfo(text) if text is not None else {}
+
+def _hugepage_pools(directory, fields=HUGEPAGE_FIELDS):
+    """{page size in bytes: {field: count}} for a hugepages-*kB parent directory."""
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return {}
+    pools = {}
+    for name in names:
+        match = HUGEPAGE_DIR.match(name)
+        if not match:
+            continue
+        pool = {}
+        for field in fields:
+            value = _int(_read(os.path.join(directory, name, field)))
+            if value is not None:
+                pool[field] = value
+        size = int(match.group(1)) * 1024
+        if pool.get("nr_hugepages") is not None and pool.get("free_hugepages") is not None:
+            pool["used_hugepages"] = pool["nr_hugepages"] - pool["free_hugepages"]
+            pool["total_bytes"] = pool["nr_hugepages"] * size
+        pools[size] = pool
+    return pools
+
+def hugepages(directory=None):
+    """System wide hugepage pools, keyed by page size in bytes (2097152, 1073741824)."""
+    return _hugepage_pools(directory or rootfs.path(HUGEPAGES_DIR))
+
+def _selected(text):
+    # "always [madvise] never" -> "madvise"
+    if text is None:
+        return None
+    match = re.search(r"\[([^\]]+)\]", text)
+    return match.group(1) if match else text
+
+def transparent_hugepages(directory=None):
+    """Transparent hugepage policy, the selected value of each setting."""
+    directory = directory or rootfs.path(THP_DIR)
+    settings = {}
+    for name in THP_SETTINGS:
+        value = _selected(_read(os.path.join(directory, name)))
+        if value is not None:
+            settings[name.replace("/", "_")] = value
+    return settings
+
+def parse_numastat(text):
+    stats = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            stats[parts[0]] = int(parts[1])
+    allocated = stats.get("numa_hit", 0) + stats.get("numa_miss", 0)
+    if allocated:
+        # allocations this node served for a process that wanted another node
+        stats["miss_percent"] = round(100.0 * stats.get("numa_miss", 0) / allocated, 3)
+    return stats
+
+def nodes(directory=None):
+    """Per NUMA node meminfo, numastat, distances and hugepage pools."""
+    directory = directory or rootfs.path(NODE_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return {}
+    result = {}
+    for name in sorted((n for n in names if n.startswith("node") and n[4:].isdigit()), key=lambda n: int(n[4:])):
+        node_dir = os.path.join(directory, name)
+        text = _read(os.path.join(node_dir, "meminfo"))
+        numastat = _read(os.path.join(node_dir, "numastat"))
+        distance = _read(os.path.join(node_dir, "distance"))
+        result[int(name[4:])] = {
+            "cpus": _read(os.path.join(node_dir, "cpulist")),
+            "meminfo": parse_meminfo(text) if text else {},
+            "numastat": parse_numastat(numastat) if numastat else {},
+            "distance": [int(d) for d in distance.split()] if distance else [],
+            "hugepages": _hugepage_pools(os.path.join(node_dir, "hugepages"),
+                                         ("nr_hugepages", "free_hugepages", "surplus_hugepages"))
+        }
+    return result
+
+def _smbios_string(raw, length, index):
+    """The index-th (1 based) string of the string set after the formatted area."""
+    if not index:
+        return None
+    strings = raw[length:].split(b"\0")
+    if index > len(strings):
+        return None
+    value = strings[index - 1].decode(errors="replace").strip()
+    return value or None
+
+def parse_memory_device(raw):
+    """A raw SMBIOS type 17 structure as a DIMM record, None for an empty slot."""
+    if len(raw) < 0x15 or raw[0] != 17:
+        return None
+    length = raw[1]
+
+    def word(offset):
+        return struct.unpack_from("<H", raw, offset)[0] if offset + 2 <= length else None
+
+    size = word(0x0C)
+    if size in (0, None):
+        return None  # no module installed
+    if size == 0xFFFF:
+        size_bytes = None
+    elif size == 0x7FFF and length >= 0x20:
+        size_bytes = (struct.unpack_from("<I", raw, 0x1C)[0] & 0x7FFFFFFF) * 1024 ** 2
+    elif size & 0x8000:
+        size_bytes = (size & 0x7FFF) * 1024
+    else:
+        size_bytes = size * 1024 ** 2
+
+    speed = word(0x15)
+    configured = word(0x20)
+    # 0xFFFF means the real value is in the 32 bit extended fields (SMBIOS 3.3)
+    if speed == 0xFFFF and length >= 0x58:
+        speed = struct.unpack_from("<I", raw, 0x54)[0]
+    if configured == 0xFFFF and length >= 0x5C:
+        configured = struct.unpack_from("<I", raw, 0x58)[0]
+    return {
+        "locator": _smbios_string(raw, length, raw[0x10]),
+        "bank": _smbios_string(raw, length, raw[0x11]),
+        "size": size_bytes,
+        "type": MEMORY_TYPES.get(raw[0x12], "Unknown"),
+        "speed_mts": speed or None,
+        "configured_speed_mts": configured or None,
+        "manufacturer": _smbios_string(raw, length, raw[0x17]) if length > 0x17 else None,
+        "part_number": _smbios_string(raw, length, raw[0x1A]) if length > 0x1A else None
+    }
+
+def dimms(directory=None):
+    """Installed memory modules from the SMBIOS tables, needs root to read them."""
+    directory = directory or rootfs.path(DMI_ENTRIES)
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith("17-")]
+    except OSError:
+        return []
+    modules = []
+    for name in sorted(names, key=lambda n: int(n.split("-")[1])):
+        try:
+            with open(os.path.join(directory, name, "raw"), "rb") as f:
+                module = parse_memory_device(f.read())
+        except OSError:
+            continue
+        if module:
+            modules.append(module)
+    return modules
+
+def memory_type(modules=None):
+    """Type of the installed modules (DDR4, DDR5...), "Unknown" without SMBIOS access."""
+    modules = dimms() if modules is None else modules
+    types = sorted({m["type"] for m in modules if m["type"] not in ("Unknown", "Other")})
+    return "/".join(types) if types else "Unknown"
+
+def dump():
+    """meminfo, NUMA nodes, hugepages, THP and DIMMs as numeric data (bytes and counts)."""
+    if platform.system() != "Linux":
+        return {"error": "The memory collector is only available on Linux"}
+    modules = dimms()
+    return {
+        "meminfo": meminfo(),
+        "nodes": nodes(),
+        "hugepages": hugepages(),
+        "transparent_hugepages": transparent_hugepages(),
+        "dimms": modules,
+        "type": memory_type(modules)
+    }
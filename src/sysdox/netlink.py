@@ -0,0 +1,317 @@
+import os
+import time
+import errno
+import socket
+import struct
+import platform
+import threading
+from collections import deque, namedtuple
+import psutil
+from . import rootfs, verbose
+
+NETLINK_ROUTE = 0
+
+# multicast groups (linux/rtnetlink.h)
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_OPERSTATE = 16
+
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+IFF_LOWER_UP = 0x10000
+
+RT_SCOPE_LINK = 253
+
+OPERSTATES = ("unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up")
+
+NLMSGHDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+IFINFOMSG = struct.Struct("=BxHiII")  # family, type, index, flags, change
+IFADDRMSG = struct.Struct("=BBBBI")  # family, prefixlen, flags, scope, index
+RTATTR = struct.Struct("=HH")  # len, type
+
+RCVBUF = 4 * 1024 * 1024
+
+# same fields as the entries of psutil.net_if_addrs(), so callers need not care
+# which one they got
+Address = namedtuple("Address", ["family", "address", "netmask", "broadcast", "ptp"])
+
+def _align(length):
+    return (length + 3) & ~3
+
+def parse_attrs(data, offset):
+    """{type: payload} for the rtattrs in data from offset on."""
+    attrs = {}
+    while offset + RTATTR.size <= len(data):
+        length, kind = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attrs[kind & 0x3fff] = data[offset + RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+def parse_messages(data):
+    """Yield (type, flags, seq, payload) for every netlink message in data."""
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, kind, flags, seq, _ = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        yield kind, flags, seq, data[offset + NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+def _mac(raw):
+    return ":".join(f"{b:02x}" for b in raw)
+
+def _netmask(family, prefixlen):
+    bits = 32 if family == socket.AF_INET else 128
+    mask = ((1 << bits) - 1) ^ ((1 << (bits - prefixlen)) - 1)
+    return socket.inet_ntop(family, mask.to_bytes(bits // 8, "big"))
+
+def parse_link(payload):
+    """An RTM_NEWLINK/RTM_DELLINK payload as (index, link record)."""
+    _, _, index, flags, _ = IFINFOMSG.unpack_from(payload)
+    attrs = parse_attrs(payload, IFINFOMSG.size)
+    operstate = attrs.get(IFLA_OPERSTATE)
+    return index, {
+        "name": attrs.get(IFLA_IFNAME, b"").rstrip(b"\0").decode(errors="replace"),
+        "mac": _mac(attrs[IFLA_ADDRESS]) if IFLA_ADDRESS in attrs else None,
+        "mtu": struct.unpack("=I", attrs[IFLA_MTU])[0] if IFLA_MTU in attrs else None,
+        "flags": flags,
+        "up": bool(flags & IFF_UP) and bool(flags & IFF_RUNNING),
+        "operstate": OPERSTATES[operstate[0]] if operstate and operstate[0] < len(OPERSTATES) else None
+    }
+
+def parse_addr(payload):
+    """An RTM_NEWADDR/RTM_DELADDR payload as (index, family, address, prefixlen, scope)."""
+    family, prefixlen, _, scope, index = IFADDRMSG.unpack_from(payload)
+    attrs = parse_attrs(payload, IFADDRMSG.size)
+    # on point to point links IFA_ADDRESS is the peer, IFA_LOCAL our own address
+    raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+    address = socket.inet_ntop(family, raw) if raw else None
+    return index, family, address, prefixlen, scope
+
+class InterfaceCache:
+    """Interface and address table kept current by rtnetlink notifications.
+
+    The table is filled with one RTM_GETLINK and one RTM_GETADDR dump, after
+    that only the kernel's link and address notifications are applied. Like
+    filecache.FileWatcher there is no thread: pending notifications are drained
+    from a non blocking socket whenever the table is read, so an unchanged
+    system costs one failed recv. Links going up or down and addresses coming
+    and going are kept in a bounded event log, including flaps that happened
+    and reverted between two reads. If the socket buffer overflowed the table
+    is rebuilt from a fresh dump.
+    """
+
+    def __init__(self, max_events=1000):
+        self.links = {}      # index -> link record
+        self.addresses = {}  # index -> {(family, address, prefixlen): scope}
+        self.events = deque(maxlen=max_events)
+        self.seq = 0         # number of events ever logged
+        self._lock = threading.Lock()
+        self._sock = None
+        self._dump_seq = 0
+
+    def start(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK, NETLINK_ROUTE)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        # subscribe before dumping, anything that changes meanwhile is replayed
+        # on top of the dump by the next drain
+        self._resync(log=False)
+        return self
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _dump(self, kind):
+        """Messages of a full RTM_GETLINK/RTM_GETADDR dump, on a socket of its own."""
+        self._dump_seq += 1
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+            sock.bind((0, 0))
+            # rtgenmsg is just the family, AF_UNSPEC for every family
+            body = struct.pack("=Bxxx", socket.AF_UNSPEC)
+            sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(body), kind, NLM_F_REQUEST | NLM_F_DUMP,
+                                    self._dump_seq, 0) + body)
+            messages = []
+            while True:
+                data = sock.recv(65536)
+                for msg_kind, _, seq, payload in parse_messages(data):
+                    if seq != self._dump_seq:
+                        continue
+                    if msg_kind == NLMSG_DONE:
+                        return messages
+                    if msg_kind == NLMSG_ERROR:
+                        code = struct.unpack_from("=i", payload)[0]
+                        if code:
+                            raise OSError(-code, os.strerror(-code))
+                        continue
+                    messages.append((msg_kind, payload))
+
+    def _resync(self, log=True):
+        links = self._dump(RTM_GETLINK)
+        addrs = self._dump(RTM_GETADDR)
+        with self._lock:
+            self.links.clear()
+            self.addresses.clear()
+            for kind, payload in links + addrs:
+                self._apply(kind, payload, log=False)
+            if log:
+                self._log("resync", None)
+
+    def _log(self, event, name, **details):
+        self.seq += 1
+        entry = {"seq": self.seq, "ts": time.time(), "event": event, "interface": name}
+        entry.update(details)
+        self.events.append(entry)
+
+    def _apply(self, kind, payload, log=True):
+        if kind in (RTM_NEWLINK, RTM_DELLINK):
+            index, link = parse_link(payload)
+            before = self.links.get(index)
+            if kind == RTM_DELLINK:
+                self.links.pop(index, None)
+                self.addresses.pop(index, None)
+                if log:
+                    self._log("link_removed", link["name"])
+                return
+            self.links[index] = link
+            if not log:
+                return
+            if before is None:
+                self._log("link_added", link["name"], up=link["up"])
+            elif before["up"] != link["up"]:
+                self._log("link_up" if link["up"] else "link_down", link["name"])
+            elif before["name"] != link["name"]:
+                self._log("link_renamed", link["name"], old_name=before["name"])
+        elif kind in (RTM_NEWADDR, RTM_DELADDR):
+            index, family, address, prefixlen, scope = parse_addr(payload)
+            if address is None:
+                return
+            key = (family, address, prefixlen)
+            table = self.addresses.setdefault(index, {})
+            if kind == RTM_NEWADDR:
+                added = key not in table
+                table[key] = scope
+            else:
+                added = None
+                if table.pop(key, None) is None:
+                    return
+            if log and added is not False:
+                name = self.links.get(index, {}).get("name")
+                self._log("address_added" if added else "address_removed", name,
+                          address=f"{address}/{prefixlen}")
+
+    def drain(self):
+        """Apply every pending notification; rebuild from a dump after an overflow."""
+        if self._sock is None:
+            return
+        overflowed = False
+        with self._lock:
+            while True:
+                try:
+                    data = self._sock.recv(65536)
+                except BlockingIOError:
+                    break
+                except OSError as e:
+                    if e.errno == errno.ENOBUFS:
+                        overflowed = True
+                        continue
+                    raise
+                for kind, _, _, payload in parse_messages(data):
+                    self._apply(kind, payload)
+        if overflowed:
+            verbose.warning("netlink receive buffer overflowed, resyncing interface table")
+            self._resync()
+
+    def if_addrs(self):
+        """{name: [Address]} shaped like psutil.net_if_addrs()."""
+        self.drain()
+        with self._lock:
+            result = {}
+            for index, link in self.links.items():
+                entries = []
+                for (family, address, prefixlen), scope in self.addresses.get(index, {}).items():
+                    if family == socket.AF_INET6 and scope == RT_SCOPE_LINK:
+                        address = f"{address}%{link['name']}"
+                    entries.append(Address(family, address, _netmask(family, prefixlen), None, None))
+                if link["mac"]:
+                    entries.append(Address(psutil.AF_LINK, link["mac"], None, None, None))
+                result[link["name"]] = entries
+            return result
+
+    def if_up(self):
+        """{name: is up}, like the isup field of psutil.net_if_stats()."""
+        self.drain()
+        with self._lock:
+            return {link["name"]: link["up"] for link in self.links.values()}
+
+    def recent_events(self, since=0):
+        """Logged events with a seq above since, oldest first."""
+        self.drain()
+        with self._lock:
+            return [event for event in self.events if event["seq"] > since]
+
+_cache = None
+
+def enable():
+    """Start the shared cache for a resident process, returns it (None if unavailable).
+
+    Nothing is started when replaying a capture with --root, the live kernel's
+    interfaces have nothing to do with it.
+    """
+    global _cache
+    if _cache is None and platform.system() == "Linux" and rootfs.get_root() is None:
+        try:
+            _cache = InterfaceCache().start()
+        except OSError as e:
+            verbose.warning("netlink interface cache unavailable", error=e)
+    return _cache
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+def get_cache():
+    """The running cache, None in one shot runs."""
+    return _cache
+
+def dump():
+    """Link and address events seen by the resident interface cache."""
+    cache = get_cache()
+    if cache is None:
+        return {"error": "The interface event log is only kept while recording or watching"}
+    return {"interfaces": len(cache.if_up()), "events": cache.recent_events()}
@@ -0,0 +1,193 @@
+import time
+import platform
+from . import rootfs, registry, verbose
+
+SNMP = "/proc/net/snmp"
+NETSTAT = "/proc/net/netstat"
+SOFTNET = "/proc/net/softnet_stat"
+NET_DEV = "/proc/net/dev"
+
+# /proc/net/dev columns after the interface name
+DEV_FIELDS = (
+    "rx_bytes", "rx_packets", "rx_errors", "rx_dropped", "rx_fifo_errors", "rx_frame_errors",
+    "rx_compressed", "multicast", "tx_bytes", "tx_packets", "tx_errors", "tx_dropped",
+    "tx_fifo_errors", "collisions", "tx_carrier_errors", "tx_compressed"
+)
+DEV_REPORTED = (
+    "rx_errors", "rx_dropped", "rx_fifo_errors", "rx_frame_errors",
+    "tx_errors", "tx_dropped", "tx_fifo_errors", "collisions", "tx_carrier_errors"
+)
+
+# softnet_stat columns worth reporting, by position
+SOFTNET_FIELDS = {0: "processed", 1: "dropped", 2: "time_squeeze", 9: "received_rps", 10: "flow_limit_count"}
+
+# (section, field) -> reported name
+TCP_COUNTERS = {
+    ("Tcp", "OutSegs"): "out_segments",
+    ("Tcp", "RetransSegs"): "retransmits",
+    ("Tcp", "InErrs"): "in_errors",
+    ("Tcp", "OutRsts"): "out_resets",
+    ("Tcp", "AttemptFails"): "attempt_fails",
+    ("Tcp", "EstabResets"): "established_resets",
+    ("TcpExt", "TCPTimeouts"): "timeouts",
+    ("TcpExt", "TCPSynRetrans"): "syn_retransmits",
+    ("TcpExt", "TCPLostRetransmit"): "lost_retransmits",
+    ("TcpExt", "ListenOverflows"): "listen_overflows",
+    ("TcpExt", "ListenDrops"): "listen_drops",
+    ("TcpExt", "TCPReqQFullDrop"): "syn_drops",
+    ("TcpExt", "TCPReqQFullDoCookies"): "syn_cookies_on_full_queue",
+    ("TcpExt", "SyncookiesSent"): "syn_cookies_sent",
+    ("TcpExt", "TCPBacklogDrop"): "backlog_drops",
+    ("TcpExt", "PruneCalled"): "prune_called",
+    ("TcpExt", "TCPAbortOnMemory"): "abort_on_memory",
+}
+UDP_COUNTERS = {
+    ("Udp", "InErrors"): "in_errors",
+    ("Udp", "NoPorts"): "no_ports",
+    ("Udp", "RcvbufErrors"): "receive_buffer_errors",
+    ("Udp", "SndbufErrors"): "send_buffer_errors",
+}
+GAUGES = {("Tcp", "CurrEstab"): "established"}
+
+def parse_snmp(text):
+    """{section: {field: value}} for the header/value line pairs of snmp and netstat."""
+    sections = {}
+    lines = text.splitlines()
+    for header, values in zip(lines[::2], lines[1::2]):
+        names = header.split()
+        numbers = values.split()
+        if not names or names[0] != numbers[0]:
+            continue
+        section = sections.setdefault(names[0].rstrip(":"), {})
+        for name, value in zip(names[1:], numbers[1:]):
+            try:
+                section[name] = int(value)
+            except ValueError:
+                continue
+    return sections
+
+def parse_softnet(text):
+    """{cpu: {field: count}} from softnet_stat, one hex row per online cpu.
+
+    Newer kernels print the cpu number in column 13; on older ones the row
+    index is used, which is only right when every cpu is online.
+    """
+    per_cpu = {}
+    for i, line in enumerate(text.splitlines()):
+        columns = [int(value, 16) for value in line.split()]
+        cpu = columns[12] if len(columns) > 12 else i
+        per_cpu[cpu] = {name: columns[index] for index, name in SOFTNET_FIELDS.items() if index < len(columns)}
+    return per_cpu
+
+def parse_net_dev(text):
+    interfaces = {}
+    for line in text.splitlines()[2:]:
+        name, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        values = rest.split()
+        interfaces[name.strip()] = {field: int(value) for field, value in zip(DEV_FIELDS, values)
+                                    if field in DEV_REPORTED}
+    return interfaces
+
+def _read(path):
+    try:
+        with open(rootfs.path(path)) as f:
+            return f.read()
+    except OSError as e:
+        verbose.debug("could not read file", path=path, error=e)
+        return ""
+
+def read_counters():
+    """Raw counters of every source, each file read once."""
+    snmp = parse_snmp(_read(SNMP))
+    snmp.update(parse_snmp(_read(NETSTAT)))
+    return {
+        "snmp": snmp,
+        "softnet": parse_softnet(_read(SOFTNET)),
+        "interfaces": parse_net_dev(_read(NET_DEV))
+    }
+
+def delta(prev, curr):
+    """curr - prev for every counter present in both, recursively.
+
+    A counter that went backwards was reset (interface recreated, module
+    reloaded) and counts from zero, so its current value is the delta.
+    """
+    result = {}
+    for key, value in curr.items():
+        before = prev.get(key)
+        if before is None:
+            continue
+        if isinstance(value, dict):
+            result[key] = delta(before, value)
+        else:
+            result[key] = value - before if value >= before else value
+    return result
+
+def _pick(snmp, names):
+    return {name: snmp[section][field] for (section, field), name in names.items()
+            if field in snmp.get(section, {})}
+
+def summarize(counters, gauges=None):
+    """The counters that explain a slow network, from read_counters() or delta().
+
+    gauges is the read_counters() result current values such as the number of
+    established connections come from (counters itself by default).
+    """
+    snmp = counters["snmp"]
+    tcp = _pick(snmp, TCP_COUNTERS)
+    tcp.update(_pick((gauges or counters)["snmp"], GAUGES))
+    if tcp.get("out_segments"):
+        tcp["retransmit_percent"] = round(100.0 * tcp.get("retransmits", 0) / tcp["out_segments"], 3)
+    per_cpu = counters["softnet"]
+    total = {}
+    for values in per_cpu.values():
+        for name, value in values.items():
+            total[name] = total.get(name, 0) + value
+    return {
+        "tcp": tcp,
+        "udp": _pick(snmp, UDP_COUNTERS),
+        "softnet": {"total": total, "per_cpu": per_cpu},
+        "interfaces": counters["interfaces"]
+    }
+
+class NetstatSampler:
+    """Counter deltas between successive sample() calls, one read of each file per call."""
+
+    def __init__(self, reader=read_counters):
+        self.reader = reader
+        self.counters = None
+        self._prev_time = None
+
+    def sample(self):
+        """summarize() of what changed since the previous call, None on the first one."""
+        now = time.monotonic()
+        counters = self.reader()
+        prev, prev_time = self.counters, self._prev_time
+        self.counters, self._prev_time = counters, now
+        if prev is None:
+            return None
+        result = summarize(delta(prev, counters), gauges=counters)
+        result["interval"] = round(now - prev_time, 3)
+        return result
+
+_sampler = NetstatSampler()
+
+def dump():
+    """Kernel network stack counters.
+
+    A one shot run reports totals since boot. While recording or watching the
+    counters are deltas over the interval since the previous sample, with
+    "interval" in seconds. The first sample of a run has nothing to diff
+    against and reports its totals under "since_boot" instead, so they are
+    never mistaken for (or alerted on as) a delta.
+    """
+    if platform.system() != "Linux":
+        return {"error": "Network stack counters are only available on Linux"}
+    if registry.sampling():
+        sampled = _sampler.sample()
+        if sampled is not None:
+            return sampled
+        return {"since_boot": summarize(_sampler.counters), "interval": None}
+    return dict(summarize(read_counters()), interval=None)
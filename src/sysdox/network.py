@@ -2,13 +2,30 @@ import psutil
 import socket
 import subprocess
 import platform
+import os
+from collections import Counter
+from . import procinfo, rootfs, verbose, netlink
+from .filecache import cached_by_files
 
 import socket  # Add this import
 
-def ips():
-    """Retrieve IP addresses for all network interfaces."""
+def _if_addrs():
+    """psutil.net_if_addrs(), served from the netlink cache while it is running."""
+    cache = netlink.get_cache()
+    return cache.if_addrs() if cache is not None else psutil.net_if_addrs()
+
+def _if_up():
+    cache = netlink.get_cache()
+    if cache is not None:
+        return cache.if_up()
+    return {name: stats.isup for name, stats in psutil.net_if_stats().items()}
+
+def ips(names=None):
+    """Retrieve IP addresses for all network interfaces (or only those in names)."""
     ip_addresses = {}
-    for interface, addrs in psutil.net_if_addrs().items():
+    for interface, addrs in _if_addrs().items():
+        if names and interface not in names:
+            continue
         ipv4 = [addr.address for addr in addrs if addr.family == socket.AF_INET]
         ipv6 = [addr.address for addr in addrs if addr.family == socket.AF_INET6]
         if ipv4 or ipv6:
@@ -16,10 +33,12 @@ def ips():
     return ip_addresses
 
 
-def interface():
+def interface(names=None):
     """Fetch network interfaces (ethernet, wifi, etc.) and stats"""
     interfaces = {}
-    for interface, addrs in psutil.net_if_addrs().items():
+    for interface, addrs in _if_addrs().items():
+        if names and interface not in names:
+            continue
         interfaces[interface] = {
             'ip': None,
             'mac': None
@@ -31,27 +50,30 @@ def interface():
                 interfaces[interface]['mac'] = addr.address
     return interfaces
 
-def interface_stats():
+def interface_stats(names=None):
     """Fetch stats for each network interface (bytes sent/received, up/down)"""
     stats = {}
     io_counters = psutil.net_io_counters(pernic=True)
     
     # retrieve interface stats
-    for interface, iface_stats in psutil.net_if_stats().items():
+    for interface, is_up in _if_up().items():
+        if names and interface not in names:
+            continue
         stats[interface] = {
-            'is_up': iface_stats.isup,
+            'is_up': is_up,
             'bytes_sent': io_counters.get(interface, {}).bytes_sent if interface in io_counters else None,
             'bytes_recv': io_counters.get(interface, {}).bytes_recv if interface in io_counters else None
         }
     return stats
 
+@cached_by_files("/etc/resolv.conf")
 def dns():
     """Fetch DNS servers"""
     dns_servers = []
     
     try:
         if platform.system() == "Linux":
-            with open("/etc/resolv.conf", "r") as f:
+            with open(rootfs.path("/etc/resolv.conf"), "r") as f:
                 dns_servers = [line.split()[1] for line in f.readlines() if line.startswith("nameserver")]
         elif platform.system() == "Windows":
             dns_servers = subprocess.check_output(["nslookup"], stderr=subprocess.STDOUT).decode().splitlines()
@@ -60,14 +82,18 @@ def dns():
             dns_servers = subprocess.check_output("scutil --dns", shell=True).decode().splitlines()
             dns_servers = [line.split(":")[1].strip() for line in dns_servers if "nameserver" in line]
     except Exception as e:
+        verbose.warning("DNS servers failed", error=e)
         dns_servers = []
     
     return dns_servers
 
-def speed():
+def speed(names=None):
+    """Link speed per interface, names limits which interfaces are probed."""
     speeds = {}
     if platform.system() == "Linux":
-        for interface in psutil.net_if_addrs():
+        for interface in _if_addrs():
+            if names and interface not in names:
+                continue
             try:
                 output = subprocess.check_output(
                     f"ethtool {interface} | grep -i speed", 
@@ -77,10 +103,13 @@ def speed():
                 speed_line = output.split(':')[-1].strip()
                 # if speed is still unknown
                 speeds[interface] = speed_line if speed_line.lower() != "unknown!" else "Not Available"
-            except subprocess.CalledProcessError:
+            except subprocess.CalledProcessError as e:
+                verbose.debug("link speed failed", interface=interface, error=e)
                 speeds[interface] = "Not Available"
     elif platform.system() == "Windows":
-        for interface in psutil.net_if_addrs():
+        for interface in _if_addrs():
+            if names and interface not in names:
+                continue
             try:
                 output = subprocess.check_output(
                     f"netsh interface show interface \"{interface}\"", 
@@ -91,10 +120,13 @@ def speed():
                     if "Link Speed" in line:
                         speed_line = line.split(":")[-1].strip()
                         speeds[interface] = speed_line
-            except subprocess.CalledProcessError:
+            except subprocess.CalledProcessError as e:
+                verbose.debug("link speed failed", interface=interface, error=e)
                 speeds[interface] = "Not Available"
     elif platform.system() == "Darwin":
-        for interface in psutil.net_if_addrs():
+        for interface in _if_addrs():
+            if names and interface not in names:
+                continue
             try:
                 output = subprocess.check_output(
                     f"networksetup -getInfo {interface}", 
@@ -105,7 +137,8 @@ def speed():
                     if "Link Speed" in line:
                         speed_line = line.split(":")[-1].strip()
                         speeds[interface] = speed_line
-            except subprocess.CalledProcessError:
+            except subprocess.CalledProcessError as e:
+                verbose.debug("link speed failed", interface=interface, error=e)
                 speeds[interface] = "Not Available"
     else:
         speeds[interface] = "Unsupported OS"
@@ -115,13 +148,14 @@ def detect_vpn_tunnels():
     vpn_keywords = {'tun', 'tap', 'ppp', 'wg', 'vpn'}
     tunnels = {}
 
-    for iface in psutil.net_if_addrs():
+    addrs_by_name = _if_addrs()
+    for iface in addrs_by_name:
         if any(iface.lower().startswith(prefix) for prefix in vpn_keywords):
             tunnels[iface] = {
                 'ip': None,
                 'mac': None
             }
-            for addr in psutil.net_if_addrs()[iface]:
+            for addr in addrs_by_name[iface]:
                 if addr.family == socket.AF_INET:
                     tunnels[iface]['ip'] = addr.address
                 elif addr.family == psutil.AF_LINK:
@@ -130,7 +164,13 @@ def detect_vpn_tunnels():
         tunnels = "No VPN tunnels detected"
     return tunnels
 
-def current_connections():
+def current_connections(enrich=True):
+    """Active (non listening) inet connections.
+
+    With enrich, each row gets a 'process' entry (name, cmdline, user, cgroup,
+    container id, start time) from the shared procinfo resolver, which looks up
+    every distinct pid once and caches it across calls.
+    """
     conns = []
     try:
         for conn in psutil.net_connections(kind='inet'):
@@ -141,11 +181,120 @@ def current_connections():
                     'status': conn.status,
                     'pid': conn.pid
                 })
+        if enrich:
+            processes = procinfo.get_resolver().resolve_many(conn['pid'] for conn in conns)
+            for conn in conns:
+                conn['process'] = processes.get(conn['pid'])
     except Exception as e:
+        verbose.warning("connections failed", error=e)
         conns.append({"error": str(e)})
     return conns
 
 
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING", "0C": "NEW_SYN_RECV"
+}
+
+SOCKET_TABLES = ("tcp", "tcp6", "udp", "udp6")
+
+def _hex_to_ip(hex_addr):
+    """Decode an address from /proc/net/{tcp,udp}{,6} (little endian 32 bit words)."""
+    raw = bytes.fromhex(hex_addr)
+    words = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, words)
+
+def _hex_subnet(hex_addr):
+    """Human readable /24 (IPv4) or /64 (IPv6) network for a subnet key."""
+    if len(hex_addr) == 6:
+        return _hex_to_ip("00" + hex_addr) + "/24"
+    return _hex_to_ip(hex_addr + "0" * 16) + "/64"
+
+def _socket_owners(proc=None):
+    """Map socket inode -> owning pid by walking /proc/<pid>/fd once."""
+    proc = proc or rootfs.path("/proc")
+    owners = {}
+    for pid in os.listdir(proc):
+        if not pid.isdigit():
+            continue
+        fd_dir = f"{proc}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # gone, or not ours to look at
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                owners[target[8:-1]] = int(pid)
+    return owners
+
+def connection_summary(top=10, by_pid=False, proc=None):
+    """Aggregate socket counts straight from /proc/net/{tcp,tcp6,udp,udp6}.
+
+    The tables are streamed line by line and only counters keyed by state, local
+    port, remote address and remote subnet are kept, so memory depends on the
+    number of distinct keys rather than the number of sockets. Addresses are only
+    decoded for the top entries. by_pid adds a per-process count, which needs one
+    walk over /proc/<pid>/fd to map socket inodes to pids.
+    """
+    by_protocol = Counter()
+    by_state = Counter()
+    local_ports = Counter()
+    remotes = Counter()
+    subnets = Counter()
+    pids = Counter()
+    proc = proc or rootfs.path("/proc")
+    owners = _socket_owners(proc) if by_pid else None
+
+    for table in SOCKET_TABLES:
+        is_v4 = not table.endswith("6")
+        is_tcp = table.startswith("tcp")
+        empty = "00000000" if is_v4 else "0" * 32
+        count = 0
+        try:
+            with open(f"{proc}/net/{table}") as f:
+                next(f, None)  # header
+                for line in f:
+                    fields = line.split(None, 10 if by_pid else 4)
+                    local, remote, state = fields[1], fields[2], fields[3]
+                    count += 1
+                    local_ports[local[-4:]] += 1
+                    if owners is not None:
+                        pid = owners.get(fields[9])
+                        if pid is not None:
+                            pids[pid] += 1
+                    if is_tcp:
+                        by_state[state] += 1
+                    remote_ip = remote[:-5]
+                    if remote_ip != empty:
+                        remotes[remote_ip] += 1
+                        # keys stay raw hex, the top 3 bytes of an IPv4 word or the first
+                        # 8 bytes of an IPv6 address are a plain slice of the string
+                        subnets[remote_ip[2:] if is_v4 else remote_ip[:16]] += 1
+        except OSError:
+            continue
+        by_protocol[table] = count
+
+    states = {TCP_STATES.get(state, state): n for state, n in by_state.most_common()}
+    summary = {
+        "total": sum(by_protocol.values()),
+        "by_protocol": dict(by_protocol),
+        "by_state": states,
+        "time_wait": states.get("TIME_WAIT", 0),
+        "close_wait": states.get("CLOSE_WAIT", 0),
+        "top_local_ports": {int(port, 16): n for port, n in local_ports.most_common(top)},
+        "top_remote_addresses": {_hex_to_ip(addr): n for addr, n in remotes.most_common(top)},
+        "top_remote_subnets": {_hex_subnet(net): n for net, n in subnets.most_common(top)}
+    }
+    if by_pid:
+        summary["top_pids"] = dict(pids.most_common(top))
+    return summary
+
 def dump():
     return {
         'ip_address': ips(),
@@ -155,4 +304,16 @@ def dump():
         'network_speed': speed(),
         'vpn_tunnels': detect_vpn_tunnels(),
         'connections': current_connections()
-    }
\ No newline at end of file
+    }
+
+def fields():
+    """Field name -> function map used by path queries."""
+    return {
+        'ip_address': ips,
+        'interfaces': interface,
+        'interface_stats': interface_stats,
+        'dns_servers': dns,
+        'network_speed': speed,
+        'vpn_tunnels': detect_vpn_tunnels,
+        'connections': current_connections
+    }
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# per-thread rusage keeps collectors running in parallel apart
+RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None) if resource else None
+IO_FIELDS = ("rchar", "wchar", "read_bytes", "write_bytes")
+
+_local = threading.local()
+_hook_installed = False
+
+def _audit(event, args):
+    if event in ("subprocess.Popen", "os.system", "os.posix_spawn"):
+        _local.subprocesses = getattr(_local, "subprocesses", 0) + 1
+
+def _install_hook():
+    """Count subprocesses spawned per thread through the audit hook (Python 3.8+)."""
+    global _hook_installed
+    if not _hook_installed and hasattr(sys, "addaudithook"):
+        sys.addaudithook(_audit)
+        _hook_installed = True
+
+def _rusage(who):
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+def read_io(path="/proc/thread-self/io"):
+    """I/O counters of the calling thread, empty where the kernel has no such file."""
+    counters = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in IO_FIELDS:
+                    counters[key] = int(value)
+    except OSError:
+        pass
+    return counters
+
+def read_rss(path="/proc/self/statm"):
+    """Current resident set size of the process in bytes, None if unknown."""
+    try:
+        with open(path) as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def _counters():
+    return {
+        "wall": time.monotonic(),
+        "cpu": _rusage(RUSAGE_THREAD if RUSAGE_THREAD is not None else resource.RUSAGE_SELF) if resource else 0.0,
+        "children_cpu": _rusage(resource.RUSAGE_CHILDREN) if resource else 0.0,
+        "subprocesses": getattr(_local, "subprocesses", 0),
+        "io": read_io(),
+        "rss": read_rss()
+    }
+
+def measure(func, *args, **kwargs):
+    """Call func and return (result, overhead) for that one call.
+
+    overhead holds wall and CPU seconds (the calling thread's own time plus the
+    CPU of subprocesses reaped meanwhile), subprocesses spawned, bytes read and
+    written and the RSS growth of the process. The subprocess CPU is process
+    wide, so it is only the call's own while nothing else reaps children.
+    """
+    _install_hook()
+    before = _counters()
+    result = func(*args, **kwargs)
+    after = _counters()
+    stats = {
+        "wall_seconds": round(after["wall"] - before["wall"], 6),
+        "cpu_seconds": round(after["cpu"] - before["cpu"], 6),
+        "children_cpu_seconds": round(after["children_cpu"] - before["children_cpu"], 6),
+        "subprocesses": after["subprocesses"] - before["subprocesses"] if _hook_installed else None
+    }
+    for key in IO_FIELDS:
+        if key in after["io"] and key in before["io"]:
+            stats[key] = after["io"][key] - before["io"][key]
+    if after["rss"] is not None and before["rss"] is not None:
+        stats["rss_delta"] = after["rss"] - before["rss"]
+    return result, stats
+
+def process_cpu():
+    """CPU seconds used so far by the whole process and the subprocesses it reaped."""
+    return time.process_time() + (_rusage(resource.RUSAGE_CHILDREN) if resource else 0.0)
+
+def process_usage():
+    """Lifetime totals of the sysdox process itself."""
+    usage = {
+        "pid": os.getpid(),
+        "rss": read_rss(),
+        "threads": threading.active_count()
+    }
+    if resource is not None:
+        me = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage["cpu_seconds"] = round(me.ru_utime + me.ru_stime, 6)
+        usage["children_cpu_seconds"] = round(children.ru_utime + children.ru_stime, 6)
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        usage["max_rss"] = me.ru_maxrss if sys.platform == "darwin" else me.ru_maxrss * 1024
+    return usage
+
+class Governor:
+    """Keeps sysdox's own CPU use under a budget, e.g. 0.01 for 1% of one core.
+
+    Every run reports its CPU time through account(), measured once for the
+    whole run with process_cpu() so parallel collectors are not charged for
+    each other's subprocesses. While the usage over the
+    last window seconds is above budget, or the host load per CPU is above
+    max_load, the governor degrades: collectors of the skip_costs classes are
+    not run and their last result is served instead, and interval() stretches
+    the sampling interval in proportion to the overrun.
+    """
+
+    def __init__(self, budget=0.01, window=300.0, max_load=None, skip_costs=("expensive", "privileged"),
+                 max_stretch=10.0, clock=time.monotonic):
+        self.budget = budget
+        self.window = window
+        self.max_load = max_load
+        self.skip_costs = tuple(skip_costs)
+        self.max_stretch = max_stretch
+        self.clock = clock
+        self.started = clock()
+        self.last = {}
+        self._runs = deque()
+
+    def account(self, cpu_seconds):
+        now = self.clock()
+        self._runs.append((now, cpu_seconds))
+        while self._runs and self._runs[0][0] < now - self.window:
+            self._runs.popleft()
+
+    def usage(self):
+        """Fraction of one core used over the window (or since start, if shorter)."""
+        now = self.clock()
+        span = min(self.window, now - self.started)
+        if span <= 0:
+            return 0.0
+        return sum(cpu for ts, cpu in self._runs if ts >= now - self.window) / span
+
+    def host_loaded(self):
+        if self.max_load is None or not hasattr(os, "getloadavg"):
+            return False
+        return os.getloadavg()[0] / (os.cpu_count() or 1) > self.max_load
+
+    def degraded(self):
+        return self.usage() > self.budget or self.host_loaded()
+
+    def allow(self, collector):
+        """False when the collector should be served from its last result instead."""
+        return not (collector.cost in self.skip_costs and collector.name in self.last and self.degraded())
+
+    def remember(self, results):
+        self.last.update(results)
+
+    def interval(self, base):
+        if self.budget <= 0:
+            return base * self.max_stretch
+        stretch = max(1.0, self.usage() / self.budget)
+        if self.host_loaded():
+            stretch = max(stretch, 2.0)
+        return base * min(stretch, self.max_stretch)
+
+    def state(self):
+        return {
+            "budget": self.budget,
+            "usage": round(self.usage(), 6),
+            "degraded": self.degraded()
+        }
@@ -0,0 +1,156 @@
+import os
+import time
+import select
+import platform
+from . import rootfs, registry
+
+RESOURCES = ("cpu", "memory", "io")
+PROC_PRESSURE = "/proc/pressure"
+
+def parse_pressure(text):
+    """Parse a PSI file into {"some": {...}, "full": {...}}.
+
+    avg10/avg60/avg300 are percentages, total is the stall time in microseconds.
+    The cpu file only has a "full" line on newer kernels.
+    """
+    result = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        values = {}
+        for field in parts[1:]:
+            key, _, value = field.partition("=")
+            values[key] = int(value) if key == "total" else float(value)
+        result[parts[0]] = values
+    return result
+
+def _pressure_path(directory, resource, cgroup):
+    # /proc/pressure/memory system wide, <cgroup>/memory.pressure per cgroup
+    return os.path.join(directory, f"{resource}.pressure" if cgroup else resource)
+
+def read_pressure(directory=None, cgroup=False):
+    """PSI for every resource in directory, skipping files the kernel does not provide."""
+    directory = directory or rootfs.path(PROC_PRESSURE)
+    pressure = {}
+    for resource in RESOURCES:
+        try:
+            with open(_pressure_path(directory, resource, cgroup)) as f:
+                pressure[resource] = parse_pressure(f.read())
+        except (OSError, ValueError):
+            continue
+    return pressure
+
+def stall_rates(prev, curr, elapsed):
+    """Percentage of wall time stalled between two read_pressure() results.
+
+    The kernel's avg10 only moves every two seconds, the total counters give an
+    exact figure for any sampling interval.
+    """
+    rates = {}
+    for resource, lines in curr.items():
+        before = prev.get(resource)
+        if not before or elapsed <= 0:
+            continue
+        rates[resource] = {
+            kind: round(100.0 * (values["total"] - before[kind]["total"]) / (elapsed * 1e6), 2)
+            for kind, values in lines.items() if kind in before
+        }
+    return rates
+
+class PressureSampler:
+    """Stall percentages over the interval between two sample() calls."""
+
+    def __init__(self, directory=None, cgroup=False):
+        self.directory = directory
+        self.cgroup = cgroup
+        self._prev = None
+        self._prev_time = None
+        self.pressure = {}
+
+    def sample(self):
+        now = time.monotonic()
+        curr = self.pressure = read_pressure(self.directory, self.cgroup)
+        rates = {}
+        if self._prev is not None:
+            rates = stall_rates(self._prev, curr, now - self._prev_time)
+        self._prev, self._prev_time = curr, now
+        return rates
+
+class PressureTrigger:
+    """A kernel PSI trigger: wakes up when stalls exceed threshold within window.
+
+    kind is "some" or "full", threshold and window are in microseconds. The
+    kernel requires the window to be between 500ms and 10s, and unprivileged
+    users may only use windows that are a multiple of 2s. The trigger lives as
+    long as the file descriptor is open.
+    """
+
+    def __init__(self, resource, threshold, window=1000000, kind="some", path=None):
+        self.resource = resource
+        self.path = path or _pressure_path(PROC_PRESSURE, resource, False)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            os.write(self.fd, f"{kind} {int(threshold)} {int(window)}\0".encode())
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def wait(triggers, timeout=None):
+    """Block until one of the triggers fires or timeout seconds pass.
+
+    Returns the triggers that fired, an empty list on timeout.
+    """
+    poller = select.poll()
+    by_fd = {}
+    for trigger in triggers:
+        poller.register(trigger.fileno(), select.POLLPRI)
+        by_fd[trigger.fileno()] = trigger
+    events = poller.poll(None if timeout is None else max(0, int(timeout * 1000)))
+    fired = []
+    for fd, event in events:
+        if event & select.POLLERR:
+            raise OSError(f"PSI trigger on {by_fd[fd].path} was removed")
+        if event & select.POLLPRI:
+            fired.append(by_fd[fd])
+    return fired
+
+def parse_trigger(spec):
+    """Build a PressureTrigger from a CLI spec: RESOURCE:STALL_MS[:WINDOW_MS[:KIND]]."""
+    parts = spec.split(":")
+    if len(parts) < 2 or parts[0] not in RESOURCES:
+        raise ValueError(f"Invalid trigger {spec!r}, expected RESOURCE:STALL_MS[:WINDOW_MS[:some|full]]")
+    threshold = float(parts[1]) * 1000
+    window = float(parts[2]) * 1000 if len(parts) > 2 else 2000000
+    kind = parts[3] if len(parts) > 3 else "some"
+    return PressureTrigger(parts[0], threshold, window, kind)
+
+_sampler = PressureSampler()
+
+def dump():
+    """System wide pressure stall information.
+
+    While recording or watching every line also gets stall_percent, the share
+    of wall time stalled since the previous tick (from the second tick on).
+    """
+    if platform.system() != "Linux":
+        return {"error": "PSI is only available on Linux"}
+    if not registry.sampling():
+        pressure = read_pressure()
+    else:
+        rates = _sampler.sample()
+        pressure = _sampler.pressure
+        for resource, kinds in rates.items():
+            for kind, percent in kinds.items():
+                pressure[resource][kind]["stall_percent"] = percent
+    if not pressure:
+        return {"error": "PSI not available (needs Linux 4.20+ with CONFIG_PSI)"}
+    return pressure
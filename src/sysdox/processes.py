@@ -0,0 +1,111 @@
+import time
+import heapq
+import psutil
+from operator import itemgetter
+from . import procinfo, registry, verbose
+
+# row layout, rows are plain tuples so 50k processes do not mean 50k dicts
+PID, NAME, CPU, RSS, FDS, THREADS = range(6)
+
+RANKINGS = {
+    "by_cpu": CPU,
+    "by_rss": RSS,
+    "by_fds": FDS,
+    "by_threads": THREADS
+}
+
+class ProcessSampler:
+    """Top-N process view with CPU% computed from deltas between samples.
+
+    Previous cpu times are kept per (pid, create_time), so no call ever sleeps
+    and a recycled pid starts from scratch. Exited processes fall out of the
+    state on the next sample.
+    """
+
+    def __init__(self):
+        self._prev = {}
+        self._prev_time = None
+        self.rows = []
+
+    def sample(self):
+        """Read every process once (inside oneshot) and return the number seen."""
+        now = time.monotonic()
+        elapsed = now - self._prev_time if self._prev_time is not None else None
+        prev = self._prev
+        current = {}
+        rows = []
+        for proc in psutil.process_iter():
+            try:
+                with proc.oneshot():
+                    created = proc.create_time()
+                    times = proc.cpu_times()
+                    total = times.user + times.system
+                    rss = proc.memory_info().rss
+                    threads = proc.num_threads()
+                    try:
+                        fds = proc.num_fds()
+                    except (AttributeError, psutil.AccessDenied):
+                        fds = 0  # Windows, or another user's process
+                    name = proc.name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            key = (proc.pid, created)
+            current[key] = total
+            before = prev.get(key)
+            cpu = round(100.0 * (total - before) / elapsed, 2) if before is not None and elapsed else None
+            rows.append((proc.pid, name, cpu, rss, fds, threads))
+        self._prev, self._prev_time = current, now
+        self.rows = rows
+        return len(rows)
+
+    def top(self, n=10, resolve=True):
+        """Top n processes per ranking, picked with a heap instead of a full sort."""
+        result = {}
+        for ranking, column in RANKINGS.items():
+            rows = self.rows
+            if column == CPU:
+                rows = [row for row in rows if row[CPU] is not None]
+            result[ranking] = [self._describe(row) for row in heapq.nlargest(n, rows, key=itemgetter(column))]
+        if resolve:
+            pids = {entry["pid"] for entries in result.values() for entry in entries}
+            details = procinfo.get_resolver().resolve_many(pids)
+            for entries in result.values():
+                for entry in entries:
+                    info = details.get(entry["pid"]) or {}
+                    entry["user"] = info.get("user")
+                    entry["container_id"] = info.get("container_id")
+        result["total_processes"] = len(self.rows)
+        result["total_threads"] = sum(row[THREADS] for row in self.rows)
+        return result
+
+    @staticmethod
+    def _describe(row):
+        return {
+            "pid": row[PID],
+            "name": row[NAME],
+            "cpu_percent": row[CPU],
+            "rss": row[RSS],
+            "num_fds": row[FDS],
+            "num_threads": row[THREADS]
+        }
+
+_sampler = ProcessSampler()
+
+def dump(interval=0.5, n=10):
+    """Top processes by CPU, RSS, open fds and threads.
+
+    While recording or watching CPU% is taken over the interval since the
+    previous tick, so each tick walks the processes once. A one shot run (and
+    the first tick) samples twice, interval seconds apart.
+    """
+    try:
+        sampler = _sampler if registry.sampling() else ProcessSampler()
+        primed = sampler._prev_time is not None
+        sampler.sample()
+        if not primed:
+            time.sleep(interval)
+            sampler.sample()
+        return sampler.top(n)
+    except Exception as e:
+        verbose.warning("process sampling failed", error=e)
+        return {"error": f"Unable to sample processes: {e}"}
@@ -0,0 +1,163 @@
+import os
+import re
+import platform
+import psutil
+from . import rootfs
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+# docker, containerd, cri-o and podman all name the cgroup after a 64 char hex id
+CONTAINER_ID = re.compile(r"([0-9a-f]{64})")
+
+def _read(path, mode="r"):
+    with open(path, mode) as f:
+        return f.read()
+
+def _clock_ticks():
+    try:
+        return os.sysconf("SC_CLK_TCK")
+    except (AttributeError, ValueError, OSError):
+        return 100
+
+class ProcessResolver:
+    """Shared pid -> process metadata cache for connection and process views.
+
+    Entries are keyed by (pid, start_time) so a recycled pid is never reported
+    with the previous owner's name. Validating an entry costs one read of
+    /proc/<pid>/stat (a psutil create_time() call on other systems); the name,
+    cmdline, user and cgroup are only read on a miss.
+    """
+
+    def __init__(self, proc=None):
+        self._proc = proc
+        self._current_proc = None
+        self.cache = {}
+        self._users = {}
+        self._ticks = _clock_ticks()
+        self._boot_time = None
+        self._linux = platform.system() == "Linux"
+
+    @property
+    def proc(self):
+        """The /proc read from, the one of the current root unless given explicitly."""
+        if self._proc is not None:
+            return self._proc
+        proc = rootfs.path("/proc")
+        if proc != self._current_proc:
+            # set_root() switched hosts, nothing cached belongs to this one
+            self.cache.clear()
+            self._boot_time = None
+            self._current_proc = proc
+        return proc
+
+    def _start_ticks(self, pid):
+        """Start time of a pid in clock ticks since boot, from /proc/<pid>/stat."""
+        stat = _read(f"{self.proc}/{pid}/stat", "rb")
+        # comm can hold spaces and parens, everything after the last ')' is fixed
+        return int(stat[stat.rindex(b")") + 2:].split()[19])
+
+    def _user(self, uid):
+        if uid not in self._users:
+            try:
+                self._users[uid] = pwd.getpwuid(uid).pw_name if pwd else str(uid)
+            except KeyError:
+                self._users[uid] = str(uid)
+        return self._users[uid]
+
+    def _container_id(self, pid):
+        try:
+            cgroup = _read(f"{self.proc}/{pid}/cgroup")
+        except OSError:
+            return None, None
+        path = cgroup.splitlines()[-1].split(":", 2)[-1] if cgroup else None
+        match = CONTAINER_ID.search(cgroup)
+        return path, match.group(1) if match else None
+
+    def _cmdline(self, pid):
+        try:
+            return _read(f"{self.proc}/{pid}/cmdline").replace("\0", " ").strip()
+        except OSError:
+            return None  # captures leave command lines out by default
+
+    def _load_linux(self, pid, start_ticks):
+        if self._boot_time is None:
+            self._boot_time = psutil.boot_time()
+        uid = None
+        for line in _read(f"{self.proc}/{pid}/status").splitlines():
+            if line.startswith("Uid:"):
+                uid = int(line.split()[1])
+                break
+        cgroup, container = self._container_id(pid)
+        return {
+            "name": _read(f"{self.proc}/{pid}/comm").strip(),
+            "cmdline": self._cmdline(pid),
+            "user": self._user(uid) if uid is not None else None,
+            "cgroup": cgroup,
+            "container_id": container,
+            "start_time": round(self._boot_time + start_ticks / self._ticks, 2)
+        }
+
+    def _load_psutil(self, proc, start):
+        with proc.oneshot():
+            return {
+                "name": proc.name(),
+                "cmdline": " ".join(proc.cmdline()),
+                "user": proc.username(),
+                "cgroup": None,
+                "container_id": None,
+                "start_time": round(start, 2)
+            }
+
+    def resolve(self, pid):
+        """Metadata for one pid, or None if the process is gone or unreadable."""
+        if pid is None:
+            return None
+        try:
+            if self._linux:
+                start = self._start_ticks(pid)
+                cached = self.cache.get(pid)
+                if cached and cached[0] == start:
+                    return cached[1]
+                info = self._load_linux(pid, start)
+            else:
+                proc = psutil.Process(pid)
+                start = proc.create_time()
+                cached = self.cache.get(pid)
+                if cached and cached[0] == start:
+                    return cached[1]
+                info = self._load_psutil(proc, start)
+        except (OSError, ValueError, IndexError, psutil.Error):
+            self.cache.pop(pid, None)
+            return None
+        self.cache[pid] = (start, info)
+        return info
+
+    def resolve_many(self, pids):
+        """Resolve a batch of pids, each distinct pid is looked up once."""
+        self.prune()
+        return {pid: self.resolve(pid) for pid in set(pids) if pid is not None}
+
+    def prune(self):
+        """Drop cached entries for processes that have exited."""
+        if not self.cache:
+            return
+        try:
+            alive = {int(pid) for pid in os.listdir(self.proc) if pid.isdigit()} if self._linux \
+                else set(psutil.pids())
+        except OSError:
+            return
+        for pid in list(self.cache):
+            if pid not in alive:
+                del self.cache[pid]
+
+_resolver = None
+
+def get_resolver():
+    """Process wide resolver so every view shares one cache."""
+    global _resolver
+    if _resolver is None:
+        _resolver = ProcessResolver()
+    return _resolver
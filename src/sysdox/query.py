@@ -0,0 +1,138 @@
+import inspect
+from . import registry, rootfs
+
+WILDCARD = "*"
+
+def parse_path(path):
+    """Split a dotted path into segments.
+
+    Segments holding dots (IP addresses, package names) can be double quoted:
+    extra.packages."python3.11"
+    """
+    segments = []
+    current = []
+    quoted = False
+    for char in path:
+        if char == '"':
+            quoted = not quoted
+        elif char == "." and not quoted:
+            segments.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if quoted:
+        raise ValueError(f"Unterminated quote in path: {path}")
+    segments.append("".join(current))
+    if any(segment == "" for segment in segments):
+        raise ValueError(f"Empty segment in path: {path}")
+    return segments
+
+def _format_path(segments):
+    return ".".join(f'"{s}"' if "." in s else s for s in segments)
+
+def _accepts_names(func):
+    try:
+        return "names" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+class _Evaluator:
+    """Runs the smallest set of collector parts needed for a batch of paths.
+
+    Every (collector, field, names) combination is evaluated at most once per
+    batch, so several paths into the same section share a single call. Sections
+    already present in snapshot (a registry.run() result) are read from it.
+    """
+
+    def __init__(self, snapshot=None):
+        self.results = {}
+        self.snapshot = snapshot or {}
+        # resolve $SYSDOX_ROOT before any collector runs, psutil's /proc included
+        rootfs.get_root()
+
+    def source(self, segments):
+        """Return (value, consumed) for the leading segments of a path."""
+        section = segments[0]
+        if section in self.snapshot:
+            return self.snapshot[section], 1
+        try:
+            collector = registry.get(section)
+        except KeyError:
+            raise KeyError(f"Unknown collector: {section}")
+
+        fields = collector.fields() if len(segments) > 1 and segments[1] != WILDCARD else {}
+        if segments[1:2] and segments[1] in fields:
+            func = fields[segments[1]]
+            names = None
+            # narrow per-interface (or per-device) functions to the one asked for
+            if len(segments) > 2 and segments[2] != WILDCARD and _accepts_names(func):
+                names = (segments[2],)
+            key = (section, segments[1], names)
+            if key not in self.results:
+                self.results[key] = func(names=list(names)) if names else func()
+            return self.results[key], 2
+
+        key = (section, None, None)
+        if key not in self.results:
+            self.results[key] = collector()
+        return self.results[key], 1
+
+    def evaluate(self, path):
+        segments = parse_path(path)
+        value, consumed = self.source(segments)
+        matches = {}
+        _walk(value, segments[:consumed], segments[consumed:], matches)
+        return segments, matches
+
+def _walk(value, done, remaining, matches):
+    if not remaining:
+        matches[_format_path(done)] = value
+        return
+    segment, rest = remaining[0], remaining[1:]
+    if segment == WILDCARD:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                _walk(child, done + [str(key)], rest, matches)
+        elif isinstance(value, list):
+            for i, child in enumerate(value):
+                _walk(child, done + [str(i)], rest, matches)
+        return
+    if isinstance(value, dict):
+        if segment in value:
+            _walk(value[segment], done + [segment], rest, matches)
+        else:
+            # json keys are strings, collectors sometimes use ints
+            for key in value:
+                if str(key) == segment:
+                    _walk(value[key], done + [segment], rest, matches)
+                    break
+    elif isinstance(value, list) and segment.isdigit() and int(segment) < len(value):
+        _walk(value[int(segment)], done + [segment], rest, matches)
+
+def get_many(paths):
+    """Resolve several paths, sharing collector calls between them.
+
+    Returns {path: value}. A path without wildcards maps to its value; a path
+    with wildcards maps to a {concrete path: value} dict of every match.
+    """
+    evaluator = _Evaluator()
+    results = {}
+    for path in paths:
+        segments, matches = evaluator.evaluate(path)
+        if WILDCARD in segments:
+            results[path] = matches
+        elif matches:
+            results[path] = next(iter(matches.values()))
+        else:
+            raise KeyError(f"No such path: {path}")
+    return results
+
+def get(path):
+    """Value at a dotted path such as "network.interface_stats.eth0.bytes_recv".
+
+    Only the collector part the path points into is run: "firmware.bios_version"
+    reads the DMI files and nothing else. Use * to match every key or list item
+    at one level, e.g. "specs.storage_info.*.health", which returns a dict of
+    concrete path -> value.
+    """
+    return get_many([path])[path]
@@ -0,0 +1,51 @@
+import time
+from . import registry, filecache, pressure, netlink
+
+def record(sinks, interval=60.0, count=None, selection=None, costs=None, parallel=False,
+           triggers=(), meta=False, governor=None):
+    """Sample the selected collectors every interval seconds and feed the sinks.
+
+    A sink is any object with write(ts, snapshot) and close(). File backed
+    collectors are cached between ticks (see sysdox.filecache), so rarely
+    changing sections cost next to nothing after the first sample. With PSI
+    triggers (see sysdox.pressure) a sample is also taken as soon as one fires,
+    instead of waiting for the next tick. A governor (see sysdox.overhead)
+    stretches the interval and serves expensive collectors from their last
+    result while sysdox is over its CPU budget. Interfaces and addresses come
+    from the netlink cache (see sysdox.netlink) instead of being enumerated on
+    every tick.
+    """
+    was_enabled = filecache.enabled()
+    filecache.enable()
+    was_sampling = registry.set_sampling(True)
+    had_netlink = netlink.get_cache() is not None
+    netlink.enable()
+    taken = 0
+    try:
+        while count is None or taken < count:
+            started = time.time()
+            snapshot = registry.run(selection, costs=costs, parallel=parallel, meta=meta, governor=governor)
+            for sink in sinks:
+                sink.write(started, snapshot)
+            taken += 1
+            if count is not None and taken >= count:
+                break
+            wait = governor.interval(interval) if governor is not None else interval
+            remaining = max(0.0, wait - (time.time() - started))
+            if triggers:
+                pressure.wait(triggers, remaining)
+            else:
+                time.sleep(remaining)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sink in sinks:
+            sink.close()
+        for trigger in triggers:
+            trigger.close()
+        if not was_enabled:
+            filecache.disable()
+        registry.set_sampling(was_sampling)
+        if not had_netlink:
+            netlink.disable()
+    return taken
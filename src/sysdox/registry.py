@@ -0,0 +1,302 @@
+import importlib
+import platform
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# cost classes, in the order a scheduler should run them
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+PRIVILEGED = "privileged"
+COSTS = (CHEAP, EXPENSIVE, PRIVILEGED)
+
+# volatility, static results can be cached for the life of the process
+STATIC = "static"
+VOLATILE = "volatile"
+
+ENTRY_POINT_GROUP = "sysdox.collectors"
+
+class Collector:
+    """A named section of the dump plus the metadata a scheduler needs.
+
+    func is either a callable or a "module:function" string that is only imported
+    the first time the collector runs. platforms is a set of platform.system()
+    values (None means everywhere) and requires lists executables the collector
+    shells out to. default collectors are part of a plain dump(). fields optionally
+    names a function returning {key: callable} for the top level keys of the
+    result, which lets path queries run a single part of the collector.
+    """
+
+    def __init__(self, name, func, cost=CHEAP, volatility=VOLATILE, platforms=None,
+                 requires=(), default=True, description="", fields=None):
+        if cost not in COSTS:
+            raise ValueError(f"Unknown cost class for collector {name}: {cost}")
+        if volatility not in (STATIC, VOLATILE):
+            raise ValueError(f"Unknown volatility for collector {name}: {volatility}")
+        self.name = name
+        self._func = func
+        self.cost = cost
+        self.volatility = volatility
+        self.platforms = set(platforms) if platforms else None
+        self.requires = tuple(requires)
+        self.default = default
+        self.description = description
+        self._fields = fields
+
+    @property
+    def func(self):
+        if isinstance(self._func, str):
+            module, _, attr = self._func.partition(":")
+            self._func = getattr(importlib.import_module(module), attr)
+        return self._func
+
+    def fields(self):
+        """{key: callable} for the parts of this collector, empty if it has none."""
+        if self._fields is None:
+            return {}
+        if isinstance(self._fields, str):
+            module, _, attr = self._fields.partition(":")
+            self._fields = getattr(importlib.import_module(module), attr)
+        return self._fields()
+
+    def supported(self):
+        """True when the collector can run on this host."""
+        if self.platforms and platform.system() not in self.platforms:
+            return False
+        return all(shutil.which(tool) for tool in self.requires)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def info(self):
+        return {
+            "cost": self.cost,
+            "volatility": self.volatility,
+            "platforms": sorted(self.platforms) if self.platforms else "all",
+            "requires": list(self.requires),
+            "default": self.default,
+            "description": self.description
+        }
+
+    def __repr__(self):
+        return f"Collector({self.name!r}, cost={self.cost!r}, volatility={self.volatility!r})"
+
+_collectors = {}
+_plugins_loaded = False
+_cache = {}
+_sampling = False
+
+def sampling():
+    """True while record() or watch() run the collectors on every tick.
+
+    Collectors reporting rates then keep their previous reading from one tick
+    to the next and report the change over the interval.
+    """
+    return _sampling
+
+def set_sampling(enabled):
+    """Switch periodic sampling on or off, returns the previous state."""
+    global _sampling
+    previous, _sampling = _sampling, bool(enabled)
+    return previous
+
+def register(name, func, **metadata):
+    """Register a collector, replacing any previous one with the same name."""
+    collector = func if isinstance(func, Collector) else Collector(name, func, **metadata)
+    _collectors[name] = collector
+    _cache.pop(name, None)
+    return collector
+
+def collector(name, **metadata):
+    """Decorator form of register() for plugin modules."""
+    def wrap(func):
+        return register(name, func, **metadata)
+    return wrap
+
+def _entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))
+
+def load_plugins():
+    """Discover third party collectors from the sysdox.collectors entry point group.
+
+    This only happens the first time the registry is queried, never at import.
+    An entry point may resolve to a Collector, or to a plain callable which is
+    registered as a cheap volatile collector under the entry point name.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for ep in _entry_points():
+        try:
+            obj = ep.load()
+        except Exception as e:
+            from . import verbose
+            verbose.error("collector plugin failed to load", plugin=ep.name, error=e)
+            continue
+        if isinstance(obj, Collector):
+            _collectors.setdefault(obj.name, obj)
+        elif callable(obj) and ep.name not in _collectors:
+            register(ep.name, obj, default=False)
+
+def get(name):
+    load_plugins()
+    return _collectors[name]
+
+def names(default_only=False):
+    """Collector names in registration order."""
+    load_plugins()
+    return [name for name, c in _collectors.items() if c.default or not default_only]
+
+def collectors(selection=None, costs=None, supported_only=True):
+    """Select collectors by name and cost class, cheapest first."""
+    load_plugins()
+    selected = [_collectors[name] for name in selection] if selection else \
+        [c for c in _collectors.values() if c.default]
+    if costs is not None:
+        selected = [c for c in selected if c.cost in costs]
+    if supported_only:
+        selected = [c for c in selected if c.supported()]
+    # stable sort, so registration order is kept within a cost class
+    return sorted(selected, key=lambda c: COSTS.index(c.cost))
+
+def run(selection=None, costs=None, parallel=False, use_cache=False, max_workers=None,
+        meta=False, governor=None):
+    """Run collectors and return {name: result} in the requested order.
+
+    Cheap collectors are scheduled first. With parallel the collectors run in a
+    thread pool (most of them wait on files or subprocesses), with use_cache the
+    results of static collectors are reused for the life of the process. With
+    meta the result gets a _meta section with what every collector cost sysdox
+    itself (see sysdox.overhead); a governor may serve expensive collectors from
+    their last result while sysdox is over its CPU budget.
+    """
+    from . import overhead, rootfs, verbose
+
+    rootfs.get_root()  # applies $SYSDOX_ROOT, psutil's /proc included, before any collector runs
+    selected = collectors(selection, costs)
+    results = {}
+    stats = {}
+    pending = []
+    for c in selected:
+        if use_cache and c.volatility == STATIC and c.name in _cache:
+            results[c.name] = _cache[c.name]
+            stats[c.name] = {"cached": True}
+        elif governor is not None and not governor.allow(c):
+            results[c.name] = governor.last[c.name]
+            stats[c.name] = {"cached": True, "governed": True}
+        else:
+            pending.append(c)
+
+    inner = overhead.measure if meta else (lambda c: (c(), None))
+    cpu_before = overhead.process_cpu() if governor is not None else None
+
+    def call(c):
+        with verbose.collecting(c.name):
+            started = time.perf_counter()
+            try:
+                result = inner(c)
+            except Exception as e:
+                verbose.error("collector failed", duration=time.perf_counter() - started, error=e)
+                raise
+            duration = time.perf_counter() - started
+            if duration >= verbose.SLOW_SECONDS:
+                verbose.warning("collector slow", duration=duration)
+            else:
+                verbose.debug("collector done", duration=duration)
+            return result
+    if parallel and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers or len(pending)) as pool:
+            futures = [(c, pool.submit(call, c)) for c in pending]
+            for c, future in futures:
+                results[c.name], stats[c.name] = future.result()
+        if meta:
+            # RUSAGE_CHILDREN is process wide, concurrent collectors' shares can't be told apart
+            for c in pending:
+                stats[c.name]["children_cpu_seconds"] = None
+    else:
+        for c in pending:
+            results[c.name], stats[c.name] = call(c)
+
+    for c in pending:
+        if c.volatility == STATIC:
+            _cache[c.name] = results[c.name]
+
+    # results come back in registration (or requested) order, not run order
+    order = selection or names(default_only=True)
+    output = {name: results[name] for name in order if name in results}
+    if governor is not None:
+        governor.account(overhead.process_cpu() - cpu_before)
+        governor.remember(output)
+    if meta:
+        output["_meta"] = {
+            "collectors": {name: stats[name] for name in output},
+            "process": overhead.process_usage()
+        }
+        if governor is not None:
+            output["_meta"]["governor"] = governor.state()
+    return output
+
+def clear_cache():
+    _cache.clear()
+
+# Built-in sections. Functions are given as strings so importing the registry does
+# not import every collector module.
+register("system", "sysdox.system:dump", fields="sysdox.system:fields",
+         cost=CHEAP, volatility=VOLATILE,
+         description="OS, kernel, CPU, memory, uptime")
+register("network", "sysdox.network:dump", fields="sysdox.network:fields",
+         cost=EXPENSIVE, volatility=VOLATILE,
+         description="Interfaces, IPs, DNS, bandwidth stats")
+register("extra", "sysdox.extra:dump", fields="sysdox.extra:fields",
+         cost=EXPENSIVE, volatility=STATIC,
+         description="Package manager, environment details")
+register("firmware", "sysdox.firmware:dump", fields="sysdox.firmware:fields",
+         cost=PRIVILEGED, volatility=STATIC,
+         description="BIOS version, microcode, UEFI, drives")
+register("specs", "sysdox.specs:dump", fields="sysdox.specs:fields",
+         cost=PRIVILEGED, volatility=VOLATILE,
+         description="Combined hardware specs")
+register("cpustat", "sysdox.cpustat:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="Per-core utilisation sampled from /proc/stat")
+register("diskio", "sysdox.diskio:dump", cost=CHEAP, volatility=VOLATILE, default=False,
+         description="Per-device IOPS, throughput, await and utilisation")
+register("topology", "sysdox.topology:summary", cost=CHEAP, volatility=STATIC,
+         platforms={"Linux"}, default=False,
+         description="Sockets, cores, SMT, caches and NUMA layout")
+register("connection_summary", "sysdox.network:connection_summary", cost=CHEAP,
+         volatility=VOLATILE, platforms={"Linux"}, default=False,
+         description="Socket counts by state, port, peer and subnet")
+register("processes", "sysdox.processes:dump", cost=EXPENSIVE, volatility=VOLATILE, default=False,
+         description="Top processes by CPU, RSS, open fds and threads")
+register("cgroup", "sysdox.cgroup:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="cgroup v2 limits, usage and CPU throttling")
+register("pressure", "sysdox.pressure:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="Pressure stall information for CPU, memory and IO")
+register("devices", "sysdox.devices:dump", cost=CHEAP, volatility=STATIC,
+         platforms={"Linux"}, default=False,
+         description="PCI, USB and sound devices from sysfs")
+register("link_events", "sysdox.netlink:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="Link up/down and address changes seen while recording")
+register("memory", "sysdox.memory:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="meminfo, NUMA nodes, hugepage pools, THP and DIMMs")
+register("netstat", "sysdox.netstat:dump", cost=CHEAP, volatility=VOLATILE,
+         platforms={"Linux"}, default=False,
+         description="TCP retransmits, listen overflows, softnet drops, interface errors")
+register("fingerprint", "sysdox.identity:dump", cost=CHEAP, volatility=STATIC, default=False,
+         description="Stable hash of the hardware and firmware configuration")
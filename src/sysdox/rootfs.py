@@ -0,0 +1,281 @@
+import io
+import os
+import sys
+import re
+import glob
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import platform
+import tarfile
+import tempfile
+import subprocess
+import psutil
+from . import verbose
+
+ENV_VAR = "SYSDOX_ROOT"
+META_DIR = ".sysdox"
+MANIFEST = "capture.json"
+
+_UNSET = object()
+_root = _UNSET
+
+def _use(directory):
+    global _root
+    if directory and os.path.isfile(directory) and tarfile.is_tarfile(directory):
+        directory = extract(directory)
+    _root = os.path.abspath(directory) if directory else None
+    if hasattr(psutil, "PROCFS_PATH"):
+        psutil.PROCFS_PATH = path("/proc")
+
+def get_root():
+    """The alternate root collectors read from, None for the live system.
+
+    Until set_root() is called the root comes from $SYSDOX_ROOT, read on first
+    use rather than at import so importing sysdox never touches the disk.
+    """
+    if _root is _UNSET:
+        _use(os.environ.get(ENV_VAR))
+    return _root
+
+def set_root(directory):
+    """Point every file based collector (and psutil's /proc) at another root.
+
+    directory may be an unpacked capture or a tarball made by capture(), which
+    is extracted to a temporary directory. None goes back to the live system.
+    """
+    _use(directory)
+    # anything computed from the previous root is stale now
+    from . import filecache, topology
+    filecache.clear()
+    topology.get_topology.cache_clear()
+
+def path(p):
+    """p (an absolute path) relative to the current root."""
+    root = get_root()
+    if root is None:
+        return p
+    return os.path.join(root, p.lstrip("/"))
+
+def command_key(cmd):
+    return cmd if isinstance(cmd, str) else " ".join(cmd)
+
+def _command_file(cmd):
+    return hashlib.sha1(command_key(cmd).encode()).hexdigest()[:16]
+
+def check_output(cmd, **kwargs):
+    """subprocess.check_output, answered from the capture when a root is set."""
+    root = get_root()
+    if root is None:
+        return subprocess.check_output(cmd, **kwargs)
+    try:
+        with open(os.path.join(root, META_DIR, MANIFEST)) as f:
+            entry = json.load(f)["commands"][command_key(cmd)]
+        with open(os.path.join(root, META_DIR, "commands", entry["file"]), "rb") as f:
+            output = f.read()
+    except (OSError, ValueError, KeyError):
+        raise FileNotFoundError(f"Command was not captured: {command_key(cmd)}")
+    if entry["returncode"]:
+        raise subprocess.CalledProcessError(entry["returncode"], cmd, output)
+    return output
+
+# Globs of the files the collectors read. Symlinked directories on the way
+# (/sys/class/net/eth0 -> ../../devices/...) are kept as symlinks so code that
+# follows them behaves the same on replay.
+CAPTURE_GLOBS = (
+    "/etc/os-release", "/etc/resolv.conf", "/var/lib/dpkg/status",
+    "/proc/stat", "/proc/cpuinfo", "/proc/meminfo", "/proc/diskstats", "/proc/partitions",
+    "/proc/loadavg", "/proc/uptime", "/proc/version", "/proc/swaps", "/proc/vmstat",
+    "/proc/filesystems", "/proc/self/mounts", "/proc/self/mountinfo", "/proc/self/cgroup", "/proc/pressure/*",
+    "/proc/net/*", "/proc/asound/cards", "/proc/asound/pcm",
+    "/proc/[0-9]*/stat", "/proc/[0-9]*/status", "/proc/[0-9]*/statm", "/proc/[0-9]*/comm",
+    "/proc/[0-9]*/cgroup", "/proc/[0-9]*/fd/*",
+    "/sys/class/dmi/id/*", "/sys/firmware/efi",
+    "/sys/devices/system/cpu/cpu[0-9]*/topology/*", "/sys/devices/system/cpu/cpu[0-9]*/cache/index*/*",
+    "/sys/devices/system/cpu/cpu[0-9]*/microcode/version", "/sys/devices/system/cpu/online",
+    "/sys/devices/system/node/node[0-9]*/*", "/sys/devices/system/node/node[0-9]*/hugepages/*/*",
+    "/sys/kernel/mm/hugepages/*/*", "/sys/kernel/mm/transparent_hugepage/*",
+    "/sys/kernel/mm/transparent_hugepage/khugepaged/defrag", "/sys/firmware/dmi/entries/17-*/raw",
+    "/sys/class/net/*/statistics/*", "/sys/class/net/*/operstate", "/sys/class/net/*/speed",
+    "/sys/class/net/*/mtu", "/sys/class/net/*/address",
+    "/sys/class/block/*/stat", "/sys/class/block/*/partition",
+    "/sys/bus/pci/devices/*/*", "/sys/bus/usb/devices/*/*",
+    "/sys/fs/cgroup/cgroup.controllers", "/sys/fs/cgroup/unified/cgroup.controllers",
+)
+
+# Command lines often carry passwords and tokens, they are only captured on request.
+CMDLINE_GLOBS = ("/proc/[0-9]*/cmdline",)
+
+# Open file descriptors are kept as links and never followed, only sockets
+# (which connection to pid matching needs) are recorded at all; anything else
+# would copy whatever file a process has open into the capture.
+FD_LINK = re.compile(r"^/proc/[0-9]+/fd/[0-9]+$")
+
+CAPTURE_COMMANDS = (
+    ["dpkg-query", "-W", "-f=${Package}=${Version}\n"],
+    ["pacman", "-Q"],
+    ["dnf", "list", "installed"],
+    "fwupdmgr get-devices",
+    "lsblk -dno NAME",
+)
+
+def _commands():
+    """Commands to capture, including the per-device ones the collectors run."""
+    commands = list(CAPTURE_COMMANDS)
+    try:
+        for name in subprocess.check_output("lsblk -dno NAME", shell=True, timeout=3).decode().split():
+            commands.append(f"smartctl -i /dev/{name}")
+    except Exception as e:
+        verbose.warning("could not list disks to capture", cmd="lsblk -dno NAME", error=e)
+    try:
+        for part in psutil.disk_partitions(all=False):
+            commands.append(f"smartctl -H {part.device}")
+    except Exception as e:
+        verbose.warning("could not list partitions to capture", error=e)
+    return commands
+
+def _cgroup_globs():
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    group = line[3:].strip().rstrip("/")
+                    return [f"/sys/fs/cgroup{group}/*", f"/sys/fs/cgroup/unified{group}/*"]
+    except OSError:
+        pass
+    return []
+
+class _Writer:
+    def __init__(self, tar):
+        self.tar = tar
+        self.seen = set()
+
+    def _entry(self, name, **attrs):
+        info = tarfile.TarInfo(name.lstrip("/"))
+        info.mtime = int(time.time())
+        for key, value in attrs.items():
+            setattr(info, key, value)
+        return info
+
+    def add(self, p):
+        """Add p, every symlink on the way to it, and its content at the real location."""
+        current = "/"
+        for part in p.strip("/").split("/"):
+            current = os.path.join(current, part)
+            if not os.path.islink(current):
+                continue
+            try:
+                target = os.readlink(current)
+            except OSError:
+                return  # another user's fd, or the process just exited
+            if FD_LINK.match(current):
+                if target.startswith("socket:") and current not in self.seen:
+                    self.seen.add(current)
+                    self.tar.addfile(self._entry(current, type=tarfile.SYMTYPE, linkname=target))
+                return
+            if os.path.isabs(target):
+                target = os.path.relpath(target, os.path.dirname(current))
+            if current not in self.seen:
+                self.seen.add(current)
+                self.tar.addfile(self._entry(current, type=tarfile.SYMTYPE, linkname=target))
+            current = os.path.realpath(current)
+        if current in self.seen:
+            return
+        self.seen.add(current)
+        if os.path.isdir(current):
+            self.tar.addfile(self._entry(current, type=tarfile.DIRTYPE, mode=0o755))
+        elif os.path.isfile(current):
+            # sysfs and procfs report bogus sizes, so the content is read first
+            try:
+                with open(current, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return
+            self.add_bytes(current, data)
+
+    def add_bytes(self, name, data):
+        self.tar.addfile(self._entry(name, size=len(data), mode=0o644), io.BytesIO(data))
+
+def capture(output, globs=None, commands=None, timeout=10, cmdlines=False):
+    """Snapshot the files and command outputs collectors use into a tar.gz.
+
+    The result can be replayed anywhere with set_root(output) / --root.
+    Process command lines are left out unless cmdlines is set.
+    Returns the number of files and commands captured.
+    """
+    globs = list(globs if globs is not None else CAPTURE_GLOBS + tuple(_cgroup_globs()))
+    if cmdlines:
+        globs.extend(CMDLINE_GLOBS)
+    commands = list(commands if commands is not None else _commands())
+    manifest = {
+        "captured_at": time.time(),
+        "hostname": platform.node(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "python": sys.version.split()[0],
+        "commands": {}
+    }
+    files = 0
+    with tarfile.open(output, "w:gz") as tar:
+        writer = _Writer(tar)
+        for pattern in globs:
+            for match in sorted(glob.glob(pattern)):
+                writer.add(match)
+                files += 1
+        for cmd in commands:
+            name = _command_file(cmd)
+            try:
+                result = subprocess.run(cmd, shell=isinstance(cmd, str), stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, timeout=timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                continue  # not installed here, replay will report it as missing
+            manifest["commands"][command_key(cmd)] = {"file": name, "returncode": result.returncode}
+            writer.add_bytes(f"{META_DIR}/commands/{name}", result.stdout)
+        writer.add_bytes(f"{META_DIR}/{MANIFEST}", json.dumps(manifest, indent=2).encode())
+    return {"files": files, "commands": len(manifest["commands"])}
+
+def _member_filter(member, dest):
+    try:
+        return tarfile.data_filter(member, dest)
+    except tarfile.FilterError:
+        return None  # skip anything that would land outside the destination
+
+def _inside(name):
+    """Whether a relative member name or link target stays inside the destination."""
+    name = name.replace("\\", "/")
+    if not name or os.path.isabs(name) or name.startswith("/"):
+        return False
+    return os.path.normpath(name).replace("\\", "/").split("/")[0] != ".."
+
+def _safe_members(tar):
+    """Members that stay inside the destination, for Pythons without tarfile.data_filter.
+
+    Absolute names, ".." and links pointing out of the destination are skipped,
+    and so are device nodes; a capture only ever holds files, dirs and symlinks.
+    """
+    for member in tar.getmembers():
+        if not _inside(member.name):
+            continue
+        if member.issym():
+            if not _inside(os.path.join(os.path.dirname(member.name), member.linkname)):
+                continue
+        elif member.islnk():
+            if not _inside(member.linkname):
+                continue
+        elif not (member.isfile() or member.isdir()):
+            continue
+        yield member
+
+def extract(archive):
+    """Unpack a capture into a temporary directory removed at exit."""
+    directory = tempfile.mkdtemp(prefix="sysdox-root-")
+    atexit.register(shutil.rmtree, directory, True)
+    with tarfile.open(archive) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(directory, filter=_member_filter)
+        else:
+            tar.extractall(directory, members=_safe_members(tar))
+    return directory
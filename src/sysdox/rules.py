@@ -0,0 +1,327 @@
+import re
+import sys
+import json
+import time
+import socket
+import operator
+from collections import deque
+from .query import parse_path, _Evaluator, _walk
+from . import filecache, netlink, registry, verbose
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt
+}
+
+AGGREGATES = ("avg", "min", "max", "rate")
+
+EXPRESSION = re.compile(
+    r"""^\s*(?:(?P<func>[a-z]+)\(\s*(?P<fpath>[^,()]+?)\s*,\s*(?P<window>[0-9.]+)\s*\)|(?P<path>\S+))"""
+    r"""\s*(?P<op>==|!=|>=|<=|>|<)\s*(?P<literal>.+?)\s*$"""
+)
+NUMBER = re.compile(r"^\s*(-?[0-9]+(?:\.[0-9]+)?)")
+
+def _literal(text):
+    if text in ("true", "false"):
+        return text == "true"
+    if text == "null":
+        return None
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid literal: {text}")
+
+def _number(value):
+    """Numbers as they are, and the leading number of strings such as "91.5 %"."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER.match(str(value))
+    return float(match.group(1)) if match else None
+
+class Window:
+    """Incremental aggregate over the samples of the last seconds.
+
+    Each add() is amortised O(1): avg keeps a running sum and min/max keep a
+    monotonic deque, so nothing is rescanned as the window slides.
+    """
+
+    def __init__(self, func, seconds):
+        if func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {func}")
+        self.func = func
+        self.seconds = seconds
+        self.samples = deque()
+        self.extremes = deque()  # candidates for min/max, in time order
+        self.total = 0.0
+
+    def add(self, ts, value):
+        self.samples.append((ts, value))
+        self.total += value
+        if self.func in ("min", "max"):
+            worse = operator.ge if self.func == "min" else operator.le
+            while self.extremes and worse(self.extremes[-1][1], value):
+                self.extremes.pop()
+            self.extremes.append((ts, value))
+        while self.samples and self.samples[0][0] <= ts - self.seconds:
+            _, old = self.samples.popleft()
+            self.total -= old
+        while self.extremes and self.extremes[0][0] <= ts - self.seconds:
+            self.extremes.popleft()
+        return self.value()
+
+    def value(self):
+        if not self.samples:
+            return None
+        if self.func == "avg":
+            return self.total / len(self.samples)
+        if self.func in ("min", "max"):
+            return self.extremes[0][1]
+        (t0, v0), (t1, v1) = self.samples[0], self.samples[-1]
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else None
+
+class Rule:
+    """One compiled rule: a path, an optional windowed aggregate and a comparison.
+
+    expr looks like 'system.ram_info.ram_percent > 90',
+    'specs.storage_info.*.health != "Healthy"' or
+    'avg(cpustat.hot_cores.average_busy, 300) > 80'. The condition has to hold
+    for_seconds before the rule fires.
+    """
+
+    def __init__(self, name, expr, for_seconds=0, severity="warning"):
+        match = EXPRESSION.match(expr)
+        if not match:
+            raise ValueError(f"Invalid rule expression: {expr}")
+        self.name = name
+        self.expr = expr
+        self.for_seconds = for_seconds
+        self.severity = severity
+        self.func = match.group("func")
+        self.window = float(match.group("window")) if self.func else None
+        if self.func and self.func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {self.func} in rule {name}")
+        self.path = (match.group("fpath") or match.group("path")).strip()
+        self.segments = parse_path(self.path)
+        self.compare = OPERATORS[match.group("op")]
+        self.literal = _literal(match.group("literal"))
+        if match.group("op") not in ("==", "!=") and not isinstance(self.literal, float):
+            raise ValueError(f"{match.group('op')} needs a number in rule {name}: {expr}")
+        self.numeric = self.func is not None or isinstance(self.literal, float)
+
+    @property
+    def collector(self):
+        return self.segments[0]
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["expr"], data.get("for", 0), data.get("severity", "warning"))
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.expr!r})"
+
+class _Series:
+    __slots__ = ("window", "pending_since", "firing", "value")
+
+    def __init__(self, rule):
+        self.window = Window(rule.func, rule.window) if rule.func else None
+        self.pending_since = None
+        self.firing = False
+        self.value = None
+
+class RuleEngine:
+    """Evaluates compiled rules on every sample and emits alert transitions.
+
+    State is kept per rule and per concrete path (one series per disk or
+    interface matched by a wildcard), so a tick only feeds the newest values
+    into each series' window. Only the collector parts the rules point into are
+    run, through the same evaluator path queries use.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.series = {}
+
+    def collectors(self):
+        return sorted({rule.collector for rule in self.rules})
+
+    def sample(self, ts=None, governor=None):
+        """Run the referenced collectors and evaluate every rule, returns the alerts.
+
+        With a governor (see sysdox.overhead) the collectors run whole through
+        registry.run(), so expensive ones can be served from their last result
+        while sysdox is over its CPU budget.
+        """
+        ts = time.time() if ts is None else ts
+        snapshot = None
+        if governor is not None:
+            try:
+                snapshot = registry.run(self.collectors(), governor=governor)
+            except Exception as e:
+                # evaluated rule by rule below, which reports the failing one
+                verbose.warning("governed run failed", error=e)
+        evaluator = _Evaluator(snapshot)
+        values = {}
+        for rule in self.rules:
+            try:
+                value, consumed = evaluator.source(rule.segments)
+            except Exception as e:
+                verbose.warning("rule evaluation failed", rule=rule.name, error=e)
+                continue
+            matches = {}
+            _walk(value, rule.segments[:consumed], rule.segments[consumed:], matches)
+            values[rule.name] = matches
+        return self.evaluate(values, ts)
+
+    def evaluate(self, values, ts):
+        """Feed {rule name: {concrete path: value}} for one tick, return alert events."""
+        alerts = []
+        for rule in self.rules:
+            matches = values.get(rule.name)
+            if matches is None:
+                continue
+            seen = set()
+            for path, raw in matches.items():
+                key = (rule.name, path)
+                seen.add(key)
+                series = self.series.get(key)
+                if series is None:
+                    series = self.series[key] = _Series(rule)
+                value = _number(raw) if rule.numeric else raw
+                if value is None and rule.numeric:
+                    continue
+                if series.window is not None:
+                    value = series.window.add(ts, value)
+                    if value is None:
+                        continue
+                series.value = value
+                held = rule.compare(value, rule.literal)
+                alert = self._transition(rule, series, path, held, ts)
+                if alert:
+                    alerts.append(alert)
+            # a disk or interface that vanished cannot keep an alert open
+            for key in [k for k in self.series if k[0] == rule.name and k not in seen]:
+                series = self.series.pop(key)
+                if series.firing:
+                    alerts.append(self._alert(rule, key[1], series.value, "resolved", ts))
+        return alerts
+
+    def _transition(self, rule, series, path, held, ts):
+        if not held:
+            series.pending_since = None
+            if series.firing:
+                series.firing = False
+                return self._alert(rule, path, series.value, "resolved", ts)
+            return None
+        if series.pending_since is None:
+            series.pending_since = ts
+        if not series.firing and ts - series.pending_since >= rule.for_seconds:
+            series.firing = True
+            return self._alert(rule, path, series.value, "firing", ts)
+        return None
+
+    @staticmethod
+    def _alert(rule, path, value, state, ts):
+        return {
+            "ts": ts,
+            "rule": rule.name,
+            "state": state,
+            "severity": rule.severity,
+            "path": path,
+            "value": value,
+            "expr": rule.expr
+        }
+
+    def firing(self):
+        return sorted(key for key, series in self.series.items() if series.firing)
+
+def load_rules(path):
+    """Compile rules from a JSON file holding a list of {name, expr, for, severity}."""
+    with open(path) as f:
+        rules = [Rule.from_dict(entry) for entry in json.load(f)]
+    # series state is keyed by rule name, two rules sharing one would mix it up
+    names = set()
+    for rule in rules:
+        if rule.name in names:
+            raise ValueError(f"Duplicate rule name: {rule.name}")
+        names.add(rule.name)
+    return rules
+
+class AlertFile:
+    """Appends alerts as JSON lines to a file ("-" for stdout)."""
+
+    def __init__(self, path):
+        self.file = sys.stdout if path == "-" else open(path, "a")
+
+    def send(self, alert):
+        self.file.write(json.dumps(alert, default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+class AlertSocket:
+    """Sends every alert as one JSON datagram to a unix socket."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def send(self, alert):
+        try:
+            self.sock.sendto(json.dumps(alert, default=str).encode(), self.path)
+        except OSError as e:
+            # nobody listening right now, the alert is still in the return value
+            verbose.warning("could not deliver alert", path=self.path, error=e)
+
+    def close(self):
+        self.sock.close()
+
+def alert_sink(target):
+    """AlertSocket for "unix:/path", AlertFile otherwise."""
+    if target.startswith("unix:"):
+        return AlertSocket(target[len("unix:"):])
+    return AlertFile(target)
+
+def watch(engine, outputs, interval=10.0, count=None, governor=None):
+    """Evaluate the rules every interval seconds and send alerts to the outputs.
+
+    A governor stretches the interval and skips expensive collectors while
+    sysdox is over its CPU budget, as in record().
+    """
+    was_enabled = filecache.enabled()
+    filecache.enable()
+    was_sampling = registry.set_sampling(True)
+    had_netlink = netlink.get_cache() is not None
+    netlink.enable()
+    ticks = 0
+    try:
+        while count is None or ticks < count:
+            started = time.time()
+            for alert in engine.sample(started, governor=governor):
+                for output in outputs:
+                    output.send(alert)
+            ticks += 1
+            if count is not None and ticks >= count:
+                break
+            wait = governor.interval(interval) if governor is not None else interval
+            time.sleep(max(0.0, wait - (time.time() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for output in outputs:
+            output.close()
+        if not was_enabled:
+            filecache.disable()
+        registry.set_sampling(was_sampling)
+        if not had_netlink:
+            netlink.disable()
+    return ticks
@@ -0,0 +1,197 @@
+import os
+import json
+import mmap
+import time
+import struct
+import tempfile
+
+MAGIC = b"SYSDOXSH"
+VERSION = 1
+
+# magic, version, reserved, generation, index length, payload length, timestamp
+HEADER = struct.Struct("<8sIIQQQd")
+HEADER_SIZE = 64
+GENERATION_OFFSET = 16
+
+DEFAULT_SIZE = 16 * 1024 * 1024
+DEFAULT_PATH = "/dev/shm/sysdox" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "sysdox.shm")
+
+def _encode(value):
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+class ShmPublisher:
+    """Publishes the latest snapshot into an mmap'd file for local readers.
+
+    The generation counter works as a seqlock: it is odd while a snapshot is
+    being written and even once it is complete, so a reader that sees the same
+    even generation before and after reading knows it got consistent data.
+    Every section and every key of a dict section is encoded on its own and
+    listed in an index, so readers can decode just the part they need.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, size=DEFAULT_SIZE):
+        self.path = path
+        self.size = size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, _, generation, index_len, payload_len, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.generation = 0  # readers treat generation 0 as nothing published yet
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, 0, 0, 0, 0, 0.0)
+            return
+        # keep counting from a previous publisher so readers never see a generation go back
+        self.generation = generation + (generation & 1)
+        if generation & 1 or HEADER_SIZE + index_len + payload_len > size:
+            # torn by a crashed publisher or cut off by a smaller size: in progress until publish()
+            struct.pack_into("<Q", self.map, GENERATION_OFFSET, self.generation + 1)
+        # otherwise the previous snapshot stays readable until the first publish()
+
+    def publish(self, snapshot, ts=None):
+        index = {}
+        chunks = []
+        offset = 0
+        for section, data in snapshot.items():
+            if isinstance(data, dict):
+                keys = {}
+                for key, value in data.items():
+                    blob = _encode(value)
+                    keys[str(key)] = [offset, len(blob)]
+                    chunks.append(blob)
+                    offset += len(blob)
+                index[section] = keys
+            else:
+                blob = _encode(data)
+                index[section] = [offset, len(blob)]
+                chunks.append(blob)
+                offset += len(blob)
+        index_blob = _encode(index)
+        if HEADER_SIZE + len(index_blob) + offset > self.size:
+            raise ValueError(f"Snapshot does not fit in {self.size} bytes of shared memory")
+
+        generation = self.generation + 1  # odd, readers back off
+        struct.pack_into("<Q", self.map, GENERATION_OFFSET, generation)
+        start = HEADER_SIZE
+        self.map[start:start + len(index_blob)] = index_blob
+        start += len(index_blob)
+        payload = b"".join(chunks)
+        self.map[start:start + len(payload)] = payload
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, 0, generation,
+                         len(index_blob), len(payload), ts if ts is not None else time.time())
+        # the generation goes last, only then can readers trust the lengths above
+        self.generation = generation + 1  # even, snapshot is complete
+        struct.pack_into("<Q", self.map, GENERATION_OFFSET, self.generation)
+
+    def close(self):
+        self.map.close()
+
+class ShmReader:
+    """Reads fields of the published snapshot straight out of the mapping.
+
+    Only the requested section (or section key) is decoded; the index is parsed
+    once per generation.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, retries=100):
+        self.path = path
+        self.retries = retries
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = None
+        self._index_generation = None
+
+    def _header(self):
+        magic, version, _, generation, index_len, payload_len, ts = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a sysdox shared memory snapshot")
+        return generation, index_len, payload_len, ts
+
+    def _generation(self):
+        return struct.unpack_from("<Q", self.map, GENERATION_OFFSET)[0]
+
+    def _read(self, decode):
+        """Run decode(index, payload_view, ts) under the seqlock, retrying on torn reads."""
+        for _ in range(self.retries):
+            generation, index_len, payload_len, ts = self._header()
+            if generation & 1 or generation == 0:
+                time.sleep(0)  # writer busy, or nothing published yet
+                continue
+            try:
+                if self._index_generation != generation:
+                    index = json.loads(self.map[HEADER_SIZE:HEADER_SIZE + index_len])
+                else:
+                    index = self._index
+                start = HEADER_SIZE + index_len
+                with memoryview(self.map) as view:
+                    payload = view[start:start + payload_len]
+                    try:
+                        result = decode(index, payload, ts)
+                    finally:
+                        payload.release()
+            except (ValueError, KeyError, IndexError, TypeError):
+                # a genuine error if the data was stable, a torn read otherwise
+                if self._generation() == generation:
+                    raise
+                continue
+            if self._generation() == generation:
+                self._index, self._index_generation = index, generation
+                return result
+        raise TimeoutError("Could not get a consistent snapshot from shared memory")
+
+    @staticmethod
+    def _decode(payload, entry):
+        offset, length = entry
+        return json.loads(bytes(payload[offset:offset + length]))
+
+    @property
+    def generation(self):
+        return self._header()[0]
+
+    def get(self, path):
+        """Value at section or section.key (deeper segments are walked after decoding)."""
+        segments = path.split(".")
+
+        def decode(index, payload, ts):
+            entry = index[segments[0]]
+            if isinstance(entry, list):
+                value, rest = self._decode(payload, entry), segments[1:]
+            elif len(segments) > 1:
+                value, rest = self._decode(payload, entry[segments[1]]), segments[2:]
+            else:
+                value, rest = {key: self._decode(payload, e) for key, e in entry.items()}, []
+            for segment in rest:
+                value = value[int(segment)] if isinstance(value, list) else value[segment]
+            return value
+
+        return self._read(decode)
+
+    def snapshot(self):
+        """(timestamp, snapshot) of everything currently published."""
+        def decode(index, payload, ts):
+            snapshot = {}
+            for section, entry in index.items():
+                if isinstance(entry, list):
+                    snapshot[section] = self._decode(payload, entry)
+                else:
+                    snapshot[section] = {key: self._decode(payload, e) for key, e in entry.items()}
+            return ts, snapshot
+
+        return self._read(decode)
+
+    def close(self):
+        self.map.close()
+
+class ShmSink:
+    """record() sink that publishes every snapshot to shared memory."""
+
+    def __init__(self, path=DEFAULT_PATH, size=DEFAULT_SIZE):
+        self.publisher = ShmPublisher(path, size)
+
+    def write(self, ts, snapshot):
+        self.publisher.publish(snapshot, ts)
+
+    def close(self):
+        self.publisher.close()
@@ -3,18 +3,36 @@ import psutil
 import socket
 import subprocess
 import os
+import threading
+import time
+from . import topology, devices, memory, rootfs, verbose
+from .filecache import cached_by_files
 
 def get_cpu_info():
     """Get detailed CPU specs."""
     cpu_info = {}
     
-    if platform.system() in ["Linux", "Darwin"]:
+    if platform.system() == "Linux":
+        try:
+            topo = topology.summary()
+            cpu_info["model"] = topo["model_name"] or "Unknown"
+            cpu_info["sockets"] = topo["sockets"]
+            cpu_info["cores"] = topo["cores"] or psutil.cpu_count(logical=False)
+            cpu_info["threads"] = topo["threads"] or psutil.cpu_count(logical=True)
+            freq = psutil.cpu_freq()
+            cpu_info["max_freq"] = freq.max if freq else "Unknown"
+        except Exception as e:
+            verbose.warning("CPU info failed", error=e)
+            cpu_info["error"] = f"Error fetching CPU info: {str(e)}"
+
+    elif platform.system() == "Darwin":
         try:
             cpu_info["model"] = subprocess.check_output("lscpu | grep 'Model name'", shell=True).decode().strip().split(":")[-1].strip()
             cpu_info["cores"] = psutil.cpu_count(logical=False)
             cpu_info["threads"] = psutil.cpu_count(logical=True)
             cpu_info["max_freq"] = psutil.cpu_freq().max if psutil.cpu_freq() else "Unknown"
         except Exception as e:
+            verbose.warning("CPU info failed", error=e)
             cpu_info["error"] = f"Error fetching CPU info: {str(e)}"
     
     elif platform.system() == "Windows":
@@ -24,6 +42,7 @@ def get_cpu_info():
             cpu_info["threads"] = psutil.cpu_count(logical=True)
             cpu_info["max_freq"] = subprocess.check_output("wmic cpu get maxclockspeed", shell=True).decode().strip().splitlines()[1].strip()
         except Exception as e:
+            verbose.warning("CPU info failed", error=e)
             cpu_info["error"] = f"Error fetching CPU info: {str(e)}"
     
     return cpu_info
@@ -36,54 +55,153 @@ def get_ram_info():
         'available': f"{mem.available / (1024 ** 3):.2f} GB",
         'used': f"{mem.used / (1024 ** 3):.2f} GB",
         'percent': f"{mem.percent}%",
-        'type': "DDR"  # placeholder bc i dont know how to get this lmfao
+        'type': memory.memory_type() if platform.system() == "Linux" else "Unknown"
     }
 
-def get_storage_info():
-    """Get detailed storage info with SMART health check."""
+# Filesystems that never back real storage, skipped unless asked for
+PSEUDO_FSTYPES = {
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "ramfs", "securityfs", "cgroup",
+    "cgroup2", "cpuset", "pstore", "bpf", "debugfs", "tracefs", "configfs", "fusectl",
+    "mqueue", "hugetlbfs", "autofs", "binfmt_misc", "rpc_pipefs", "nsfs", "efivarfs",
+    "selinuxfs", "nfsd", "sockfs", "pipefs"
+}
+
+# Union filesystems, a container's root is one. Every overlay mount has the
+# same "overlay" device, so they collapse into one entry like bind mounts do.
+LAYERED_FSTYPES = {"overlay", "aufs"}
+
+# Network filesystems, these are the ones that hang statvfs when the server goes away
+NETWORK_FSTYPES = {
+    "nfs", "nfs4", "cifs", "smbfs", "smb3", "9p", "ceph", "glusterfs", "lustre",
+    "afs", "fuse.sshfs", "fuse.glusterfs", "fuse.cephfs", "fuse.s3fs", "fuse.rclone"
+}
+
+# Mountpoints whose statvfs is still stuck from an earlier call, so we never pile
+# up more threads behind the same dead server
+_hung_mounts = set()
+
+def _statvfs_with_timeout(mountpoints, timeout):
+    """Run disk_usage for every mountpoint in parallel worker threads.
+
+    Returns a dict mountpoint -> usage, with None for mounts that did not answer
+    within the timeout. Workers are daemon threads so a hung NFS/FUSE mount can
+    never keep the process alive.
+    """
+    results = {}
+    workers = []
+
+    def worker(mountpoint):
+        try:
+            results[mountpoint] = psutil.disk_usage(mountpoint)
+        except Exception as e:
+            results[mountpoint] = e
+        finally:
+            _hung_mounts.discard(mountpoint)
+
+    for mountpoint in mountpoints:
+        if mountpoint in _hung_mounts:
+            continue
+        _hung_mounts.add(mountpoint)
+        thread = threading.Thread(target=worker, args=(mountpoint,), daemon=True)
+        thread.start()
+        workers.append((mountpoint, thread))
+
+    deadline = time.monotonic() + timeout
+    for mountpoint, thread in workers:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    return {mountpoint: results.get(mountpoint) for mountpoint in mountpoints}
+
+def _smart_health(device, timeout=10):
+    """SMART health check for a block device."""
+    health = "Healthy"
+    try:
+        if platform.system() == "Linux":
+            smart_status = rootfs.check_output(f"smartctl -H {device}", shell=True, timeout=timeout).decode().strip()
+            if "PASSED" not in smart_status:
+                health = "Warning"
+        elif platform.system() == "Windows":
+            smart_status = subprocess.check_output(f"wmic diskdrive where deviceid='{device}' get status", shell=True,
+                                                   timeout=timeout).decode().strip()
+            if "OK" not in smart_status:
+                health = "Warning"
+    except subprocess.TimeoutExpired:
+        verbose.warning("command timed out", cmd=f"smartctl -H {device}", device=device, timeout=timeout)
+        health = "Timed out"
+    except Exception as e:
+        verbose.warning("SMART health check failed", device=device, error=e)
+        health = "Unable to check"
+    return health
+
+def get_storage_info(timeout=2.0, include_network=True, skip_fstypes=None):
+    """Get detailed storage info with SMART health check.
+
+    Every statvfs runs in a worker with a timeout, mounts that do not answer are
+    reported as stale instead of blocking the dump. Pseudo filesystems (and network
+    ones when include_network is False) are skipped, skip_fstypes overrides the
+    default PSEUDO_FSTYPES set. Bind mounts and overlay mounts that share a device
+    are reported once, with the extra mountpoints listed under "bind_mounts".
+    """
     storage_info = {}
-    partitions = psutil.disk_partitions()
-    
+    skip = PSEUDO_FSTYPES if skip_fstypes is None else set(skip_fstypes)
+    if not include_network:
+        skip = skip | NETWORK_FSTYPES
+
+    partitions = []
+    for part in psutil.disk_partitions(all=True):
+        if part.fstype in skip:
+            continue
+        if part.device in storage_info:
+            storage_info[part.device].setdefault("bind_mounts", []).append(part.mountpoint)
+            continue
+        storage_info[part.device] = {"mountpoint": part.mountpoint, "fstype": part.fstype}
+        partitions.append(part)
+
+    usages = _statvfs_with_timeout([part.mountpoint for part in partitions], timeout)
+
     for part in partitions:
-        device = part.device
-        usage = psutil.disk_usage(part.mountpoint)
-        health = "Healthy"
-        
-        # smart check for health
-        try:
-            if platform.system() == "Linux":
-                smart_status = subprocess.check_output(f"smartctl -H {device}", shell=True).decode().strip()
-                if "PASSED" not in smart_status:
-                    health = "Warning"
-            elif platform.system() == "Windows":
-                smart_status = subprocess.check_output(f"wmic diskdrive where deviceid='{device}' get status", shell=True).decode().strip()
-                if "OK" not in smart_status:
-                    health = "Warning"
-        except Exception:
-            health = "Unable to check"
-        
-        storage_info[device] = {
-            "mountpoint": part.mountpoint,
-            "fstype": part.fstype,
+        entry = storage_info[part.device]
+        usage = usages[part.mountpoint]
+        if usage is None:
+            entry["status"] = "stale"
+            entry["health"] = "Unable to check"
+            continue
+        if isinstance(usage, Exception):
+            entry["status"] = f"error: {usage}"
+            entry["health"] = "Unable to check"
+            continue
+        entry.update({
             "total": f"{usage.total / (1024 ** 3):.2f} GB",
             "used": f"{usage.used / (1024 ** 3):.2f} GB",
             "free": f"{usage.free / (1024 ** 3):.2f} GB",
             "percent": f"{usage.percent}%",
-            "health": health
-        }
-    
+            # network shares and overlays have no disk of their own to ask SMART about
+            "health": "Not applicable" if part.fstype in NETWORK_FSTYPES | LAYERED_FSTYPES
+            else _smart_health(part.device)
+        })
+
     return storage_info
 
+def _read_text(path):
+    with open(rootfs.path(path)) as f:
+        return f.read().strip()
+
+@cached_by_files(
+    "/sys/class/dmi/id/board_vendor",
+    "/sys/class/dmi/id/board_name",
+    "/sys/class/dmi/id/board_serial"
+)
 def get_motherboard_info():
     """Get motherboard details."""
     if platform.system() == "Linux":
         try:
             motherboard_info = {
-                "manufacturer": subprocess.check_output("cat /sys/class/dmi/id/board_vendor", shell=True).decode().strip(),
-                "model": subprocess.check_output("cat /sys/class/dmi/id/board_name", shell=True).decode().strip(),
-                "serial": subprocess.check_output("cat /sys/class/dmi/id/board_serial", shell=True).decode().strip(),
+                "manufacturer": _read_text("/sys/class/dmi/id/board_vendor"),
+                "model": _read_text("/sys/class/dmi/id/board_name"),
+                "serial": _read_text("/sys/class/dmi/id/board_serial"),
             }
-        except Exception:
+        except Exception as e:
+            verbose.warning("motherboard info failed", error=e)
             motherboard_info = {"error": "Unable to retrieve motherboard info on Linux"}
     elif platform.system() == "Windows":
         try:
@@ -92,7 +210,8 @@ def get_motherboard_info():
                 "model": subprocess.check_output("wmic baseboard get product", shell=True).decode().strip().splitlines()[1],
                 "serial": subprocess.check_output("wmic baseboard get serialnumber", shell=True).decode().strip().splitlines()[1],
             }
-        except Exception:
+        except Exception as e:
+            verbose.warning("motherboard info failed", error=e)
             motherboard_info = {"error": "Unable to retrieve motherboard info on Windows"}
     else:
         motherboard_info = {"error": "Motherboard info is not available on this OS."}
@@ -102,14 +221,12 @@ def get_motherboard_info():
 def get_gpu_info():
     """Get GPU details."""
     if platform.system() == "Linux":
-        try:
-            gpu_info = subprocess.check_output("lspci | grep VGA", shell=True).decode().strip()
-        except subprocess.CalledProcessError:
-            gpu_info = "No GPU information found"
+        gpu_info = devices.gpus() or "No GPU information found"
     elif platform.system() == "Windows":
         try:
             gpu_info = subprocess.check_output("wmic path win32_videocontroller get caption", shell=True).decode().strip().splitlines()[1]
-        except Exception:
+        except Exception as e:
+            verbose.warning("GPU info failed", error=e)
             gpu_info = "No GPU information found"
     else:
         gpu_info = "GPU information is not available"
@@ -121,14 +238,16 @@ def get_sound_info():
     """Get sound card info."""
     sound_info = {}
     if platform.system() == "Linux":
-        try:
-            sound_info["devices"] = subprocess.check_output("aplay -l", shell=True).decode().strip()
-        except subprocess.CalledProcessError:
+        cards = devices.sound_cards()
+        if cards:
+            sound_info["devices"] = cards
+        else:
             sound_info["error"] = "No sound card detected"
     elif platform.system() == "Windows":
         try:
             sound_info["devices"] = subprocess.check_output("wmic sounddev get caption", shell=True).decode().strip().splitlines()[1:]
-        except Exception:
+        except Exception as e:
+            verbose.warning("sound info failed", error=e)
             sound_info["error"] = "No sound card detected"
     
     return sound_info
@@ -166,7 +285,8 @@ def get_temperature_info():
             temp = psutil.sensors_temperatures()
             if temp:
                 temperature_info = {sensor: values[0].current for sensor, values in temp.items()}
-        except Exception:
+        except Exception as e:
+            verbose.warning("temperature sensors failed", error=e)
             temperature_info["error"] = "Unable to fetch temperature data"
     if not temperature_info:
         temperature_info = {"error": "No temperature information available"}
@@ -180,7 +300,8 @@ def get_fan_info():
             fan = psutil.sensors_fans()
             if fan:
                 fan_info = {sensor: values[0] for sensor, values in fan.items()}
-        except Exception:
+        except Exception as e:
+            verbose.warning("fan sensors failed", error=e)
             fan_info["error"] = "Unable to fetch fan data"
     if not fan_info:
         fan_info = {"error": "No fan information available"}
@@ -200,3 +321,17 @@ def dump():
         "temperature_info": get_temperature_info(),
         "fan_info": get_fan_info()
     }
+
+def fields():
+    """Field name -> function map used by path queries."""
+    return {
+        "cpu_info": get_cpu_info,
+        "ram_info": get_ram_info,
+        "storage_info": get_storage_info,
+        "motherboard_info": get_motherboard_info,
+        "gpu_info": get_gpu_info,
+        "sound_info": get_sound_info,
+        "battery_info": get_battery_info,
+        "temperature_info": get_temperature_info,
+        "fan_info": get_fan_info
+    }
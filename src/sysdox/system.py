@@ -3,11 +3,14 @@ import psutil
 import socket
 import time
 import shutil
+from . import topology, cgroup, pressure, rootfs, verbose
+from .filecache import cached_by_files
 
+@cached_by_files('/etc/os-release')
 def os():
     if platform.system() == "Linux":
         try:
-            with open('/etc/os-release') as f:
+            with open(rootfs.path('/etc/os-release')) as f:
                 lines = f.readlines()
             for line in lines:
                 if line.startswith('PRETTY_NAME'):
@@ -15,7 +18,8 @@ def os():
                     break
             else:
                 os_name = 'Unknown Linux Distribution'
-        except Exception:
+        except Exception as e:
+            verbose.debug("could not read os-release", error=e)
             os_name = 'Unknown Linux Distribution'
     elif platform.system() == "Windows":
         os_name = platform.win32_ver()[0]
@@ -61,21 +65,41 @@ def package_manager():
         return "Unknown Package Manager"
 
 def cpu():
-    return {
+    freq = psutil.cpu_freq()
+    info = {
         'processor': platform.processor(),
         'physical_cores': psutil.cpu_count(logical=False),
         'logical_cores': psutil.cpu_count(logical=True),
-        'cpu_freq': psutil.cpu_freq()._asdict() if psutil.cpu_freq() else {}
+        'cpu_freq': freq._asdict() if freq else {}
     }
+    if platform.system() == "Linux":
+        topo = topology.summary()
+        if topo["threads"]:
+            info['physical_cores'] = topo["cores"] or info['physical_cores']
+            info['logical_cores'] = topo["threads"]
+            info['sockets'] = topo["sockets"]
+            info['numa_nodes'] = len(topo["numa_nodes"])
+            info['caches'] = topo["caches"]
+        limits = cgroup.effective_limits()
+        # psutil.cpu_count() is None when the count cannot be determined
+        if info['logical_cores'] is not None and limits["cpus"] < info['logical_cores']:
+            info['effective_cpus'] = limits["cpus"]
+    return info
 
 def ram():
     mem = psutil.virtual_memory()
-    return {
+    info = {
         'total_ram': f"{mem.total / (1024**3):.2f} GB",
         'available_ram': f"{mem.available / (1024**3):.2f} GB",
         'used_ram': f"{mem.used / (1024**3):.2f} GB",
         'ram_percent': f"{mem.percent} %"
     }
+    if platform.system() == "Linux":
+        # inside a container the cgroup limit is what the workload can actually use
+        limit = cgroup.effective_limits()["memory"]
+        if limit < mem.total:
+            info['effective_ram'] = f"{limit / (1024**3):.2f} GB"
+    return info
 
 def uptime():
     uptime_seconds = time.time() - psutil.boot_time()
@@ -85,10 +109,24 @@ def uptime():
     }
 
 def dump():
-    return {
+    info = {
         'os_info': os(),
         'package_manager': package_manager(),
         'cpu_info': cpu(),
         'ram_info': ram(),
         'uptime': uptime()
-    }
\ No newline at end of file
+    }
+    if platform.system() == "Linux":
+        info['pressure'] = pressure.dump()
+    return info
+
+def fields():
+    """Field name -> function map used by path queries."""
+    return {
+        'os_info': os,
+        'package_manager': package_manager,
+        'cpu_info': cpu,
+        'ram_info': ram,
+        'uptime': uptime,
+        'pressure': pressure.dump
+    }
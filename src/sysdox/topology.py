@@ -0,0 +1,189 @@
+import os
+import re
+import functools
+from . import rootfs, verbose
+
+CPU_SYSFS = "/sys/devices/system/cpu"
+CPUINFO = "/proc/cpuinfo"
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except Exception as e:
+        verbose.debug("could not read file", path=path, error=e)
+        return None
+
+def parse_cpu_list(text):
+    """Expand a kernel cpu list such as "0-3,8,10-11" into a list of ints."""
+    cpus = []
+    for chunk in (text or "").split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if "-" in chunk:
+            start, end = chunk.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(chunk))
+    return cpus
+
+def iter_cpuinfo(path=None):
+    """Stream /proc/cpuinfo one processor block at a time.
+
+    Each block is yielded as a dict as soon as it is complete, so callers that
+    only need the first processor (or a single field) can stop reading early.
+    """
+    block = {}
+    with open(path or rootfs.path(CPUINFO)) as f:
+        for line in f:
+            key, sep, value = line.partition(":")
+            if not sep:
+                if block:
+                    yield block
+                    block = {}
+                continue
+            block[key.strip()] = value.strip()
+    if block:
+        yield block
+
+def cpuinfo_field(name, path=None, default=None):
+    """First value of a /proc/cpuinfo field, reading no further than needed."""
+    try:
+        for block in iter_cpuinfo(path):
+            if name in block:
+                return block[name]
+    except Exception as e:
+        verbose.debug("could not read cpuinfo", field=name, error=e)
+    return default
+
+def _cpu_ids(sysfs):
+    ids = []
+    for entry in os.listdir(sysfs):
+        match = re.match(r"cpu(\d+)$", entry)
+        if match:
+            ids.append(int(match.group(1)))
+    return sorted(ids)
+
+def _read_caches(cpu_dir):
+    caches = []
+    cache_dir = os.path.join(cpu_dir, "cache")
+    if not os.path.isdir(cache_dir):
+        return caches
+    for index in sorted(os.listdir(cache_dir)):
+        if not index.startswith("index"):
+            continue
+        base = os.path.join(cache_dir, index)
+        caches.append({
+            "level": _read(os.path.join(base, "level")),
+            "type": _read(os.path.join(base, "type")),
+            "size": _read(os.path.join(base, "size")),
+            "shared_cpu_list": _read(os.path.join(base, "shared_cpu_list"))
+        })
+    return caches
+
+def _numa_node(cpu_dir):
+    for entry in os.listdir(cpu_dir):
+        match = re.match(r"node(\d+)$", entry)
+        if match:
+            return int(match.group(1))
+    return None
+
+def _cache_name(cache):
+    kind = {"Data": "d", "Instruction": "i"}.get(cache["type"], "")
+    return f"L{cache['level']}{kind}"
+
+def read_topology(sysfs=None, cpuinfo=None):
+    """Build the cpu topology model from sysfs and a single streamed cpuinfo pass."""
+    sysfs = sysfs or rootfs.path(CPU_SYSFS)
+    cpus = {}
+    for cpu in _cpu_ids(sysfs):
+        cpu_dir = os.path.join(sysfs, f"cpu{cpu}")
+        topo = os.path.join(cpu_dir, "topology")
+        package = _read(os.path.join(topo, "physical_package_id"))
+        core = _read(os.path.join(topo, "core_id"))
+        cpus[cpu] = {
+            "socket": int(package) if package is not None else None,
+            "core": int(core) if core is not None else None,
+            "siblings": parse_cpu_list(_read(os.path.join(topo, "thread_siblings_list"))),
+            "numa_node": _numa_node(cpu_dir),
+            "caches": _read_caches(cpu_dir),
+            "microcode": _read(os.path.join(cpu_dir, "microcode", "version"))
+        }
+
+    model_name = None
+    # cpuinfo is only walked in full when sysfs does not expose per-cpu microcode
+    need_microcode = any(info["microcode"] is None for info in cpus.values())
+    try:
+        for block in iter_cpuinfo(cpuinfo):
+            if model_name is None:
+                model_name = block.get("model name") or block.get("Processor") or block.get("cpu model")
+            if not need_microcode:
+                break
+            try:
+                cpu = int(block.get("processor", ""))
+            except ValueError:
+                continue
+            entry = cpus.setdefault(cpu, {
+                "socket": None, "core": None, "siblings": [], "numa_node": None,
+                "caches": [], "microcode": None
+            })
+            if entry["microcode"] is None:
+                entry["microcode"] = block.get("microcode")
+    except Exception as e:
+        verbose.warning("could not read cpuinfo", error=e)
+
+    return {"model_name": model_name, "cpus": cpus}
+
+@functools.lru_cache(maxsize=None)
+def get_topology(sysfs=None, cpuinfo=None):
+    """Cached topology model shared by system, specs and firmware."""
+    try:
+        return read_topology(sysfs, cpuinfo)
+    except Exception as e:
+        verbose.warning("CPU topology failed", error=e)
+        return {"model_name": None, "cpus": {}}
+
+def model_name():
+    return get_topology()["model_name"]
+
+def microcode_versions():
+    """Microcode revision of every cpu, keyed by cpu number."""
+    return {
+        cpu: info["microcode"]
+        for cpu, info in get_topology()["cpus"].items()
+        if info["microcode"]
+    }
+
+def summary(topo=None):
+    """Socket, core, thread, cache and NUMA counts derived from the model."""
+    topo = topo or get_topology()
+    cpus = topo["cpus"]
+    sockets = {info["socket"] for info in cpus.values() if info["socket"] is not None}
+    cores = {(info["socket"], info["core"]) for info in cpus.values() if info["core"] is not None}
+    nodes = {}
+    for cpu, info in cpus.items():
+        if info["numa_node"] is not None:
+            nodes.setdefault(info["numa_node"], []).append(cpu)
+
+    caches = {}
+    seen = set()
+    for info in cpus.values():
+        for cache in info["caches"]:
+            key = (cache["level"], cache["type"], cache["shared_cpu_list"])
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = caches.setdefault(_cache_name(cache), {"size": cache["size"], "instances": 0})
+            entry["instances"] += 1
+
+    threads = len(cpus)
+    return {
+        "model_name": topo["model_name"],
+        "sockets": len(sockets) or None,
+        "cores": len(cores) or None,
+        "threads": threads or None,
+        "smt": bool(cores) and threads > len(cores),
+        "numa_nodes": {node: ids for node, ids in sorted(nodes.items())},
+        "caches": caches
+    }
@@ -1,6 +1,122 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+NAMES = {value: name for name, value in LEVELS.items()}
+
+ENV_LEVEL = "SYSDOX_LOG"
+ENV_FILE = "SYSDOX_LOG_FILE"
+
+# collectors slower than this are logged at warning level
+SLOW_SECONDS = 5.0
+
+# the threshold is a plain int so a disabled call costs one comparison
+_threshold = OFF
+_output = None
+_lock = threading.Lock()
+_context = threading.local()
+
+def parse_level(level):
+    """Threshold for a name from LEVELS or a number, as an int or a string ("10")."""
+    if isinstance(level, int):
+        return level
+    text = str(level).strip().lower()
+    if text in LEVELS:
+        return LEVELS[text]
+    if text.isdigit():
+        return int(text)
+    raise ValueError(f"Unknown log level {level!r}, expected one of {', '.join(LEVELS)} or a number")
+
+def configure(level="warning", path=None):
+    """Log records at level and above as JSON lines to path (stderr when None).
+
+    level is anything parse_level() takes, "off" disables logging.
+    """
+    global _threshold, _output
+    threshold = parse_level(level)
+    with _lock:
+        if _output is not None and _output is not sys.stderr:
+            _output.close()
+        _output = open(path, "a", buffering=1) if path else sys.stderr
+        _threshold = threshold
+
+def enabled(level):
+    """True when a record at level would be written, for guarding costly fields."""
+    return level >= _threshold
+
+@contextmanager
+def collecting(name):
+    """Tag every record logged in this thread with the collector being run."""
+    previous = getattr(_context, "collector", None)
+    _context.collector = name
+    try:
+        yield
+    finally:
+        _context.collector = previous
+
+def _error(e):
+    return {"type": type(e).__name__, "message": str(e)}
+
+def log(level, msg, *args, **fields):
+    """Write one record; msg is only %-formatted with args when it is written.
+
+    An "error" field holding an exception is broken down into type and message,
+    "duration" is in seconds.
+    """
+    if level < _threshold:
+        return
+    record = {
+        "ts": round(time.time(), 6),
+        "level": NAMES.get(level, str(level)),
+        "msg": msg % args if args else msg
+    }
+    collector = getattr(_context, "collector", None)
+    if collector is not None:
+        record["collector"] = collector
+    for key, value in fields.items():
+        if key == "error" and isinstance(value, BaseException):
+            value = _error(value)
+        elif key == "duration":
+            value = round(value, 6)
+        record[key] = value
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        try:
+            _output.write(line)
+        except (OSError, ValueError):
+            pass  # logging must never take a collector down
+
+def debug(msg, *args, **fields):
+    if DEBUG >= _threshold:
+        log(DEBUG, msg, *args, **fields)
+
+def info(msg, *args, **fields):
+    if INFO >= _threshold:
+        log(INFO, msg, *args, **fields)
+
+def warning(msg, *args, **fields):
+    if WARNING >= _threshold:
+        log(WARNING, msg, *args, **fields)
+
+def error(msg, *args, **fields):
+    if ERROR >= _threshold:
+        log(ERROR, msg, *args, **fields)
+
+_SENDLOG_LEVELS = {0: INFO, 1: INFO, 2: WARNING, 3: ERROR}
+
 def sendLog(message: str, level: int = 0) -> str:
     """
-    Send a log message for no reason
+    Format a message the old way and send it through log(), returns the text
     """
     if level == 0:
         log_message = message
@@ -12,6 +128,26 @@ def sendLog(message: str, level: int = 0) -> str:
         log_message = f"ERROR: {message}"
     else:
         log_message = f"UNKNOWN LEVEL ({level}): {message}"
-    
-    print(log_message)
-    return log_message
\ No newline at end of file
+
+    log(_SENDLOG_LEVELS.get(level, WARNING), message)
+    return log_message
+
+def _configure_from_env():
+    """Apply $SYSDOX_LOG and $SYSDOX_LOG_FILE; a bad value is logged, never raised."""
+    value = os.environ.get(ENV_LEVEL)
+    if not value:
+        return
+    path = os.environ.get(ENV_FILE)
+    try:
+        level = parse_level(value)
+    except ValueError:
+        level = None
+    try:
+        configure(WARNING if level is None else level, path)
+    except OSError as e:
+        configure(WARNING if level is None else level)
+        warning("cannot open log file, logging to stderr", path=path, error=e)
+    if level is None:
+        warning("ignoring unknown log level, using warning", variable=ENV_LEVEL, value=value)
+
+_configure_from_env()
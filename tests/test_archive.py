@@ -0,0 +1,86 @@
+import os
+import pytest
+from sysdox.archive import Archive, ArchiveSink, TIME_RECORD, OBJECT_RECORD
+from sysdox.record import record
+
+
+def snapshot(uptime):
+    return {
+        "firmware": {"bios_version": "1.0.0", "uefi": True},
+        "system": {"uptime": {"uptime_seconds": uptime}, "os_info": {"os": "Linux"}},
+        "specs": {"motherboard_info": {"model": "TestBoard"}, "gpu_info": "No GPU information found"},
+    }
+
+
+def test_append_and_lookup(tmp_path):
+    archive = Archive(str(tmp_path))
+    for i in range(10):
+        archive.append(snapshot(i), ts=1000.0 + i * 60)
+
+    assert len(archive) == 10
+    assert archive.at(999.0) is None
+    ts, state = archive.at(1000.0 + 3 * 60 + 30)
+    assert ts == 1180.0
+    assert state["system"]["uptime"]["uptime_seconds"] == 3
+    assert state["specs"]["motherboard_info"] == {"model": "TestBoard"}
+
+    found = [ts for ts, _ in archive.range(1060.0, 1180.0)]
+    assert found == [1060.0, 1120.0, 1180.0]
+
+    with pytest.raises(ValueError):
+        archive.append(snapshot(0), ts=10.0)
+    archive.close()
+
+
+def test_unchanged_sections_stored_once(tmp_path):
+    archive = Archive(str(tmp_path))
+    archive.append(snapshot(0), ts=1.0)
+    first = archive.stats()["objects"]
+    archive.append(snapshot(1), ts=2.0)
+    # only the new uptime value and the new manifest are added
+    assert archive.stats()["objects"] == first + 2
+    archive.close()
+
+
+def test_reopen_and_torn_index(tmp_path):
+    archive = Archive(str(tmp_path))
+    archive.append(snapshot(5), ts=1.0)
+    archive.close()
+
+    with open(tmp_path / "time.idx", "ab") as f:
+        f.write(b"\0" * (TIME_RECORD.size - 3))  # half written record
+
+    archive = Archive(str(tmp_path))
+    assert len(archive) == 1
+    assert archive.at(2.0)[1]["system"]["uptime"]["uptime_seconds"] == 5
+    archive.append(snapshot(6), ts=2.0)
+    assert archive.at(2.0)[1]["system"]["uptime"]["uptime_seconds"] == 6
+    archive.close()
+
+
+def test_torn_object_index(tmp_path):
+    archive = Archive(str(tmp_path))
+    archive.append(snapshot(5), ts=1.0)
+    archive.close()
+
+    with open(tmp_path / "objects.idx", "ab") as f:
+        f.write(b"\0" * (OBJECT_RECORD.size - 5))
+
+    archive = Archive(str(tmp_path))
+    archive.append(snapshot(6), ts=2.0)
+    archive.close()
+
+    # records written after the torn one must still be readable on the next open
+    assert os.path.getsize(tmp_path / "objects.idx") % OBJECT_RECORD.size == 0
+    archive = Archive(str(tmp_path))
+    assert archive.at(1.0)[1]["system"]["uptime"]["uptime_seconds"] == 5
+    assert archive.at(2.0)[1]["system"]["uptime"]["uptime_seconds"] == 6
+    archive.close()
+
+
+def test_record_into_archive(tmp_path):
+    taken = record([ArchiveSink(str(tmp_path))], interval=0, count=3, selection=["topology"])
+    assert taken == 3
+    archive = Archive(str(tmp_path))
+    assert len(archive) == 3
+    archive.close()
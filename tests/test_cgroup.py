@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import patch
+from sysdox.cgroup import current_cgroup, read_cgroup, walk, effective_limits, summary
+
+
+def make_cgroup(directory, **files):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in files.items():
+        (directory / name.replace("_", ".", 1)).write_text(content)
+    return directory
+
+
+@pytest.fixture
+def cgroupfs(tmp_path):
+    root = make_cgroup(tmp_path, cgroup_controllers="cpu memory io pids\n",
+                       **{"cpuset.cpus.effective": "0-7\n"})
+    make_cgroup(tmp_path / "system.slice", cpu_max="max 100000\n", memory_max="max\n")
+    make_cgroup(tmp_path / "kubepods", cpu_max="400000 100000\n", memory_max="8589934592\n")
+    make_cgroup(
+        tmp_path / "kubepods" / "pod1",
+        cpu_max="150000 100000\n",
+        memory_max="4294967296\n",
+        memory_current="1073741824\n",
+        cpu_stat="usage_usec 5000\nnr_periods 200\nnr_throttled 50\nthrottled_usec 12000\n",
+        io_stat="8:0 rbytes=4096 wbytes=8192 rios=1 wios=2 dbytes=0 dios=0\n",
+        pids_current="12\n",
+    )
+    return root
+
+
+def test_current_cgroup(tmp_path):
+    proc = tmp_path / "cgroup"
+    proc.write_text("12:memory:/legacy\n0::/kubepods/pod1\n")
+    assert current_cgroup(str(proc)) == "/kubepods/pod1"
+    assert current_cgroup(str(tmp_path / "missing")) is None
+
+
+def test_read_cgroup(cgroupfs):
+    data = read_cgroup(str(cgroupfs / "kubepods" / "pod1"))
+    assert data["cpu.max"] == {"quota": 150000, "period": 100000}
+    assert data["cpu.stat"]["nr_throttled"] == 50
+    assert data["io.stat"]["8:0"]["wbytes"] == 8192
+    assert data["pids.current"] == 12
+    assert "memory.stat" not in data
+    assert read_cgroup(str(cgroupfs / "system.slice"))["memory.max"] is None
+
+
+def test_walk(cgroupfs):
+    groups = walk(str(cgroupfs))
+    assert set(groups) == {"/", "/system.slice", "/kubepods", "/kubepods/pod1"}
+    assert groups["/kubepods"]["cpu.max"]["quota"] == 400000
+
+
+@patch("sysdox.cgroup.psutil.cpu_count", return_value=16)
+@patch("sysdox.cgroup.psutil.virtual_memory")
+def test_effective_limits(mock_memory, mock_count, cgroupfs):
+    mock_memory.return_value.total = 32 * 1024 ** 3
+    limits = effective_limits("/kubepods/pod1", str(cgroupfs))
+    assert limits == {"cpus": 1.5, "memory": 4294967296}
+    # no quota of its own: the cpuset on the root is the tightest limit
+    assert effective_limits("/system.slice", str(cgroupfs)) == {"cpus": 8.0, "memory": 32 * 1024 ** 3}
+
+
+def test_summary(cgroupfs):
+    result = summary(read_cgroup(str(cgroupfs / "kubepods" / "pod1")))
+    assert result["throttled_percent"] == 25.0
+    assert result["memory_percent"] == 25.0
+    assert result["pids_current"] == 12
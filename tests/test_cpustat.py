@@ -0,0 +1,101 @@
+import pytest
+from sysdox.cpustat import read_proc_stat, compute_percentages, percentile, CpuSampler, dump
+
+STAT_BEFORE = """cpu  200 0 100 700 0 0 0 0 0 0
+cpu0 100 0 50 350 0 0 0 0 0 0
+cpu1 100 0 50 350 0 0 0 0 0 0
+intr 12345 0 0
+ctxt 999
+"""
+
+STAT_AFTER = """cpu  300 0 120 760 10 0 0 10 0 0
+cpu0 190 0 60 350 0 0 0 0 0 0
+cpu1 110 0 60 410 10 0 0 10 0 0
+intr 12346 0 0
+ctxt 1000
+"""
+
+
+def test_read_proc_stat(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text(STAT_BEFORE)
+    cores, columns = read_proc_stat(str(stat))
+    assert cores == ["cpu", "cpu0", "cpu1"]
+    assert columns["user"] == [200, 100, 100]
+    assert columns["idle"] == [700, 350, 350]
+    assert columns["steal"] == [0, 0, 0]
+
+
+def test_compute_percentages(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text(STAT_BEFORE)
+    _, before = read_proc_stat(str(stat))
+    stat.write_text(STAT_AFTER)
+    _, after = read_proc_stat(str(stat))
+
+    percents = compute_percentages(before, after)
+    # cpu0 only accumulated user/system time, cpu1 was mostly idle
+    assert percents["busy"][1] == 100.0
+    assert percents["busy"][2] == 30.0
+    assert percents["steal"][2] == 10.0
+    assert percents["iowait"][2] == 10.0
+
+
+def test_unchanged_core_is_idle(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text(STAT_BEFORE)
+    _, before = read_proc_stat(str(stat))
+    percents = compute_percentages(before, before)
+    assert percents["busy"] == [0.0, 0.0, 0.0]
+    assert percents["user"] == [0.0, 0.0, 0.0]
+
+
+def test_percentile():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) is None
+
+
+def test_sampler_hot_cores(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text(STAT_BEFORE)
+    sampler = CpuSampler(window=10, path=str(stat))
+    assert sampler.sample() is None  # nothing to diff on the first tick
+
+    stat.write_text(STAT_AFTER)
+    latest = sampler.sample()
+    assert latest["cpu0"]["busy"] == 100.0
+
+    hot = sampler.hot_cores(threshold=90.0)
+    assert hot["saturated"] == ["cpu0"]
+    assert list(hot["top"]) == ["cpu0", "cpu1"]
+    assert hot["max_steal"] == {"cpu1": 10.0}
+
+    pct = sampler.percentiles("busy", q=(50,))
+    assert pct["cpu0"] == {"p50": 100.0}
+
+
+def test_dump_runs():
+    data = dump(interval=0.01)
+    assert isinstance(data, dict)
+
+
+def test_dump_while_sampling(tmp_path, monkeypatch):
+    from sysdox import cpustat, registry
+    stat = tmp_path / "stat"
+    stat.write_text(STAT_BEFORE)
+    monkeypatch.setattr(cpustat, "_sampler", CpuSampler(window=1, path=str(stat)))
+    sleeps = []
+    monkeypatch.setattr(cpustat.time, "sleep", sleeps.append)
+    was_sampling = registry.set_sampling(True)
+    try:
+        dump(interval=0.25)
+        stat.write_text(STAT_AFTER)
+        data = dump(interval=0.25)
+    finally:
+        registry.set_sampling(was_sampling)
+    # the second tick diffs against the first instead of sleeping again
+    assert sleeps == [0.25]
+    assert data["per_core"]["cpu0"]["busy"] == 100.0
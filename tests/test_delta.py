@@ -0,0 +1,76 @@
+import json
+from sysdox.delta import diff, apply, DeltaEncoder, DeltaDecoder, decode_stream, StreamSink
+
+OLD = {
+    "system": {"uptime": {"uptime_seconds": 42}, "users": ["root"]},
+    "network": {"interface_stats": {"eth0": {"bytes_recv": 100}, "a/b~c": {"bytes_recv": 1}}},
+}
+NEW = {
+    "system": {"uptime": {"uptime_seconds": 43}, "users": ["root", "bob"]},
+    "network": {"interface_stats": {"a/b~c": {"bytes_recv": 2}, "lo": {"bytes_recv": 5}}},
+}
+
+
+def test_diff_only_changed_paths():
+    ops = diff(OLD, NEW)
+    assert {"op": "replace", "path": "/system/uptime/uptime_seconds", "value": 43} in ops
+    assert {"op": "replace", "path": "/system/users", "value": ["root", "bob"]} in ops
+    assert {"op": "remove", "path": "/network/interface_stats/eth0"} in ops
+    assert {"op": "replace", "path": "/network/interface_stats/a~1b~0c/bytes_recv", "value": 2} in ops
+    assert {"op": "add", "path": "/network/interface_stats/lo", "value": {"bytes_recv": 5}} in ops
+    assert diff(NEW, NEW) == []
+
+
+def test_apply_roundtrip():
+    assert apply(json.loads(json.dumps(OLD)), diff(OLD, NEW)) == NEW
+    assert apply({"a": 1}, [{"op": "replace", "path": "", "value": [1]}]) == [1]
+
+
+def test_encoder_keyframes_and_decoder():
+    snapshots = [{"n": i, "static": "x", "tuple": (1, 2)} for i in range(5)]
+    encoder = DeltaEncoder(keyframe_every=3)
+    records = [encoder.encode(float(i), s) for i, s in enumerate(snapshots)]
+    assert [r["type"] for r in records] == ["keyframe", "delta", "delta", "keyframe", "delta"]
+    assert records[1]["ops"] == [{"op": "replace", "path": "/n", "value": 1}]
+    decoder = DeltaDecoder()
+    rebuilt = [json.loads(json.dumps(decoder.feed(r))) for r in records]
+    assert rebuilt == [[float(i), {"n": i, "static": "x", "tuple": [1, 2]}] for i in range(5)]
+
+
+def test_decoder_waits_for_keyframe_after_gap():
+    encoder = DeltaEncoder(keyframe_every=3)
+    records = [encoder.encode(i, {"n": i}) for i in range(5)]
+    decoder = DeltaDecoder()
+    assert decoder.feed(records[1]) is None  # joined mid stream
+    assert decoder.feed(records[0])[1] == {"n": 0}
+    assert decoder.feed(records[2]) is None  # records[1] was lost
+    assert decoder.feed(records[4]) is None
+    assert decoder.feed(records[3])[1] == {"n": 3}
+
+
+def test_stream_sink(tmp_path):
+    path = str(tmp_path / "stream.jsonl")
+    sink = StreamSink(path, delta=True, keyframe_every=10)
+    for i in range(3):
+        sink.write(100.0 + i, {"cpu": {"busy": i}, "host": "a" * 200})
+    sink.close()
+    with open(path) as f:
+        lines = f.readlines()
+    assert len(lines[2]) < len(lines[0])
+    with open(path) as f:
+        assert [(ts, s["cpu"]["busy"]) for ts, s in decode_stream(f)] == [(100.0, 0), (101.0, 1), (102.0, 2)]
+
+
+def test_plain_stream_round_trip(tmp_path):
+    path = str(tmp_path / "stream.jsonl")
+    sink = StreamSink(path)
+    for i in range(3):
+        sink.write(100.0 + i, {"cpu": {"busy": i}})
+    sink.close()
+    with open(path) as f:
+        assert [json.loads(line)["seq"] for line in f] == [0, 1, 2]
+    with open(path) as f:
+        assert [(ts, s["cpu"]["busy"]) for ts, s in decode_stream(f)] == [(100.0, 0), (101.0, 1), (102.0, 2)]
+    # records from before keyframes carried a seq
+    old = [json.dumps({"type": "keyframe", "ts": 1.0, "snapshot": {"a": 1}})]
+    assert list(decode_stream(old)) == [(1.0, {"a": 1})]
@@ -0,0 +1,75 @@
+import os
+import pytest
+from sysdox.devices import pci_devices, usb_devices, sound_cards, gpus
+
+
+class FakeIds:
+    def vendor(self, vendor_id):
+        return {0x10de: "NVIDIA Corporation", 0x8086: "Intel Corporation"}.get(vendor_id)
+
+    def device(self, vendor_id, device_id):
+        return "AD102 [GeForce RTX 4090]" if (vendor_id, device_id) == (0x10de, 0x2684) else None
+
+    def device_class(self, class_id, subclass_id=None):
+        return {0x03: "VGA compatible controller", 0x06: "Host bridge", 0x09: "Hub"}.get(class_id)
+
+
+def make_device(directory, driver=None, **files):
+    directory.mkdir(parents=True)
+    for name, content in files.items():
+        (directory / name).write_text(content + "\n")
+    if driver:
+        target = directory.parent.parent / "drivers" / driver
+        target.mkdir(parents=True, exist_ok=True)
+        os.symlink(str(target), str(directory / "driver"))
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    pci = tmp_path / "pci"
+    make_device(pci / "0000:01:00.0", driver="nvidia", vendor="0x10de", device="0x2684", numa_node="0",
+                **{"class": "0x030000", "current_link_speed": "16.0 GT/s PCIe", "current_link_width": "16"})
+    make_device(pci / "0000:00:00.0", vendor="0x8086", device="0x1237", numa_node="-1",
+                **{"class": "0x060000"})
+    return pci
+
+
+def test_pci_devices(sysfs):
+    devices = pci_devices(str(sysfs), FakeIds())
+    assert [d["slot"] for d in devices] == ["0000:00:00.0", "0000:01:00.0"]
+    gpu = devices[1]
+    assert gpu["vendor"] == "NVIDIA Corporation"
+    assert gpu["device"] == "AD102 [GeForce RTX 4090]"
+    assert gpu["driver"] == "nvidia"
+    assert gpu["numa_node"] == 0
+    assert gpu["link_width"] == "16"
+    assert devices[0]["numa_node"] is None
+    assert devices[0]["driver"] is None
+
+
+def test_gpus(sysfs):
+    assert [d["slot"] for d in gpus(str(sysfs), FakeIds())] == ["0000:01:00.0"]
+
+
+def test_usb_devices_skip_interfaces(tmp_path):
+    make_device(tmp_path / "usb1", idVendor="1d6b", idProduct="0002", bDeviceClass="09",
+                busnum="1", devnum="1", speed="480", product="EHCI Host Controller")
+    make_device(tmp_path / "1-1:1.0", bInterfaceClass="09")
+    devices = usb_devices(str(tmp_path), FakeIds())
+    assert len(devices) == 1
+    assert devices[0]["class"] == "Hub"
+    assert devices[0]["product"] == "EHCI Host Controller"
+    assert devices[0]["speed_mbps"] == 480.0
+
+
+def test_sound_cards(tmp_path):
+    (tmp_path / "cards").write_text(
+        " 0 [PCH            ]: HDA-Intel - HDA Intel PCH\n"
+        "                      HDA Intel PCH at 0xf7f10000 irq 32\n")
+    (tmp_path / "pcm").write_text("00-00: ALC3246 Analog : ALC3246 Analog : playback 1 : capture 1\n")
+    cards = sound_cards(str(tmp_path))
+    assert cards[0]["id"] == "PCH"
+    assert cards[0]["driver"] == "HDA-Intel"
+    assert cards[0]["name"] == "HDA Intel PCH"
+    assert cards[0]["pcm"] == [{"device": 0, "name": "ALC3246 Analog", "streams": ["playback 1", "capture 1"]}]
+    assert sound_cards(str(tmp_path / "missing")) == []
@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import patch
+from sysdox.diskio import read_diskstats, compute_rates, join_mounts, DiskIOSampler, dump
+
+DISKSTATS = """   8       0 sda 1000 0 8000 500 2000 0 16000 1500 2 3000 4000 0 0 0 0
+   8       1 sda1 900 0 7200 450 1800 0 14400 1400 1 2800 3800 0 0 0 0
+ 253       0 dm-0 10 0 80 5 0 0 0 0 0 5 5
+"""
+
+
+def test_read_diskstats(tmp_path):
+    stats = tmp_path / "diskstats"
+    stats.write_text(DISKSTATS)
+    counters = read_diskstats(str(stats))
+    assert set(counters) == {"sda", "sda1", "dm-0"}
+    assert counters["sda"] == (1000, 8000, 500, 2000, 16000, 1500, 2, 3000, 4000)
+
+
+def test_compute_rates():
+    prev = {"sda": (1000, 8000, 500, 2000, 16000, 1500, 2, 3000, 4000)}
+    curr = {
+        "sda": (1100, 8800, 600, 2100, 17600, 700 + 1500, 4, 3500, 5000),
+        "sdb": (1, 1, 1, 1, 1, 1, 0, 1, 1)  # appeared between samples
+    }
+    rates = compute_rates(prev, curr, 1.0)
+    assert set(rates) == {"sda"}
+    sda = rates["sda"]
+    assert sda["read_iops"] == 100.0
+    assert sda["write_iops"] == 100.0
+    assert sda["read_bytes_per_sec"] == 800 * 512
+    assert sda["await_ms"] == 4.0  # (100 + 700) ms over 200 ios
+    assert sda["queue_depth"] == 1.0
+    assert sda["util_percent"] == 50.0
+    assert sda["in_flight"] == 4
+
+
+@patch("sysdox.diskio.parent_device", side_effect=lambda name: "sda" if name == "sda1" else name)
+def test_join_mounts(mock_parent):
+    rates = {"sda": {"util_percent": 50.0}, "sda1": {"util_percent": 40.0}}
+    mounts = join_mounts(rates, {"/": "sda1", "/data": "dm-0"})
+    assert mounts["/"]["io"] == {"util_percent": 40.0}
+    assert mounts["/"]["disk"] == "sda"
+    assert mounts["/"]["disk_io"] == {"util_percent": 50.0}
+    assert mounts["/data"] == {"device": "dm-0", "io": None}
+
+
+def test_sampler_reads_once_per_sample():
+    reads = iter([
+        {"sda": (0, 0, 0, 0, 0, 0, 0, 0, 0)},
+        {"sda": (10, 80, 10, 0, 0, 0, 0, 10, 10)},
+    ])
+    calls = []
+
+    def reader():
+        calls.append(1)
+        return next(reads)
+
+    sampler = DiskIOSampler(reader=reader)
+    assert sampler.sample() is None
+    rates = sampler.sample()
+    assert len(calls) == 2
+    assert rates["sda"]["read_iops"] > 0
+
+
+def test_dump_runs():
+    data = dump(interval=0.01)
+    assert isinstance(data, dict)
+
+
+@patch("sysdox.diskio.mount_devices", return_value={})
+@patch("sysdox.diskio.time.sleep")
+def test_dump_while_sampling(mock_sleep, mock_mounts, monkeypatch):
+    from sysdox import diskio, registry
+    reads = iter([
+        {"sda": (0, 0, 0, 0, 0, 0, 0, 0, 0)},
+        {"sda": (10, 80, 10, 0, 0, 0, 0, 10, 10)},
+        {"sda": (20, 160, 20, 0, 0, 0, 0, 20, 20)},
+    ])
+    monkeypatch.setattr(diskio, "_sampler", DiskIOSampler(reader=lambda: next(reads)))
+    was_sampling = registry.set_sampling(True)
+    try:
+        dump(interval=0.25)
+        data = dump(interval=0.25)
+    finally:
+        registry.set_sampling(was_sampling)
+    # only the first tick had to wait for a second reading
+    mock_sleep.assert_called_once_with(0.25)
+    assert data["devices"]["sda"]["read_iops"] > 0
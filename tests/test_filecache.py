@@ -0,0 +1,121 @@
+import os
+import time
+import pytest
+from unittest.mock import patch
+from sysdox import filecache
+from sysdox.filecache import FileWatcher, cached_by_files
+
+
+@pytest.fixture
+def enabled_cache():
+    filecache.enable()
+    yield
+    filecache.disable()
+
+
+def make_reader(path, calls):
+    @cached_by_files(str(path))
+    def reader():
+        calls.append(1)
+        with open(path) as f:
+            return f.read()
+    return reader
+
+
+def test_disabled_cache_calls_through(tmp_path):
+    source = tmp_path / "resolv.conf"
+    source.write_text("nameserver 1.1.1.1\n")
+    calls = []
+    reader = make_reader(source, calls)
+    reader()
+    reader()
+    assert len(calls) == 2
+
+
+@pytest.mark.skipif(not FileWatcher().inotify, reason="inotify is not available")
+def test_inotify_invalidation(tmp_path, enabled_cache):
+    source = tmp_path / "resolv.conf"
+    source.write_text("nameserver 1.1.1.1\n")
+    calls = []
+    reader = make_reader(source, calls)
+
+    assert reader() == "nameserver 1.1.1.1\n"
+    assert reader() == "nameserver 1.1.1.1\n"
+    assert len(calls) == 1
+
+    # replaced the way resolvconf and dpkg do it, through a rename
+    tmp = tmp_path / "resolv.conf.new"
+    tmp.write_text("nameserver 9.9.9.9\n")
+    os.rename(tmp, source)
+    assert reader() == "nameserver 9.9.9.9\n"
+    assert len(calls) == 2
+
+
+def test_mtime_fallback(tmp_path, enabled_cache):
+    source = tmp_path / "os-release"
+    source.write_text('PRETTY_NAME="Old"\n')
+    calls = []
+    reader = make_reader(source, calls)
+
+    with patch.object(filecache, "_watcher", FileWatcher()) as watcher:
+        watcher.close()  # behave as if inotify were missing
+        assert reader() == 'PRETTY_NAME="Old"\n'
+        assert reader() == 'PRETTY_NAME="Old"\n'
+        assert len(calls) == 1
+
+        source.write_text('PRETTY_NAME="New release"\n')
+        assert reader() == 'PRETTY_NAME="New release"\n'
+        assert len(calls) == 2
+
+
+def test_rewatch_never_reuses_token(tmp_path):
+    watcher = FileWatcher()
+    if not watcher.inotify:
+        pytest.skip("inotify is not available")
+    directory = tmp_path / "etc"
+    directory.mkdir()
+    path = directory / "resolv.conf"
+    path.write_text("a")
+    first = watcher.version(str(path))
+
+    # removing the directory drops the watch, the next token must differ
+    os.remove(path)
+    os.rmdir(directory)
+    directory.mkdir()
+    path.write_text("b")
+    assert watcher.version(str(path)) != first
+    watcher.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlinked_file(tmp_path):
+    watcher = FileWatcher()
+    if not watcher.inotify:
+        pytest.skip("inotify is not available")
+    # /etc/resolv.conf -> /run/systemd/resolve/stub-resolv.conf
+    run = tmp_path / "run"
+    run.mkdir()
+    (run / "stub-resolv.conf").write_text("nameserver 127.0.0.53\n")
+    (tmp_path / "etc").mkdir()
+    link = tmp_path / "etc" / "resolv.conf"
+    os.symlink("../run/stub-resolv.conf", str(link))
+    first = watcher.version(str(link))
+    assert watcher.version(str(link)) == first
+
+    # the target is rewritten through a rename in its own directory
+    (run / "stub.tmp").write_text("nameserver 9.9.9.9\n")
+    os.rename(run / "stub.tmp", run / "stub-resolv.conf")
+    second = watcher.version(str(link))
+    assert second != first
+
+    # the link is pointed at a file in yet another directory, then that file changes
+    other = tmp_path / "nm"
+    other.mkdir()
+    (other / "resolv.conf").write_text("nameserver 1.1.1.1\n")
+    os.symlink("../nm/resolv.conf", str(tmp_path / "etc" / "resolv.tmp"))
+    os.rename(tmp_path / "etc" / "resolv.tmp", link)
+    third = watcher.version(str(link))
+    assert third != second
+    (other / "resolv.conf").write_text("nameserver 8.8.8.8\n")
+    assert watcher.version(str(link)) != third
+    watcher.close()
@@ -31,16 +31,16 @@ def test_run_command():
         assert run_command("invalid_command") is None
 
 
+@patch("sysdox.firmware.topology.microcode_versions", return_value={0: "0x1", 1: "0x1"})
 @patch("sysdox.firmware.get_file_content")
 @patch("sysdox.firmware.run_command")
-def test_get_linux_firmware(mock_run_command, mock_get_file_content):
+def test_get_linux_firmware(mock_run_command, mock_get_file_content, mock_microcode):
     # Mock file content
     mock_get_file_content.side_effect = lambda path: {
         "/sys/class/dmi/id/bios_version": "1.0.0",
         "/sys/class/dmi/id/bios_date": "2025-01-01",
         "/sys/class/dmi/id/sys_vendor": "TestVendor",
-        "/sys/class/dmi/id/board_name": "TestBoard",
-        "/proc/cpuinfo": "microcode : 0x1"
+        "/sys/class/dmi/id/board_name": "TestBoard"
     }.get(path, None)
 
     # Mock command output
@@ -57,11 +57,28 @@ def test_get_linux_firmware(mock_run_command, mock_get_file_content):
     assert result["vendor"] == "TestVendor"
     assert result["motherboard"] == "TestBoard"
     assert result["cpu_microcode"] == "0x1"
+    assert "cpu_microcode_per_cpu" not in result
     assert result["fwupd_devices"] == ["Device1", "Device2"]
     assert result["storage_firmware"]["/dev/sda"] == "1.23"
     assert result["storage_firmware"]["/dev/sdb"] == "4.56"
 
 
+@patch("sysdox.firmware.topology.microcode_versions", return_value={0: "0xf0", 1: "0xf4"})
+@patch("sysdox.firmware.get_file_content", return_value=None)
+@patch("sysdox.firmware.run_command", return_value=None)
+def test_get_linux_firmware_mixed_microcode(mock_run_command, mock_get_file_content, mock_microcode):
+    result = get_linux_firmware()
+    assert result["cpu_microcode"] == "0xf0, 0xf4"
+    assert result["cpu_microcode_per_cpu"] == {0: "0xf0", 1: "0xf4"}
+
+
+@patch("sysdox.firmware.topology.microcode_versions", return_value={0: "0x1", 1: "0x1"})
+def test_microcode_per_cpu_field_when_uniform(mock_microcode):
+    from sysdox.firmware import fields
+    assert fields()["cpu_microcode_per_cpu"]() is None
+    assert fields()["cpu_microcode"]() == "0x1"
+
+
 @patch("sysdox.firmware.run_command")
 def test_get_windows_firmware(mock_run_command):
     # Mock command output
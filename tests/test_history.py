@@ -0,0 +1,83 @@
+import pytest
+from sysdox.history import flatten, History, SqliteSink, DAY
+
+SNAPSHOT = {
+    "network": {"interface_stats": {
+        "eth0": {"bytes_recv": 100, "is_up": True, "mtu": 1500},
+        "lo": {"bytes_recv": 5, "is_up": True, "mtu": 65536},
+    }},
+    "system": {"uptime": {"uptime_seconds": 42, "uptime_human": "00:00:42"}},
+    "specs": {"storage_info": [{"mountpoint": "/", "total": "10 GB"}]},
+}
+
+
+def test_flatten():
+    rows = sorted((m, sorted(l.items()), v) for m, l, v in flatten(SNAPSHOT))
+    assert rows == [
+        ("network.interface_stats.bytes_recv", [("interface_stats", "eth0")], 100.0),
+        ("network.interface_stats.bytes_recv", [("interface_stats", "lo")], 5.0),
+        ("network.interface_stats.mtu", [("interface_stats", "eth0")], 1500.0),
+        ("network.interface_stats.mtu", [("interface_stats", "lo")], 65536.0),
+        ("system.uptime.uptime_seconds", [], 42.0),
+    ]
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = History(str(tmp_path / "history.db"), raw_retention=600, rollup_resolution=300, rollup_retention=DAY)
+    yield h
+    h.close()
+
+
+def test_append_and_query(history, tmp_path):
+    for i in range(5):
+        history.append({"system": {"uptime": {"uptime_seconds": i}}}, 1000 + 10 * i)
+    assert history.query("system.uptime.uptime_seconds", 1010, 1030) == [
+        (1010, {}, 1.0), (1020, {}, 2.0), (1030, {}, 3.0)]
+    assert history.query("no.such.metric", 0, 2000) == []
+
+    history.append(SNAPSHOT, 2000)
+    eth0 = history.query("network.interface_stats.bytes_recv", 0, 3000, labels={"interface_stats": "eth0"})
+    assert eth0 == [(2000, {"interface_stats": "eth0"}, 100.0)]
+
+    # metric and label ids survive a reopen
+    history.close()
+    reopened = History(str(tmp_path / "history.db"))
+    assert "network.interface_stats.mtu" in reopened.metrics()
+    reopened.append(SNAPSHOT, 2010)
+    assert len(reopened.query("network.interface_stats.mtu", 0, 3000)) == 4
+    reopened.close()
+
+
+def test_downsample_and_expire(history):
+    for ts in range(0, 900, 10):
+        history.append({"cpu": {"busy": ts % 100}}, ts)
+    result = history.maintain(now=1200)  # raw older than 600 -> rollups
+    assert result["downsampled"] == 60
+    assert history.query("cpu.busy", 0, 599) == []
+    rollups = history.query("cpu.busy", 0, 599, resolution=300)
+    assert [ts for ts, _, _ in rollups] == [0, 300]
+    assert rollups[0][2] == pytest.approx(45.0)
+    assert len(history.query("cpu.busy", 600, 900)) == 30
+
+    history.maintain(now=2 * DAY)
+    assert history.query("cpu.busy", 0, 900, resolution=300) == []
+
+
+def test_sink(tmp_path):
+    sink = SqliteSink(str(tmp_path / "h.db"))
+    sink.write(1000.5, SNAPSHOT)
+    assert sink.history.query("system.uptime.uptime_seconds", 1000, 1001) == [(1000, {}, 42.0)]
+    sink.close()
+
+
+def test_range_query_plan_is_one_index_scan(history):
+    history.append(SNAPSHOT, 2000)
+    metric_id = history._metrics["network.interface_stats.bytes_recv"]
+    for resolution in (None, 300):
+        for labels_ids in (None, [1, 2]):
+            sql, params = history._range_sql(metric_id, 0, 3000, labels_ids, resolution)
+            plan = " ".join(row[-1] for row in history.db.execute("EXPLAIN QUERY PLAN " + sql, params))
+            assert "TEMP B-TREE" not in plan
+            assert "PRIMARY KEY" in plan
+    assert history.query("network.interface_stats.bytes_recv", 0, 3000, labels={"interface_stats": "nope"}) == []
@@ -0,0 +1,70 @@
+import pytest
+from sysdox import hwids
+from sysdox.hwids import IdsDatabase, parse_ids, build_index
+
+PCI_IDS = """# comment
+8086  Intel Corporation
+\t1237  440FX - 82441FX PMC [Natoma]
+\t\t1af4 1100  Qemu virtual machine
+10de  NVIDIA Corporation
+\t2684  AD102 [GeForce RTX 4090]
+C 03  Display controller
+\t00  VGA compatible controller
+\t\t00  VGA controller
+\t02  3D controller
+"""
+
+USB_IDS = """1d6b  Linux Foundation
+\t0002  2.0 root hub
+C 09  Hub
+AT 0001  Audio Terminal
+HID 01  Pointer
+"""
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    source = tmp_path / "pci.ids"
+    source.write_text(PCI_IDS)
+    return IdsDatabase([str(tmp_path / "missing.ids"), str(source)], "pci.ids.idx")
+
+
+def test_parse_ids_skips_other_sections():
+    names = dict(parse_ids(USB_IDS.splitlines(True)))
+    assert names == {
+        hwids._key(hwids.VENDOR, 0x1d6b): "Linux Foundation",
+        hwids._key(hwids.DEVICE, 0x1d6b, 0x0002): "2.0 root hub",
+        hwids._key(hwids.CLASS, 0x09): "Hub",
+    }
+
+
+def test_lookups(database):
+    assert database.vendor(0x8086) == "Intel Corporation"
+    assert database.device(0x10de, 0x2684) == "AD102 [GeForce RTX 4090]"
+    assert database.device(0x10de, 0x1111) is None
+    assert database.vendor(0xffff) is None
+    assert database.device_class(0x03, 0x02) == "3D controller"
+    assert database.device_class(0x03, 0x80) == "Display controller"
+
+
+def test_index_is_cached_and_rebuilt_when_source_changes(database, tmp_path):
+    database.vendor(0x8086)
+    cache = tmp_path / "cache" / "sysdox" / "pci.ids.idx"
+    assert cache.read_bytes()[:8] == hwids.MAGIC
+
+    again = IdsDatabase(database.candidates, "pci.ids.idx")
+    assert again.vendor(0x10de) == "NVIDIA Corporation"
+
+    (tmp_path / "pci.ids").write_text(PCI_IDS + "1af4  Red Hat, Inc.\n")
+    rebuilt = IdsDatabase(database.candidates, "pci.ids.idx")
+    assert rebuilt.vendor(0x1af4) == "Red Hat, Inc."
+
+
+def test_build_index_keeps_first_name():
+    index = build_index([(5, "first"), (5, "second"), (1, "one")])
+    assert b"first" in index and b"second" not in index
+
+
+def test_missing_database(tmp_path):
+    assert IdsDatabase([str(tmp_path / "nope")], "x.idx").vendor(0x8086) is None
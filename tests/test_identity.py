@@ -0,0 +1,56 @@
+import time
+import pytest
+from sysdox import identity
+
+
+def write(directory, **files):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in files.items():
+        (directory / name).write_text(content + "\n")
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    write(tmp_path / "dmi", sys_vendor="Dell Inc.", product_name="PowerEdge R650",
+          product_serial="ABC1234", board_serial="To be filled by O.E.M.", bios_version=" 1.2.3 ")
+    write(tmp_path / "block" / "nvme0n1" / "device", model="Samsung SSD 980", serial="S1", firmware_rev="2B4Q")
+    write(tmp_path / "block" / "sda" / "device", model="WDC", serial="W1", rev="01.0")
+    write(tmp_path / "block" / "loop0")
+    write(tmp_path / "net" / "eth0" / "device")
+    write(tmp_path / "net" / "eth0", address="AA:BB:CC:00:11:22")
+    write(tmp_path / "net" / "br0", address="aa:bb:cc:00:11:99")
+    write(tmp_path / "net" / "lo" / "device")
+    write(tmp_path / "net" / "lo", address="00:00:00:00:00:00")
+    return tmp_path
+
+
+def test_facts_are_normalized(sysfs):
+    dmi = identity.dmi_facts(str(sysfs / "dmi"))
+    assert dmi["system"]["sys_vendor"] == "Dell Inc."
+    assert dmi["board"]["board_serial"] is None
+    assert dmi["bios"]["bios_version"] == "1.2.3"
+    assert identity.nic_facts(str(sysfs / "net")) == ["aa:bb:cc:00:11:22"]
+    disks = identity.disk_facts(str(sysfs / "block"))
+    assert disks == [
+        {"model": "WDC", "serial": "W1", "firmware": "01.0"},
+        {"model": "Samsung SSD 980", "serial": "S1", "firmware": "2B4Q"},
+    ]
+
+
+def test_component_hashes(sysfs):
+    facts = {"bios": {"bios_version": "1.2.3"}, "disks": identity.disk_facts(str(sysfs / "block")), "nics": []}
+    first = identity.compute(facts)
+    assert identity.compute(dict(facts)) == first
+    changed = identity.compute(dict(facts, bios={"bios_version": "1.2.4"}))
+    assert changed["fingerprint"] != first["fingerprint"]
+    assert changed["components"]["disks"] == first["components"]["disks"]
+    assert changed["components"]["bios"] != first["components"]["bios"]
+
+
+def test_fingerprint_is_cached():
+    result = identity.fingerprint()
+    assert set(result["components"]) == {"system", "board", "bios", "cpu", "disks", "nics"}
+    started = time.perf_counter()
+    for _ in range(1000):
+        assert identity.fingerprint() is result
+    assert time.perf_counter() - started < 0.05
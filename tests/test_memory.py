@@ -0,0 +1,84 @@
+import struct
+import pytest
+from sysdox import memory
+
+MEMINFO = """MemTotal:       16315164 kB
+MemFree:         3244380 kB
+AnonHugePages:     20480 kB
+HugePages_Total:      64
+HugePages_Free:       60
+Hugepagesize:       2048 kB
+"""
+
+
+def write(directory, **files):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in files.items():
+        (directory / name).write_text(content + "\n")
+
+
+def memory_device(size, type_byte, speed, configured, strings):
+    raw = bytearray(0x28)
+    raw[0], raw[1] = 17, 0x28
+    struct.pack_into("<H", raw, 0x0C, size)
+    raw[0x10], raw[0x11], raw[0x12] = 1, 2, type_byte
+    struct.pack_into("<H", raw, 0x15, speed)
+    raw[0x17], raw[0x1A] = 3, 4
+    struct.pack_into("<H", raw, 0x20, configured)
+    return bytes(raw) + b"\0".join(s.encode() for s in strings) + b"\0\0"
+
+
+def test_parse_meminfo():
+    info = memory.parse_meminfo(MEMINFO)
+    assert info["MemTotal"] == 16315164 * 1024
+    assert info["HugePages_Total"] == 64
+    node = memory.parse_meminfo("Node 1 MemTotal:        4423416 kB\nNode 1 HugePages_Free:     3\n")
+    assert node == {"MemTotal": 4423416 * 1024, "HugePages_Free": 3}
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    node = tmp_path / "node" / "node1"
+    write(node, meminfo="Node 1 MemTotal:  1024 kB\nNode 1 MemFree:  512 kB", distance="21 10", cpulist="4-7",
+          numastat="numa_hit 900\nnuma_miss 100\nnuma_foreign 5\nlocal_node 950\nother_node 50")
+    write(node / "hugepages" / "hugepages-2048kB", nr_hugepages="16", free_hugepages="4", surplus_hugepages="0")
+    write(tmp_path / "node" / "possible")
+    write(tmp_path / "hugepages" / "hugepages-1048576kB", nr_hugepages="2", free_hugepages="2",
+          resv_hugepages="0", surplus_hugepages="0", nr_overcommit_hugepages="0")
+    write(tmp_path / "thp", enabled="always [madvise] never", defrag="[always] defer madvise never")
+    write(tmp_path / "thp" / "khugepaged", defrag="1")
+    dmi = tmp_path / "dmi"
+    (dmi / "17-0").mkdir(parents=True)
+    (dmi / "17-0" / "raw").write_bytes(memory_device(16384, 0x22, 5600, 4800, ["DIMM_A1", "BANK 0", "Samsung", "M323R2GA3BB0"]))
+    (dmi / "17-1").mkdir()
+    (dmi / "17-1" / "raw").write_bytes(memory_device(0, 0x02, 0, 0, ["DIMM_A2", "BANK 1", "", ""]))
+    return tmp_path
+
+
+def test_nodes(sysfs):
+    nodes = memory.nodes(str(sysfs / "node"))
+    assert list(nodes) == [1]
+    node = nodes[1]
+    assert node["meminfo"] == {"MemTotal": 1024 * 1024, "MemFree": 512 * 1024}
+    assert node["distance"] == [21, 10]
+    assert node["numastat"]["miss_percent"] == 10.0
+    assert node["hugepages"] == {2097152: {"nr_hugepages": 16, "free_hugepages": 4, "surplus_hugepages": 0,
+                                           "used_hugepages": 12, "total_bytes": 16 * 2097152}}
+
+
+def test_hugepages_and_thp(sysfs):
+    pool = memory.hugepages(str(sysfs / "hugepages"))[1073741824]
+    assert pool["nr_hugepages"] == 2 and pool["used_hugepages"] == 0
+    assert memory.transparent_hugepages(str(sysfs / "thp")) == {
+        "enabled": "madvise", "defrag": "always", "khugepaged_defrag": "1"}
+
+
+def test_dimms(sysfs):
+    modules = memory.dimms(str(sysfs / "dmi"))
+    assert modules == [{
+        "locator": "DIMM_A1", "bank": "BANK 0", "size": 16 * 1024 ** 3, "type": "DDR5",
+        "speed_mts": 5600, "configured_speed_mts": 4800,
+        "manufacturer": "Samsung", "part_number": "M323R2GA3BB0"
+    }]
+    assert memory.memory_type(modules) == "DDR5"
+    assert memory.memory_type([]) == "Unknown"
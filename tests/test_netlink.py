@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import shutil
+import socket
+import struct
+import subprocess
+import pytest
+from sysdox import netlink
+
+
+def attr(kind, payload):
+    length = netlink.RTATTR.size + len(payload)
+    return netlink.RTATTR.pack(length, kind) + payload + b"\0" * (netlink._align(length) - length)
+
+
+def link_payload(index, name, flags, mac=b"\x02\x00\x00\x00\x00\x01"):
+    return (netlink.IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, flags, 0)
+            + attr(netlink.IFLA_IFNAME, name.encode() + b"\0")
+            + attr(netlink.IFLA_ADDRESS, mac)
+            + attr(netlink.IFLA_MTU, struct.pack("=I", 1500)))
+
+
+def addr_payload(index, address, prefixlen):
+    family = socket.AF_INET6 if ":" in address else socket.AF_INET
+    raw = socket.inet_pton(family, address)
+    return (netlink.IFADDRMSG.pack(family, prefixlen, 0, 0, index)
+            + attr(netlink.IFA_ADDRESS, raw) + attr(netlink.IFA_LOCAL, raw))
+
+
+UP = netlink.IFF_UP | netlink.IFF_RUNNING
+
+
+def test_parse_link_and_addr():
+    index, link = netlink.parse_link(link_payload(3, "eth0", UP))
+    assert index == 3
+    assert link["name"] == "eth0" and link["mac"] == "02:00:00:00:00:01"
+    assert link["mtu"] == 1500 and link["up"] is True
+    assert netlink.parse_addr(addr_payload(3, "10.0.0.1", 24))[:4] == (3, socket.AF_INET, "10.0.0.1", 24)
+
+
+def test_parse_messages():
+    body = link_payload(1, "lo", UP)
+    data = netlink.NLMSGHDR.pack(netlink.NLMSGHDR.size + len(body), netlink.RTM_NEWLINK, 0, 7, 0) + body
+    data += netlink.NLMSGHDR.pack(netlink.NLMSGHDR.size, netlink.NLMSG_DONE, 0, 7, 0)
+    assert [(k, s) for k, _, s, _ in netlink.parse_messages(data)] == [(netlink.RTM_NEWLINK, 7), (netlink.NLMSG_DONE, 7)]
+
+
+def test_table_and_event_log():
+    cache = netlink.InterfaceCache(max_events=10)
+    cache._apply(netlink.RTM_NEWLINK, link_payload(4, "tun0", UP))
+    cache._apply(netlink.RTM_NEWADDR, addr_payload(4, "10.8.0.2", 24))
+    cache._apply(netlink.RTM_NEWADDR, addr_payload(4, "10.8.0.2", 24))  # lifetime refresh
+    cache._apply(netlink.RTM_NEWLINK, link_payload(4, "tun0", netlink.IFF_UP))
+    cache._apply(netlink.RTM_NEWLINK, link_payload(4, "tun0", UP))
+    addrs = cache.if_addrs()["tun0"]
+    assert [(a.family, a.address, a.netmask) for a in addrs[:1]] == [(socket.AF_INET, "10.8.0.2", "255.255.255.0")]
+    assert cache.if_up() == {"tun0": True}
+    cache._apply(netlink.RTM_DELADDR, addr_payload(4, "10.8.0.2", 24))
+    cache._apply(netlink.RTM_DELLINK, link_payload(4, "tun0", 0))
+    assert [e["event"] for e in cache.recent_events()] == [
+        "link_added", "address_added", "link_down", "link_up", "address_removed", "link_removed"]
+    assert cache.recent_events(since=5)[0]["event"] == "link_removed"
+    assert cache.if_addrs() == {}
+
+
+HARNESS = r"""
+import json, subprocess, sys
+from sysdox import netlink, network
+
+def ip(*args):
+    subprocess.run(["ip"] + list(args), check=True)
+
+cache = netlink.enable()
+ip("link", "add", "sdxa", "type", "veth", "peer", "name", "sdxb")
+ip("addr", "add", "10.99.0.1/24", "dev", "sdxa")
+ip("link", "set", "sdxa", "up")
+ip("link", "set", "sdxb", "up")
+ips = network.ips(["sdxa"])
+ip("link", "set", "sdxb", "down")  # the peer going down takes sdxa's carrier with it
+ip("link", "set", "sdxb", "up")
+stats = network.interface_stats(["sdxa", "sdxb"])
+ip("link", "del", "sdxa")
+events = [(e["event"], e["interface"]) for e in cache.recent_events()]
+print(json.dumps({"ips": ips, "stats": stats, "events": events}))
+"""
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux") or os.geteuid() != 0 or not shutil.which("ip"),
+                    reason="needs root and iproute2 to create a network namespace")
+def test_veth_pair_in_namespace():
+    namespace = f"sysdox-test-{os.getpid()}"
+    if subprocess.run(["ip", "netns", "add", namespace], capture_output=True).returncode:
+        pytest.skip("cannot create network namespaces here")
+    try:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run(["ip", "netns", "exec", namespace, sys.executable, "-c", HARNESS],
+                                capture_output=True, text=True, env=env, timeout=60)
+        assert output.returncode == 0, output.stderr
+        result = json.loads(output.stdout)
+    finally:
+        subprocess.run(["ip", "netns", "del", namespace])
+    assert result["ips"]["sdxa"]["ipv4"] == ["10.99.0.1"]
+    assert set(result["stats"]) == {"sdxa", "sdxb"}
+    events = [tuple(event) for event in result["events"]]
+    assert ("link_added", "sdxa") in events and ("link_added", "sdxb") in events
+    assert ("address_added", "sdxa") in events
+    # the flap happened between two reads and is still in the log
+    down = events.index(("link_down", "sdxa"))
+    assert ("link_up", "sdxa") in events[down:]
+    assert ("link_removed", "sdxa") in events and ("link_removed", "sdxb") in events
@@ -0,0 +1,80 @@
+from sysdox import netstat
+
+SNMP = """Tcp: RtoAlgorithm RtoMin MaxConn ActiveOpens CurrEstab InErrs OutSegs RetransSegs OutRsts
+Tcp: 1 200 -1 10 4 0 1000 20 3
+Udp: InDatagrams NoPorts InErrors OutDatagrams RcvbufErrors SndbufErrors
+Udp: 50 2 1 40 1 0
+"""
+NETSTAT = """TcpExt: SyncookiesSent ListenOverflows ListenDrops TCPReqQFullDrop TCPBacklogDrop
+TcpExt: 0 7 9 2 1
+IpExt: InNoRoutes InTruncatedPkts
+IpExt: 0 0
+"""
+SOFTNET = ("000017c9 00000002 00000005 00000000 00000000 00000000 00000000 00000000 00000000 "
+           "00000000 00000000 00000000 00000000 00000000 00000000\n"
+           "00000010 00000000 00000001 00000000 00000000 00000000 00000000 00000000 00000000 "
+           "00000000 00000000 00000000 00000003 00000000 00000000\n")
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+  eth0: 60766255    6032    4    8    0     0          0         0 60766255    6032    1    2    0     0       0          0
+"""
+
+
+def counters(changes=None):
+    snmp = netstat.parse_snmp(SNMP)
+    snmp.update(netstat.parse_snmp(NETSTAT))
+    result = {"snmp": snmp, "softnet": netstat.parse_softnet(SOFTNET), "interfaces": netstat.parse_net_dev(NET_DEV)}
+    for (section, field), value in (changes or {}).items():
+        result["snmp"][section][field] = value
+    return result
+
+
+def test_parsers():
+    snmp = netstat.parse_snmp(SNMP)
+    assert snmp["Tcp"]["MaxConn"] == -1 and snmp["Udp"]["RcvbufErrors"] == 1
+    softnet = netstat.parse_softnet(SOFTNET)
+    assert softnet[0] == {"processed": 0x17c9, "dropped": 2, "time_squeeze": 5, "received_rps": 0, "flow_limit_count": 0}
+    assert softnet[3]["time_squeeze"] == 1  # cpu number from column 13
+    eth0 = netstat.parse_net_dev(NET_DEV)["eth0"]
+    assert (eth0["rx_errors"], eth0["rx_dropped"], eth0["tx_errors"], eth0["tx_dropped"]) == (4, 8, 1, 2)
+    assert "rx_bytes" not in eth0
+
+
+def test_summarize_totals():
+    summary = netstat.summarize(counters())
+    assert summary["tcp"]["retransmits"] == 20
+    assert summary["tcp"]["retransmit_percent"] == 2.0
+    assert summary["tcp"]["listen_overflows"] == 7 and summary["tcp"]["syn_drops"] == 2
+    assert summary["tcp"]["established"] == 4
+    assert summary["udp"]["receive_buffer_errors"] == 1
+    assert summary["softnet"]["total"]["dropped"] == 2 and summary["softnet"]["total"]["time_squeeze"] == 6
+
+
+def test_sampler_reports_deltas():
+    reads = iter([counters(), counters({("Tcp", "OutSegs"): 1500, ("Tcp", "RetransSegs"): 30,
+                                        ("Tcp", "CurrEstab"): 6, ("TcpExt", "ListenOverflows"): 4})])
+    sampler = netstat.NetstatSampler(reader=lambda: next(reads))
+    assert sampler.sample() is None
+    sampled = sampler.sample()
+    assert sampled["tcp"]["retransmits"] == 10
+    assert sampled["tcp"]["retransmit_percent"] == 2.0
+    assert sampled["tcp"]["established"] == 6  # a gauge, not a delta
+    assert sampled["tcp"]["listen_overflows"] == 4  # went backwards, counter was reset
+    assert sampled["softnet"]["total"]["dropped"] == 0
+    assert sampled["interfaces"]["eth0"]["rx_dropped"] == 0
+    assert sampled["interval"] >= 0
+
+
+def test_dump_while_sampling(monkeypatch):
+    from sysdox import registry
+    reads = iter([counters(), counters({("Tcp", "OutSegs"): 1500, ("Tcp", "RetransSegs"): 30})])
+    monkeypatch.setattr(netstat, "_sampler", netstat.NetstatSampler(reader=lambda: next(reads)))
+    monkeypatch.setattr(netstat.platform, "system", lambda: "Linux")
+    was_sampling = registry.set_sampling(True)
+    try:
+        first = netstat.dump()
+        assert set(first) == {"since_boot", "interval"}
+        assert first["since_boot"]["tcp"]["retransmits"] == 20
+        assert netstat.dump()["tcp"]["retransmits"] == 10
+    finally:
+        registry.set_sampling(was_sampling)
@@ -4,7 +4,7 @@ import platform
 import psutil
 from sysdox.network import (
     ips, interface, interface_stats, dns, speed, 
-    detect_vpn_tunnels, current_connections, dump
+    detect_vpn_tunnels, current_connections, connection_summary, dump
 )
 
 # Test ips()
@@ -180,3 +180,40 @@ def test_dump(mock_current_connections, mock_detect_vpn_tunnels, mock_speed, moc
     assert isinstance(result["vpn_tunnels"], dict)
     assert isinstance(result["connections"], list)
 
+
+# Test connection_summary()
+TCP_TABLE = """  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000:0050 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 100 1 0000000000000000 100 0 0 10 0
+   1: 0100000A:0050 0200000A:C350 01 00000000:00000000 00:00000000 00000000     0        0 101 1 0000000000000000 20 4 30 10 -1
+   2: 0100000A:0050 0300000A:C351 06 00000000:00000000 00:00000000 00000000     0        0 0 1 0000000000000000 20 4 30 10 -1
+   3: 0100000A:0050 0200000A:C352 08 00000000:00000000 00:00000000 00000000     0        0 102 1 0000000000000000 20 4 30 10 -1
+   4: 0100000A:A000 05060708:01BB 01 00000000:00000000 00:00000000 00000000     0        0 103 1 0000000000000000 20 4 30 10 -1
+"""
+
+UDP6_TABLE = """  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode ref pointer drops
+   0: 00000000000000000000000000000000:0035 00000000000000000000000000000000:0000 07 00000000:00000000 00:00000000 00000000     0        0 104 2 0000000000000000 0
+"""
+
+
+def test_connection_summary(tmp_path):
+    """Test the connection_summary() function."""
+    net = tmp_path / "net"
+    net.mkdir()
+    (net / "tcp").write_text(TCP_TABLE)
+    (net / "udp6").write_text(UDP6_TABLE)
+    fd = tmp_path / "1234" / "fd"
+    fd.mkdir(parents=True)
+    (fd / "3").symlink_to("socket:[101]")
+    (fd / "4").symlink_to("socket:[102]")
+
+    result = connection_summary(top=2, by_pid=True, proc=str(tmp_path))
+
+    assert result["total"] == 6
+    assert result["by_protocol"] == {"tcp": 5, "udp6": 1}
+    assert result["by_state"]["LISTEN"] == 1
+    assert result["time_wait"] == 1
+    assert result["close_wait"] == 1
+    assert result["top_local_ports"] == {80: 4, 40960: 1}
+    assert result["top_remote_addresses"] == {"10.0.0.2": 2, "10.0.0.3": 1}
+    assert result["top_remote_subnets"] == {"10.0.0.0/24": 3, "8.7.6.0/24": 1}
+    assert result["top_pids"] == {1234: 2}
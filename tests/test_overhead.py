@@ -0,0 +1,109 @@
+import sys
+import subprocess
+import pytest
+from sysdox import registry
+from sysdox.overhead import measure, process_usage, Governor
+from sysdox.registry import Collector, EXPENSIVE, CHEAP
+
+
+def busy():
+    return sum(i * i for i in range(200000))
+
+
+def test_measure_cpu():
+    result, stats = measure(busy)
+    assert result == busy()
+    assert stats["cpu_seconds"] > 0
+    assert stats["wall_seconds"] >= stats["cpu_seconds"] * 0.5
+
+
+@pytest.mark.skipif(not hasattr(sys, "addaudithook"), reason="needs audit hooks")
+def test_measure_counts_subprocesses():
+    _, stats = measure(subprocess.call, [sys.executable, "-c", "pass"])
+    assert stats["subprocesses"] == 1
+    _, stats = measure(busy)
+    assert stats["subprocesses"] == 0
+
+
+def test_process_usage():
+    usage = process_usage()
+    assert usage["threads"] >= 1
+    if sys.platform.startswith("linux"):
+        assert usage["rss"] > 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_governor_degrades_over_budget():
+    clock = FakeClock()
+    governor = Governor(budget=0.01, window=60, clock=clock)
+    expensive = Collector("slow", lambda: {}, cost=EXPENSIVE)
+    cheap = Collector("fast", lambda: {}, cost=CHEAP)
+
+    clock.now = 10.0
+    governor.account(0.05)  # 0.5% of a core
+    assert not governor.degraded()
+    assert governor.interval(60) == 60
+
+    governor.account(0.25)  # 3% of a core
+    assert governor.degraded()
+    assert governor.allow(expensive)  # nothing cached yet, it has to run once
+    governor.remember({"slow": {"v": 1}, "fast": {"v": 2}})
+    assert not governor.allow(expensive)
+    assert governor.allow(cheap)
+    assert governor.interval(60) == 180
+
+    clock.now = 100.0  # the expensive runs left the window
+    assert not governor.degraded()
+    assert governor.allow(expensive)
+
+
+@pytest.fixture
+def clean_registry():
+    saved = dict(registry._collectors)
+    registry.clear_cache()
+    yield registry
+    registry._collectors.clear()
+    registry._collectors.update(saved)
+    registry.clear_cache()
+
+
+def test_run_with_meta_and_governor(clean_registry, monkeypatch):
+    # os.getloadavg does not exist on Windows
+    monkeypatch.setattr("os.getloadavg", lambda: (1.0, 1.0, 1.0), raising=False)
+    calls = []
+    registry.register("test_expensive", lambda: calls.append(1) or {"n": len(calls)},
+                      cost=EXPENSIVE, default=False)
+    output = registry.run(["test_expensive"], meta=True)
+    assert output["test_expensive"] == {"n": 1}
+    assert "cpu_seconds" in output["_meta"]["collectors"]["test_expensive"]
+    assert "process" in output["_meta"]
+
+    governor = Governor(max_load=-1.0)  # always "loaded"
+    registry.run(["test_expensive"], governor=governor)
+    output = registry.run(["test_expensive"], meta=True, governor=governor)
+    assert output["test_expensive"] == {"n": 2}  # served from the governor
+    assert output["_meta"]["collectors"]["test_expensive"]["governed"]
+    assert output["_meta"]["governor"]["degraded"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no RUSAGE_CHILDREN on Windows")
+def test_parallel_run_accounts_children_once(clean_registry):
+    def spawn():
+        subprocess.run([sys.executable, "-c", "sum(i * i for i in range(300000))"], check=True)
+        return {}
+
+    registry.register("test_spawn", spawn, default=False)
+    registry.register("test_idle", lambda: {}, default=False)
+    governor = Governor(budget=1.0)
+    output = registry.run(["test_spawn", "test_idle"], parallel=True, meta=True, governor=governor)
+    # the idle collector must not be charged for its sibling's subprocess
+    assert output["_meta"]["collectors"]["test_idle"]["children_cpu_seconds"] is None
+    assert output["_meta"]["collectors"]["test_spawn"]["children_cpu_seconds"] is None
+    assert len(governor._runs) == 1 and governor._runs[0][1] > 0
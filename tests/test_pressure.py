@@ -0,0 +1,71 @@
+import os
+import pytest
+from sysdox.pressure import parse_pressure, read_pressure, stall_rates, PressureTrigger, wait, parse_trigger
+
+MEMORY = """some avg10=1.50 avg60=0.75 avg300=0.20 total=3000000
+full avg10=0.50 avg60=0.25 avg300=0.05 total=1000000
+"""
+CPU = "some avg10=4.44 avg60=2.56 avg300=2.32 total=35696918\n"
+
+
+def test_parse_pressure():
+    pressure = parse_pressure(MEMORY)
+    assert pressure["some"] == {"avg10": 1.5, "avg60": 0.75, "avg300": 0.2, "total": 3000000}
+    assert pressure["full"]["total"] == 1000000
+
+
+def test_read_pressure(tmp_path):
+    (tmp_path / "memory").write_text(MEMORY)
+    (tmp_path / "cpu").write_text(CPU)
+    pressure = read_pressure(str(tmp_path))
+    assert set(pressure) == {"cpu", "memory"}  # no io file
+    assert "full" not in pressure["cpu"]
+
+    (tmp_path / "io.pressure").write_text(MEMORY)
+    assert set(read_pressure(str(tmp_path), cgroup=True)) == {"io"}
+
+
+def test_stall_rates():
+    prev = {"memory": parse_pressure(MEMORY)}
+    curr = {"memory": parse_pressure(MEMORY.replace("3000000", "3500000").replace("1000000", "1100000")),
+            "io": parse_pressure(MEMORY)}
+    rates = stall_rates(prev, curr, 2.0)
+    assert rates == {"memory": {"some": 25.0, "full": 5.0}}
+
+
+def test_dump_while_sampling(tmp_path, monkeypatch):
+    from sysdox import pressure, registry
+    from sysdox.pressure import PressureSampler, dump
+    (tmp_path / "memory").write_text(MEMORY)
+    monkeypatch.setattr(pressure.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(pressure, "_sampler", PressureSampler(str(tmp_path)))
+    was_sampling = registry.set_sampling(True)
+    try:
+        first = dump()
+        (tmp_path / "memory").write_text(MEMORY.replace("3000000", "3500000"))
+        second = dump()
+    finally:
+        registry.set_sampling(was_sampling)
+    assert "stall_percent" not in first["memory"]["some"]
+    assert second["memory"]["some"]["total"] == 3500000
+    assert second["memory"]["some"]["stall_percent"] > 0
+    assert second["memory"]["full"]["stall_percent"] == 0.0
+
+
+def test_parse_trigger_rejects_bad_spec():
+    with pytest.raises(ValueError):
+        parse_trigger("disk:100")
+    with pytest.raises(ValueError):
+        parse_trigger("memory")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/pressure/memory"), reason="kernel without PSI")
+def test_trigger_times_out():
+    try:
+        trigger = PressureTrigger("memory", 500000, 2000000)
+    except OSError:
+        pytest.skip("PSI triggers not permitted here")
+    try:
+        assert wait([trigger], timeout=0.01) == []
+    finally:
+        trigger.close()
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from sysdox.processes import ProcessSampler, dump
+
+
+def fake_process(pid, name, cpu, rss, fds, threads, created=1.0):
+    proc = MagicMock(pid=pid)
+    proc.create_time.return_value = created
+    proc.cpu_times.return_value = MagicMock(user=cpu, system=0.0)
+    proc.memory_info.return_value = MagicMock(rss=rss)
+    proc.num_fds.return_value = fds
+    proc.num_threads.return_value = threads
+    proc.name.return_value = name
+    return proc
+
+
+@patch("sysdox.processes.time.monotonic")
+@patch("sysdox.processes.psutil.process_iter")
+def test_cpu_from_deltas(mock_iter, mock_time):
+    mock_time.side_effect = [100.0, 102.0]
+    mock_iter.side_effect = [
+        [fake_process(1, "init", 10.0, 100, 5, 1), fake_process(2, "db", 50.0, 9000, 300, 40)],
+        # pid 2 was recycled between samples, pid 3 is new
+        [fake_process(1, "init", 10.5, 100, 5, 1), fake_process(2, "cron", 0.5, 50, 3, 1, created=2.0),
+         fake_process(3, "build", 1.0, 800, 10, 8)],
+    ]
+    sampler = ProcessSampler()
+    sampler.sample()
+    assert sampler.sample() == 3
+
+    top = sampler.top(n=2, resolve=False)
+    assert [p["pid"] for p in top["by_cpu"]] == [1]
+    assert top["by_cpu"][0]["cpu_percent"] == 25.0
+    assert [p["pid"] for p in top["by_rss"]] == [3, 1]
+    assert [p["name"] for p in top["by_threads"]] == ["build", "init"]
+    assert top["total_processes"] == 3
+    assert top["total_threads"] == 10
+
+
+@patch("sysdox.processes.psutil.process_iter")
+def test_vanished_processes_are_skipped(mock_iter):
+    import psutil
+    gone = fake_process(9, "gone", 1.0, 1, 1, 1)
+    gone.create_time.side_effect = psutil.NoSuchProcess(9)
+    mock_iter.return_value = [gone, fake_process(1, "init", 1.0, 1, 1, 1)]
+    sampler = ProcessSampler()
+    assert sampler.sample() == 1
+
+
+def test_dump_runs():
+    data = dump(interval=0.01, n=3)
+    assert isinstance(data, dict)
+    assert len(data["by_rss"]) <= 3
+
+
+@patch("sysdox.processes.time.sleep")
+@patch("sysdox.processes.psutil.process_iter")
+def test_dump_while_sampling_sleeps_once(mock_iter, mock_sleep, monkeypatch):
+    from sysdox import processes, registry
+    mock_iter.side_effect = lambda: [fake_process(1, "init", 10.0, 100, 5, 1)]
+    monkeypatch.setattr(processes, "_sampler", ProcessSampler())
+    was_sampling = registry.set_sampling(True)
+    try:
+        dump(n=1)
+        dump(n=1)
+        dump(n=1)
+    finally:
+        registry.set_sampling(was_sampling)
+    # only the first tick had no previous reading to diff against
+    assert mock_sleep.call_count == 1
+    assert mock_iter.call_count == 4
@@ -0,0 +1,96 @@
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+from sysdox import rootfs
+from sysdox.procinfo import ProcessResolver, get_resolver
+
+CONTAINER = "0123456789abcdef" * 4
+
+
+def make_proc(root, pid, comm="nginx", start=1000, uid=0):
+    base = root / str(pid)
+    base.mkdir(parents=True, exist_ok=True)
+    # the comm field in stat can hold spaces and parentheses
+    (base / "stat").write_text(f"{pid} ({comm} (worker)) S 1 1 1 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 {start} 0 0\n")
+    (base / "comm").write_text(comm + "\n")
+    (base / "cmdline").write_text(f"{comm}\0-g\0daemon off;\0")
+    (base / "status").write_text(f"Name:\t{comm}\nUid:\t{uid}\t{uid}\t{uid}\t{uid}\n")
+    (base / "cgroup").write_text(f"0::/system.slice/docker-{CONTAINER}.scope\n")
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    with patch("sysdox.procinfo.platform.system", return_value="Linux"), \
+            patch("sysdox.procinfo.psutil.boot_time", return_value=1_700_000_000.0):
+        res = ProcessResolver(proc=str(tmp_path))
+        res._ticks = 100
+        yield res
+
+
+def test_resolve(tmp_path, resolver):
+    make_proc(tmp_path, 42)
+    # there is no pwd module on Windows
+    fake_pwd = MagicMock()
+    fake_pwd.getpwuid.return_value.pw_name = "root"
+    with patch("sysdox.procinfo.pwd", fake_pwd):
+        info = resolver.resolve(42)
+    assert info["name"] == "nginx"
+    assert info["cmdline"] == "nginx -g daemon off;"
+    assert info["user"] == "root"
+    assert info["container_id"] == CONTAINER
+    assert info["start_time"] == 1_700_000_010.0
+
+
+def test_resolve_caches_and_detects_pid_reuse(tmp_path, resolver):
+    make_proc(tmp_path, 42)
+    first = resolver.resolve(42)
+
+    # same start time: served from the cache even if comm changed on disk
+    (tmp_path / "42" / "comm").write_text("renamed\n")
+    assert resolver.resolve(42) is first
+
+    # pid reused by a new process: start time differs, so it is reloaded
+    make_proc(tmp_path, 42, comm="redis", start=5000)
+    assert resolver.resolve(42)["name"] == "redis"
+
+
+def test_resolve_many_prunes_exited(tmp_path, resolver):
+    make_proc(tmp_path, 1)
+    make_proc(tmp_path, 2, comm="sshd")
+    result = resolver.resolve_many([1, 1, 2, None, 99])
+    assert result[1]["name"] == "nginx"
+    assert result[2]["name"] == "sshd"
+    assert result[99] is None
+    assert set(resolver.cache) == {1, 2}
+
+    for name in os.listdir(tmp_path / "2"):
+        os.remove(tmp_path / "2" / name)
+    os.rmdir(tmp_path / "2")
+    resolver.resolve_many([1])
+    assert set(resolver.cache) == {1}
+
+
+def test_get_resolver_is_shared():
+    assert get_resolver() is get_resolver()
+    assert get_resolver().resolve(os.getpid()) is not None
+
+
+def test_resolve_psutil_uses_cache():
+    with patch("sysdox.procinfo.platform.system", return_value="Windows"):
+        res = ProcessResolver()
+    with patch.object(res, "_load_psutil", wraps=res._load_psutil) as load:
+        first = res.resolve(os.getpid())
+        assert res.resolve(os.getpid()) is first
+    assert load.call_count == 1
+
+
+def test_resolver_follows_root(tmp_path):
+    res = ProcessResolver()
+    assert res.proc == "/proc"
+    res.cache[1] = (0, {"name": "live"})
+    try:
+        rootfs.set_root(str(tmp_path))
+        assert res.proc == str(tmp_path / "proc")
+        assert res.cache == {}
+    finally:
+        rootfs.set_root(None)
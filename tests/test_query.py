@@ -0,0 +1,98 @@
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+from sysdox import registry
+from sysdox.query import parse_path, get, get_many
+
+
+@pytest.fixture
+def fake_collectors():
+    """A collector with per-field functions and one without."""
+    saved = dict(registry._collectors)
+    calls = []
+
+    def interface_stats(names=None):
+        calls.append(("interface_stats", names))
+        stats = {"eth0": {"bytes_recv": 10, "is_up": True}, "eth1": {"bytes_recv": 20, "is_up": False}}
+        return {k: v for k, v in stats.items() if not names or k in names}
+
+    def dns():
+        calls.append(("dns", None))
+        return ["1.1.1.1"]
+
+    def whole():
+        calls.append(("whole", None))
+        return {"disks": {"sda": {"health": "Healthy"}, "sdb": {"health": "Warning"}}, "ids": {1: "one"}}
+
+    registry.register("net", lambda: pytest.fail("whole collector should not run"),
+                      fields=lambda: {"interface_stats": interface_stats, "dns_servers": dns})
+    registry.register("hw", whole)
+    yield calls
+    registry._collectors.clear()
+    registry._collectors.update(saved)
+
+
+def test_parse_path():
+    assert parse_path("network.interface_stats.eth0.bytes_recv") == ["network", "interface_stats", "eth0", "bytes_recv"]
+    assert parse_path('extra.packages."python3.11"') == ["extra", "packages", "python3.11"]
+    with pytest.raises(ValueError):
+        parse_path("system..os")
+    with pytest.raises(ValueError):
+        parse_path('extra."open')
+
+
+def test_get_runs_only_the_needed_field(fake_collectors):
+    assert get("net.interface_stats.eth0.bytes_recv") == 10
+    assert fake_collectors == [("interface_stats", ["eth0"])]
+
+
+def test_get_wildcards(fake_collectors):
+    assert get("hw.disks.*.health") == {"hw.disks.sda.health": "Healthy", "hw.disks.sdb.health": "Warning"}
+    assert get("net.interface_stats.*.is_up") == {
+        "net.interface_stats.eth0.is_up": True,
+        "net.interface_stats.eth1.is_up": False
+    }
+    assert get("net.dns_servers.0") == "1.1.1.1"
+    assert get("hw.ids.1") == "one"
+
+
+def test_get_many_shares_calls(fake_collectors):
+    result = get_many(["hw.disks.sda.health", "hw.disks.sdb.health", "net.dns_servers"])
+    assert result == {"hw.disks.sda.health": "Healthy", "hw.disks.sdb.health": "Warning", "net.dns_servers": ["1.1.1.1"]}
+    assert fake_collectors.count(("whole", None)) == 1
+
+
+def test_get_missing(fake_collectors):
+    with pytest.raises(KeyError):
+        get("hw.disks.sdc.health")
+    with pytest.raises(KeyError):
+        get("unknown.thing")
+
+
+@patch("sysdox.firmware.platform.system", return_value="Linux")
+@patch("sysdox.firmware.get_fwupd_devices")
+@patch("sysdox.firmware.get_file_content", return_value="1.2.3")
+def test_get_firmware_bios_version(mock_file, mock_fwupd, mock_platform):
+    assert get("firmware.bios_version") == "1.2.3"
+    mock_fwupd.assert_not_called()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="psutil reads /proc only on Linux")
+def test_get_replays_env_root(tmp_path, monkeypatch):
+    import psutil
+    from sysdox import rootfs
+    (tmp_path / "proc").mkdir()
+    (tmp_path / "proc" / "meminfo").write_text(
+        "MemTotal: 1024 kB\nMemFree: 512 kB\nMemAvailable: 768 kB\nBuffers: 0 kB\nCached: 0 kB\n"
+        "Shmem: 0 kB\nSReclaimable: 0 kB\nActive: 0 kB\nInactive: 0 kB\n")
+    saved = dict(registry._collectors)
+    registry.register("mem", lambda: {"total": psutil.virtual_memory().total})
+    monkeypatch.setenv(rootfs.ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(rootfs, "_root", rootfs._UNSET)
+    try:
+        # nothing but the query has touched the root, psutil must still read the capture
+        assert get("mem.total") == 1024 * 1024
+    finally:
+        rootfs.set_root(None)
+        registry._collectors.clear()
+        registry._collectors.update(saved)
@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from sysdox import registry
+from sysdox.registry import Collector, CHEAP, EXPENSIVE, PRIVILEGED, STATIC
+
+
+@pytest.fixture
+def clean_registry():
+    """Run against a copy of the registry so test collectors do not leak."""
+    saved = dict(registry._collectors)
+    registry.clear_cache()
+    with patch("sysdox.registry._plugins_loaded", True):
+        yield registry
+    registry._collectors.clear()
+    registry._collectors.update(saved)
+    registry.clear_cache()
+
+
+def test_builtin_collectors_are_lazy():
+    """Built-in collectors are registered by name without importing their module."""
+    c = registry.get("system")
+    assert c.cost == CHEAP
+    assert set(registry.names(default_only=True)) == {"system", "network", "extra", "firmware", "specs"}
+    assert "cpustat" in registry.names()
+
+
+def test_unknown_cost_rejected():
+    with pytest.raises(ValueError):
+        Collector("bad", lambda: {}, cost="free")
+
+
+def test_collectors_ordered_by_cost(clean_registry):
+    registry._collectors.clear()
+    registry.register("slow", lambda: 1, cost=PRIVILEGED)
+    registry.register("medium", lambda: 2, cost=EXPENSIVE)
+    registry.register("fast", lambda: 3, cost=CHEAP)
+    registry.register("unsupported", lambda: 4, platforms={"Plan9"})
+
+    assert [c.name for c in registry.collectors()] == ["fast", "medium", "slow"]
+    assert [c.name for c in registry.collectors(costs=[CHEAP])] == ["fast"]
+    # results keep registration order even though they ran cheapest first
+    assert list(registry.run()) == ["slow", "medium", "fast"]
+    assert registry.run(costs=[CHEAP, EXPENSIVE]) == {"medium": 2, "fast": 3}
+
+
+def test_run_parallel_and_cache(clean_registry):
+    registry._collectors.clear()
+    calls = []
+
+    @registry.collector("static", volatility=STATIC)
+    def static():
+        calls.append("static")
+        return {"value": 1}
+
+    registry.register("volatile", lambda: calls.append("volatile") or {"value": 2})
+
+    first = registry.run(parallel=True, use_cache=True)
+    second = registry.run(use_cache=True)
+    assert first == second == {"static": {"value": 1}, "volatile": {"value": 2}}
+    assert calls.count("static") == 1
+    assert calls.count("volatile") == 2
+
+
+def test_load_plugins_from_entry_points(clean_registry):
+    plugin = Collector("gpu_temps", lambda: {"gpu0": 54}, cost=EXPENSIVE, default=False)
+    bare = MagicMock(return_value={"ok": True})
+    entry_points = [
+        MagicMock(load=MagicMock(return_value=plugin)),
+        MagicMock(load=MagicMock(return_value=bare)),
+        MagicMock(load=MagicMock(side_effect=ImportError("missing dependency"))),
+    ]
+    entry_points[1].name = "bare_plugin"
+    entry_points[2].name = "broken"
+
+    with patch("sysdox.registry._entry_points", return_value=entry_points), \
+            patch("sysdox.registry._plugins_loaded", False):
+        assert "gpu_temps" in registry.names()
+        assert registry.run(["gpu_temps", "bare_plugin"]) == {"gpu_temps": {"gpu0": 54}, "bare_plugin": {"ok": True}}
+        assert "broken" not in registry.names()
+
+
+def test_record_switches_sampling_on(clean_registry):
+    from sysdox.record import record
+    seen = []
+    registry.register("test_sampling", lambda: seen.append(registry.sampling()) or {}, default=False)
+
+    class Sink:
+        def write(self, ts, snapshot):
+            pass
+
+        def close(self):
+            pass
+
+    assert not registry.sampling()
+    record([Sink()], interval=0, count=2, selection=["test_sampling"])
+    assert seen == [True, True]
+    assert not registry.sampling()
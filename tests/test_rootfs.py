@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import tarfile
+import subprocess
+import pytest
+from sysdox import rootfs, system, cpustat
+
+
+@pytest.fixture
+def replay():
+    yield rootfs.set_root
+    rootfs.set_root(None)
+
+
+def test_path_without_root():
+    assert rootfs.get_root() is None
+    assert rootfs.path("/proc/stat") == "/proc/stat"
+
+
+def test_collectors_read_from_root(tmp_path, replay):
+    (tmp_path / "etc").mkdir()
+    (tmp_path / "etc" / "os-release").write_text('PRETTY_NAME="Replayed Linux 1.0"\n')
+    (tmp_path / "proc").mkdir()
+    (tmp_path / "proc" / "stat").write_text("cpu  1 2 3 4 5 6 7 8\ncpu0 1 2 3 4 5 6 7 8\nintr 0\n")
+    replay(str(tmp_path))
+    assert rootfs.path("/proc/stat") == str(tmp_path / "proc" / "stat")
+    assert cpustat.read_proc_stat()[0] == ["cpu", "cpu0"]
+    if sys.platform.startswith("linux"):
+        assert system.os()["os_name"] == "Replayed Linux 1.0"
+
+
+def test_check_output_replays_captured_commands(tmp_path, replay):
+    commands = tmp_path / rootfs.META_DIR / "commands"
+    commands.mkdir(parents=True)
+    (commands / "a").write_bytes(b"bash=5.2\n")
+    (commands / "b").write_bytes(b"")
+    manifest = {"commands": {"dpkg-query -W": {"file": "a", "returncode": 0},
+                             "smartctl -H /dev/sda": {"file": "b", "returncode": 4}}}
+    (tmp_path / rootfs.META_DIR / rootfs.MANIFEST).write_text(json.dumps(manifest))
+    replay(str(tmp_path))
+    assert rootfs.check_output(["dpkg-query", "-W"]) == b"bash=5.2\n"
+    with pytest.raises(subprocess.CalledProcessError):
+        rootfs.check_output("smartctl -H /dev/sda", shell=True)
+    with pytest.raises(FileNotFoundError):
+        rootfs.check_output(["pacman", "-Q"])
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or sys.platform == "win32", reason="needs symlinks")
+def test_capture_round_trip(tmp_path, replay):
+    live = tmp_path / "live"
+    (live / "devices" / "net0").mkdir(parents=True)
+    (live / "devices" / "net0" / "mtu").write_text("1500\n")
+    (live / "class").mkdir()
+    os.symlink("../devices/net0", str(live / "class" / "net0"))
+    output = str(tmp_path / "capture.tar.gz")
+
+    counts = rootfs.capture(output, globs=[str(live / "class" / "*" / "mtu")],
+                            commands=[[sys.executable, "-c", "print('hello')"]])
+    assert counts == {"files": 1, "commands": 1}
+    with tarfile.open(output) as tar:
+        link = tar.getmember(str(live / "class" / "net0").lstrip("/"))
+        assert link.issym() and link.linkname == "../devices/net0"
+
+    replay(output)
+    replayed = rootfs.path(str(live / "class" / "net0" / "mtu"))
+    with open(replayed) as f:
+        assert f.read() == "1500\n"
+    assert rootfs.check_output([sys.executable, "-c", "print('hello')"]).strip() == b"hello"
+
+
+def test_import_with_root_env(tmp_path):
+    (tmp_path / "proc").mkdir()
+    # the env root used to be applied half way through importing the package
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(rootfs.__file__)))
+    env = dict(os.environ, SYSDOX_ROOT=str(tmp_path), PYTHONPATH=package_dir)
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import sysdox; from sysdox import rootfs; print(rootfs.get_root())"], env=env)
+    assert output.decode().strip() == str(tmp_path)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+def test_capture_does_not_follow_fd_links(tmp_path):
+    import socket
+    secret = tmp_path / "secret.txt"
+    secret.write_text("hunter2")
+    output = str(tmp_path / "capture.tar.gz")
+    with open(str(secret)) as f, socket.socket() as sock:
+        rootfs.capture(output, globs=[f"/proc/{os.getpid()}/fd/*"], commands=[])
+        sock_link = f"proc/{os.getpid()}/fd/{sock.fileno()}"
+        file_link = f"proc/{os.getpid()}/fd/{f.fileno()}"
+    with tarfile.open(output) as tar:
+        names = tar.getnames()
+        assert tar.getmember(sock_link).linkname.startswith("socket:[")
+        assert file_link not in names
+        assert not any(m.isfile() and b"hunter2" in tar.extractfile(m).read() for m in tar.getmembers())
+
+
+def test_extract_without_data_filter_skips_unsafe_members(tmp_path, monkeypatch):
+    import io
+    archive = str(tmp_path / "evil.tar")
+    with tarfile.open(archive, "w") as tar:
+        for name in ("proc/stat", "/etc/evil", "../evil", "proc/../../evil"):
+            info = tarfile.TarInfo(name)
+            info.size = 2
+            tar.addfile(info, io.BytesIO(b"ok"))
+        for name, target in (("proc/self", "1"), ("proc/out", "../../etc"), ("proc/abs", "/etc")):
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tar.addfile(info)
+    monkeypatch.delattr(tarfile, "data_filter", raising=False)
+    directory = rootfs.extract(archive)
+    found = sorted(os.path.relpath(os.path.join(d, n), directory)
+                   for d, dirs, files in os.walk(directory) for n in dirs + files)
+    assert found == ["proc", os.path.join("proc", "self"), os.path.join("proc", "stat")]
+    assert not (tmp_path / "evil").exists()
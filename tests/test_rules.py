@@ -0,0 +1,119 @@
+import json
+import pytest
+from sysdox import registry
+from sysdox.rules import Rule, RuleEngine, Window, AlertFile, load_rules
+
+
+def test_window_aggregates():
+    avg, low, high, rate = Window("avg", 30), Window("min", 30), Window("max", 30), Window("rate", 30)
+    for ts, value in [(0, 10.0), (10, 30.0), (20, 20.0), (30, 5.0), (40, 50.0)]:
+        results = [w.add(ts, value) for w in (avg, low, high, rate)]
+    # the window at ts=40 holds ts 20, 30 and 40
+    assert results == [25.0, 5.0, 50.0, 1.5]
+    with pytest.raises(ValueError):
+        Window("median", 10)
+
+
+def test_rule_parsing():
+    rule = Rule("disk", 'specs.storage_info.*.health != "Healthy"')
+    assert rule.collector == "specs"
+    assert rule.literal == "Healthy" and not rule.numeric
+
+    rule = Rule("busy", "avg(cpustat.hot_cores.average_busy, 300) > 80")
+    assert (rule.func, rule.window, rule.literal) == ("avg", 300.0, 80.0)
+
+    assert Rule("up", "network.interface_stats.*.is_up == false").literal is False
+    for bad in ("system.ram_info.ram_percent", "median(system.x, 5) > 1", "a.b > ", "a.b > yes",
+                'a.b > "abc"', "a.b <= true", "avg(a.b, 5) > null"):
+        with pytest.raises(ValueError):
+            Rule("bad", bad)
+
+
+def test_for_duration_and_resolve():
+    engine = RuleEngine([Rule("ram", "system.ram_info.ram_percent > 90", for_seconds=300)])
+    path = "system.ram_info.ram_percent"
+    assert engine.evaluate({"ram": {path: "95.0 %"}}, 0) == []
+    assert engine.evaluate({"ram": {path: "96.0 %"}}, 200) == []
+    [alert] = engine.evaluate({"ram": {path: "97.5 %"}}, 300)
+    assert (alert["state"], alert["value"]) == ("firing", 97.5)
+    assert engine.evaluate({"ram": {path: "99 %"}}, 310) == []  # already firing
+    [alert] = engine.evaluate({"ram": {path: "50 %"}}, 320)
+    assert alert["state"] == "resolved"
+
+
+def test_wildcard_series_and_vanished_paths():
+    engine = RuleEngine([Rule("down", "network.interface_stats.*.is_up == false")])
+    alerts = engine.evaluate({"down": {"network.interface_stats.eth0.is_up": True,
+                                       "network.interface_stats.eth1.is_up": False}}, 0)
+    assert [a["path"] for a in alerts] == ["network.interface_stats.eth1.is_up"]
+    assert engine.firing() == [("down", "network.interface_stats.eth1.is_up")]
+    [alert] = engine.evaluate({"down": {"network.interface_stats.eth0.is_up": True}}, 10)
+    assert alert["state"] == "resolved"
+
+
+def test_sample_runs_only_referenced_collectors():
+    calls = []
+    registry.register("rules_probe", lambda: calls.append(1) or {"load": {"value": 3}}, default=False)
+    try:
+        engine = RuleEngine([Rule("a", "rules_probe.load.value > 2"), Rule("b", "rules_probe.load.value < 1")])
+        assert engine.collectors() == ["rules_probe"]
+        alerts = engine.sample(ts=0)
+        assert [a["rule"] for a in alerts] == ["a"]
+        assert len(calls) == 1  # shared between both rules
+    finally:
+        registry._collectors.pop("rules_probe")
+
+
+def test_sample_through_governor():
+    from sysdox.overhead import Governor
+    calls = []
+    registry.register("rules_probe", lambda: calls.append(1) or {"load": {"value": 3}},
+                      default=False, cost=registry.EXPENSIVE)
+    # a negative budget keeps the governor degraded from the first tick
+    governor = Governor(budget=-1.0)
+    try:
+        engine = RuleEngine([Rule("a", "rules_probe.load.value > 2")])
+        assert [a["rule"] for a in engine.sample(ts=0, governor=governor)] == ["a"]
+        engine.sample(ts=1, governor=governor)
+        assert len(calls) == 1  # the second tick was served from the last result
+        assert engine.firing() == [("a", "rules_probe.load.value")]
+    finally:
+        registry._collectors.pop("rules_probe")
+
+
+def test_load_rules_and_alert_file(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps([{"name": "ram", "expr": "system.ram_info.ram_percent > 90", "for": 60,
+                                  "severity": "critical"}]))
+    [rule] = load_rules(str(rules))
+    assert (rule.for_seconds, rule.severity) == (60, "critical")
+
+    output = AlertFile(str(tmp_path / "alerts.jsonl"))
+    output.send({"rule": "ram", "state": "firing"})
+    output.close()
+    assert json.loads((tmp_path / "alerts.jsonl").read_text()) == {"rule": "ram", "state": "firing"}
+
+
+def test_load_rules_rejects_duplicate_names(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps([{"name": "ram", "expr": "system.ram_info.ram_percent > 90"},
+                                 {"name": "ram", "expr": "system.ram_info.ram_percent > 95"}]))
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_rules(str(rules))
+
+
+def test_failures_are_logged(tmp_path):
+    from sysdox import verbose
+    from sysdox.rules import AlertSocket
+    log = tmp_path / "sysdox.log"
+    verbose.configure("warning", str(log))
+    try:
+        assert RuleEngine([Rule("a", "no_such_collector.value > 1")]).sample(ts=0) == []
+        sink = AlertSocket(str(tmp_path / "nobody.sock"))
+        sink.send({"rule": "a"})
+        sink.close()
+    finally:
+        verbose.configure("off")
+    failed, undelivered = [json.loads(line) for line in log.read_text().splitlines()]
+    assert failed["rule"] == "a" and "no_such_collector" in failed["error"]["message"]
+    assert undelivered["path"].endswith("nobody.sock")
@@ -0,0 +1,127 @@
+import struct
+import threading
+import pytest
+from sysdox.shm import ShmPublisher, ShmReader, ShmSink, GENERATION_OFFSET
+
+
+def snapshot(n):
+    return {
+        "system": {"uptime": {"uptime_seconds": n}, "os_info": {"os": "Linux"}},
+        "specs": {"gpu_info": "No GPU information found"},
+        "cpustat": [n, n + 1],
+    }
+
+
+def test_publish_and_read(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    publisher = ShmPublisher(path, size=64 * 1024)
+    publisher.publish(snapshot(1), ts=100.0)
+    reader = ShmReader(path)
+
+    assert reader.generation == 2
+    assert reader.get("system.uptime.uptime_seconds") == 1
+    assert reader.get("system.os_info") == {"os": "Linux"}
+    assert reader.get("cpustat.1") == 2
+    assert reader.snapshot() == (100.0, snapshot(1))
+
+    publisher.publish(snapshot(2), ts=160.0)
+    assert reader.generation == 4
+    assert reader.get("system.uptime.uptime_seconds") == 2
+    with pytest.raises(KeyError):
+        reader.get("network")
+    reader.close()
+    publisher.close()
+
+
+def test_reader_waits_for_writer(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    publisher = ShmPublisher(path, size=64 * 1024)
+    publisher.publish(snapshot(1))
+    reader = ShmReader(path, retries=5)
+
+    # an odd generation means a write is in progress, readers must not use the data
+    struct.pack_into("<Q", publisher.map, GENERATION_OFFSET, 3)
+    with pytest.raises(TimeoutError):
+        reader.get("system.uptime")
+    struct.pack_into("<Q", publisher.map, GENERATION_OFFSET, 2)
+    assert reader.get("system.uptime") == {"uptime_seconds": 1}
+    reader.close()
+    publisher.close()
+
+
+def test_concurrent_readers_never_see_torn_data(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    publisher = ShmPublisher(path, size=64 * 1024)
+    publisher.publish(snapshot(0))
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            publisher.publish(snapshot(n))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        reader = ShmReader(path, retries=100000)
+        for _ in range(200):
+            ts, snap = reader.snapshot()
+            n = snap["system"]["uptime"]["uptime_seconds"]
+            assert snap["cpustat"] == [n, n + 1]
+        reader.close()
+    finally:
+        stop.set()
+        thread.join()
+        publisher.close()
+
+
+def test_too_large_snapshot(tmp_path):
+    publisher = ShmPublisher(str(tmp_path / "small.shm"), size=128)
+    with pytest.raises(ValueError):
+        publisher.publish({"extra": {"packages": {f"pkg{i}": "1.0" for i in range(100)}}})
+    publisher.close()
+
+
+def test_sink_keeps_generation_across_restarts(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    sink = ShmSink(path, size=64 * 1024)
+    sink.write(1.0, snapshot(1))
+    sink.close()
+    sink = ShmSink(path, size=64 * 1024)
+    sink.write(2.0, snapshot(2))
+    reader = ShmReader(path)
+    assert reader.generation == 4
+    reader.close()
+    sink.close()
+
+
+def test_restarted_publisher_keeps_previous_snapshot(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    publisher = ShmPublisher(path, size=64 * 1024)
+    publisher.publish(snapshot(1), ts=1.0)
+    publisher.close()
+    publisher = ShmPublisher(path, size=64 * 1024)
+    reader = ShmReader(path)
+    # nothing published by the new process yet, readers still get the last snapshot
+    assert reader.snapshot() == (1.0, snapshot(1))
+    publisher.publish(snapshot(2), ts=2.0)
+    assert reader.snapshot() == (2.0, snapshot(2))
+    reader.close()
+    publisher.close()
+
+
+def test_restart_after_torn_publish(tmp_path):
+    path = str(tmp_path / "sysdox.shm")
+    publisher = ShmPublisher(path, size=64 * 1024)
+    publisher.publish(snapshot(1), ts=1.0)
+    struct.pack_into("<Q", publisher.map, GENERATION_OFFSET, publisher.generation + 1)  # died mid write
+    publisher.close()
+    publisher = ShmPublisher(path, size=64 * 1024)
+    reader = ShmReader(path, retries=3)
+    with pytest.raises(TimeoutError):
+        reader.snapshot()
+    publisher.publish(snapshot(2), ts=2.0)
+    assert reader.snapshot() == (2.0, snapshot(2))
+    reader.close()
+    publisher.close()
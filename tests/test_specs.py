@@ -0,0 +1,79 @@
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from sysdox import specs
+from sysdox.specs import get_storage_info
+
+
+def part(device, mountpoint, fstype):
+    return MagicMock(device=device, mountpoint=mountpoint, fstype=fstype)
+
+
+def usage(total=100 * 1024 ** 3, used=40 * 1024 ** 3, free=60 * 1024 ** 3, percent=40.0):
+    return MagicMock(total=total, used=used, free=free, percent=percent)
+
+
+@patch("sysdox.specs._smart_health", return_value="Healthy")
+@patch("sysdox.specs.psutil.disk_usage")
+@patch("sysdox.specs.psutil.disk_partitions")
+def test_storage_filters_and_dedupes(mock_partitions, mock_usage, mock_health):
+    """Pseudo filesystems are skipped, bind and overlay mounts collapse onto one device."""
+    mock_partitions.return_value = [
+        part("proc", "/proc", "proc"),
+        part("/dev/sda1", "/", "ext4"),
+        part("/dev/sda1", "/var/lib/docker", "ext4"),
+        part("overlay", "/var/lib/docker/overlay2/abc/merged", "overlay"),
+        part("overlay", "/var/lib/docker/overlay2/def/merged", "overlay"),
+        part("server:/export", "/mnt/nfs", "nfs4"),
+    ]
+    mock_usage.return_value = usage()
+
+    result = get_storage_info(timeout=1.0)
+    assert set(result) == {"/dev/sda1", "overlay", "server:/export"}
+    assert result["/dev/sda1"]["mountpoint"] == "/"
+    assert result["/dev/sda1"]["bind_mounts"] == ["/var/lib/docker"]
+    assert result["/dev/sda1"]["health"] == "Healthy"
+    assert result["overlay"]["bind_mounts"] == ["/var/lib/docker/overlay2/def/merged"]
+    assert result["overlay"]["health"] == "Not applicable"
+    assert result["server:/export"]["health"] == "Not applicable"
+
+    result = get_storage_info(timeout=1.0, include_network=False)
+    assert set(result) == {"/dev/sda1", "overlay"}
+
+
+@patch("sysdox.specs.platform.system", return_value="Linux")
+def test_smart_health_timeout(mock_system):
+    import subprocess
+    with patch("sysdox.specs.rootfs.check_output",
+               side_effect=subprocess.TimeoutExpired("smartctl -H /dev/sda", 10)) as mock_check:
+        assert specs._smart_health("/dev/sda") == "Timed out"
+    assert mock_check.call_args[1]["timeout"] == 10
+
+
+@patch("sysdox.specs._smart_health", return_value="Healthy")
+@patch("sysdox.specs.psutil.disk_partitions")
+def test_storage_reports_stale_mount(mock_partitions, mock_health):
+    """A statvfs that never returns is reported as stale instead of blocking."""
+    mock_partitions.return_value = [
+        part("/dev/sda1", "/", "ext4"),
+        part("server:/export", "/mnt/dead", "nfs"),
+    ]
+    release = threading.Event()
+
+    def fake_usage(mountpoint):
+        if mountpoint == "/mnt/dead":
+            release.wait(5)
+        return usage()
+
+    try:
+        with patch("sysdox.specs.psutil.disk_usage", side_effect=fake_usage):
+            result = get_storage_info(timeout=0.2)
+            assert result["server:/export"]["status"] == "stale"
+            assert result["/dev/sda1"]["percent"] == "40.0%"
+
+            # a second pass must not queue another worker behind the hung one
+            assert "/mnt/dead" in specs._hung_mounts
+            result = get_storage_info(timeout=0.2)
+            assert result["server:/export"]["status"] == "stale"
+    finally:
+        release.set()
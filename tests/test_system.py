@@ -80,3 +80,14 @@ def test_dump_darwin(mock_processor, mock_machine, mock_architecture, mock_versi
     assert data["architecture"] == ("64bit", "Mach-O"), "Architecture mismatch in dump() output"
     assert data["os_info"]["architecture"] == "x86_64", "Machine mismatch in dump() output"
     assert data["processor"] == "Intel Core i9", "Processor mismatch in dump() output"
+
+
+@patch("sysdox.system.platform.system", return_value="Linux")
+@patch("sysdox.system.psutil.cpu_count", return_value=None)
+@patch("sysdox.system.topology.summary", return_value={"threads": 0})
+@patch("sysdox.system.cgroup.effective_limits", return_value={"cpus": 1.0, "memory": 1024})
+def test_cpu_unknown_core_count(mock_limits, mock_summary, mock_count, mock_system):
+    from sysdox.system import cpu
+    info = cpu()
+    assert info["logical_cores"] is None
+    assert "effective_cpus" not in info
@@ -0,0 +1,88 @@
+import os
+import pytest
+from sysdox.topology import parse_cpu_list, iter_cpuinfo, cpuinfo_field, read_topology, summary
+
+CPUINFO = """processor	: 0
+model name	: Test CPU @ 3.00GHz
+microcode	: 0x10
+
+processor	: 1
+model name	: Test CPU @ 3.00GHz
+microcode	: 0x10
+
+processor	: 2
+model name	: Test CPU @ 3.00GHz
+microcode	: 0x12
+
+processor	: 3
+model name	: Test CPU @ 3.00GHz
+microcode	: 0x12
+"""
+
+
+def make_sysfs(root):
+    """Two cores with two SMT threads each, all on NUMA node 0."""
+    for cpu in range(4):
+        base = root / f"cpu{cpu}"
+        topo = base / "topology"
+        topo.mkdir(parents=True)
+        (topo / "physical_package_id").write_text("0\n")
+        (topo / "core_id").write_text(f"{cpu // 2}\n")
+        first = cpu - cpu % 2
+        (topo / "thread_siblings_list").write_text(f"{first}-{first + 1}\n")
+        (base / "node0").mkdir()
+        for index, (level, kind, size, shared) in enumerate([
+            ("1", "Data", "32K", f"{first}-{first + 1}"),
+            ("3", "Unified", "8192K", "0-3"),
+        ]):
+            cache = base / "cache" / f"index{index}"
+            cache.mkdir(parents=True)
+            (cache / "level").write_text(level)
+            (cache / "type").write_text(kind)
+            (cache / "size").write_text(size)
+            (cache / "shared_cpu_list").write_text(shared)
+    (root / "cpufreq").mkdir()
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpu_list("") == []
+    assert parse_cpu_list(None) == []
+
+
+def test_iter_cpuinfo_stops_early(tmp_path):
+    path = tmp_path / "cpuinfo"
+    path.write_text(CPUINFO)
+    blocks = iter_cpuinfo(str(path))
+    first = next(blocks)
+    assert first["processor"] == "0"
+    assert first["microcode"] == "0x10"
+    blocks.close()
+    assert cpuinfo_field("model name", str(path)) == "Test CPU @ 3.00GHz"
+    assert cpuinfo_field("missing", str(path), default="Unknown") == "Unknown"
+
+
+def test_read_topology(tmp_path):
+    sysfs = tmp_path / "cpu"
+    make_sysfs(sysfs)
+    cpuinfo = tmp_path / "cpuinfo"
+    cpuinfo.write_text(CPUINFO)
+
+    topo = read_topology(str(sysfs), str(cpuinfo))
+    assert topo["model_name"] == "Test CPU @ 3.00GHz"
+    assert sorted(topo["cpus"]) == [0, 1, 2, 3]
+    assert topo["cpus"][3]["siblings"] == [2, 3]
+    assert topo["cpus"][3]["numa_node"] == 0
+    assert topo["cpus"][0]["microcode"] == "0x10"
+    assert topo["cpus"][3]["microcode"] == "0x12"
+
+    info = summary(topo)
+    assert info["sockets"] == 1
+    assert info["cores"] == 2
+    assert info["threads"] == 4
+    assert info["smt"] is True
+    assert info["numa_nodes"] == {0: [0, 1, 2, 3]}
+    assert info["caches"] == {
+        "L1d": {"size": "32K", "instances": 2},
+        "L3": {"size": "8192K", "instances": 1}
+    }
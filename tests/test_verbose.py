@@ -0,0 +1,109 @@
+import json
+import pytest
+from sysdox import verbose, registry
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "sysdox.log"
+    verbose.configure("debug", str(path))
+    yield path
+    verbose.configure("off")
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_disabled_does_not_format():
+    verbose.configure("off")
+
+    class Loud:
+        def __str__(self):
+            raise AssertionError("formatted while disabled")
+
+    verbose.debug("value %s", Loud())
+    verbose.error("value %s", Loud())
+    assert not verbose.enabled(verbose.ERROR)
+
+
+def test_json_lines_with_error(log_file):
+    with verbose.collecting("firmware"):
+        verbose.warning("command failed: %s", "fwupdmgr", duration=0.1234567, error=OSError("boom"))
+    verbose.debug("outside")
+    first, second = records(log_file)
+    assert first["level"] == "warning"
+    assert first["msg"] == "command failed: fwupdmgr"
+    assert first["collector"] == "firmware"
+    assert first["duration"] == 0.123457
+    assert first["error"] == {"type": "OSError", "message": "boom"}
+    assert "collector" not in second
+
+
+def test_level_threshold(log_file):
+    verbose.configure("error", str(log_file))
+    verbose.warning("dropped")
+    verbose.error("kept")
+    assert [r["msg"] for r in records(log_file)] == ["kept"]
+
+
+def test_registry_logs_collector_failure(log_file):
+    def broken():
+        raise RuntimeError("no such device")
+
+    registry.register("broken_test", broken, default=False)
+    registry.register("fine_test", lambda: {"ok": True}, default=False)
+    try:
+        assert registry.run(["fine_test"]) == {"fine_test": {"ok": True}}
+        with pytest.raises(RuntimeError):
+            registry.run(["broken_test"])
+    finally:
+        registry._collectors.pop("broken_test")
+        registry._collectors.pop("fine_test")
+    done, failed = records(log_file)
+    assert done["collector"] == "fine_test" and done["msg"] == "collector done"
+    assert failed["collector"] == "broken_test" and failed["level"] == "error"
+    assert failed["error"] == {"type": "RuntimeError", "message": "no such device"}
+    assert failed["duration"] >= 0
+
+
+def test_collector_error_paths_are_logged(log_file, tmp_path, monkeypatch):
+    from sysdox import cpustat, memory
+
+    def unreadable(path=None):
+        raise OSError("gone")
+
+    monkeypatch.setattr(cpustat, "read_proc_stat", unreadable)
+    assert "error" in cpustat.dump(interval=0)
+    assert memory._read(str(tmp_path / "missing")) is None
+    failed, missing = records(log_file)
+    assert (failed["level"], failed["error"]["message"]) == ("warning", "gone")
+    assert missing["level"] == "debug" and missing["path"].endswith("missing")
+
+
+def test_sendlog_still_returns_text(log_file):
+    assert verbose.sendLog("hello", 2) == "WARNING: hello"
+    record, = records(log_file)
+    assert (record["level"], record["msg"]) == ("warning", "hello")
+
+
+def test_parse_level():
+    assert verbose.parse_level("DEBUG") == verbose.DEBUG
+    assert verbose.parse_level("25") == 25
+    assert verbose.parse_level(verbose.ERROR) == verbose.ERROR
+    with pytest.raises(ValueError):
+        verbose.parse_level("loud")
+
+
+@pytest.mark.parametrize("value", ["1", "loud"])
+def test_env_level_never_breaks_import(tmp_path, value):
+    import os
+    import sys
+    import subprocess
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(verbose.__file__)))
+    env = dict(os.environ, SYSDOX_LOG=value, PYTHONPATH=package_dir)
+    env.pop("SYSDOX_LOG_FILE", None)
+    result = subprocess.run([sys.executable, "-c", "import sysdox"], env=env, stderr=subprocess.PIPE)
+    assert result.returncode == 0
+    if value == "loud":
+        assert json.loads(result.stderr.decode().splitlines()[0])["value"] == "loud"